@@ -51,6 +51,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'recipe_app.middleware.SQLInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -93,6 +94,32 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# Rendered page fragments, such as recipe detail pages. Every gunicorn worker
+# must see the same entries and versions, so production keeps them on disk;
+# the single development server keeps them in memory.
+FRAGMENT_CACHE_ENTRIES = 20000
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fragments',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': FRAGMENT_CACHE_ENTRIES},
+    } if DEBUG else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'fragments',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': FRAGMENT_CACHE_ENTRIES},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -138,3 +165,73 @@ STATIC_ROOT = 'static_root'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 TEST_RUNNER = "redgreenunittest.django.runner.RedGreenDiscoverRunner"
+
+# Recipe search
+
+# Answer ingredient and tag filters from each worker's in-memory index. When
+# False they run as a single aggregate query against the database instead.
+RECIPE_SEARCH_INDEX = True
+
+# Number of recipes shown per page of search results
+RECIPE_LIST_PAGE_SIZE = 25
+
+# Number of search results each worker keeps cached, keyed by the normalized
+# search. Entries go stale as soon as any recipe changes.
+RECIPE_SEARCH_CACHE_SIZE = 256
+
+# Number of ingredients listed with facet counts next to search results
+RECIPE_FACET_INGREDIENTS = 10
+
+# Time, in milliseconds, counting facets may take per search. Ingredients
+# that aren't counted by then are left out of the list.
+RECIPE_FACET_TIME_LIMIT_MS = 50
+
+# Most recipes one JSON API request may create or update
+RECIPE_API_BATCH_SIZE = 100
+
+# How often, in seconds, each worker checks whether another worker changed
+# the ingredient names its autocomplete index holds.
+AUTOCOMPLETE_REFRESH_SECONDS = 5
+
+# How often, in seconds, each worker checks whether another worker changed
+# the tags its cached tag catalog holds.
+TAG_CATALOG_REFRESH_SECONDS = 5
+
+
+# SQL instrumentation
+
+# Time every query each request runs and report the totals per URL name in a
+# Server-Timing header and a 'recipe_app.sql' log line.
+SQL_INSTRUMENTATION = bool(os.getenv('RECIPE_BOX_SQL_INSTRUMENTATION', False))
+
+# Number of slowest statements included in each log line
+SQL_INSTRUMENTATION_SLOWEST = 3
+
+# Query budgets by URL name. A request that runs more queries than its view's
+# budget logs a warning.
+SQL_QUERY_BUDGETS = {
+    'recipe-detail': 4,
+    'recipe-search': 2,
+    'recipe-results': 8,
+    'recipe-pantry': 4,
+    'recipe-create': 16,
+    'recipe-update': 20,
+    'ingredient-catalog': 2,
+    'ingredient-autocomplete': 2,
+    'api-recipes': 16,
+    'api-recipe': 24,
+    'api-recipe-batch': 24,
+    'api-ingredients': 2,
+    'api-tags': 2,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'recipe_app.sql': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
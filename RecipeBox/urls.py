@@ -6,6 +6,8 @@ from recipe_app import views
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('recipes/', include('recipe_app.recipe_urls')),
+    path('api/', include('recipe_app.api_urls')),
     path('', views.recipe_search),
-    path('ingredient-autocomplete', views.ingredient_autocomplete, name='ingredient-autocomplete')
+    path('ingredient-autocomplete', views.ingredient_autocomplete, name='ingredient-autocomplete'),
+    path('ingredient-catalog', views.ingredient_catalog, name='ingredient-catalog')
 ]
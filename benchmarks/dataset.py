@@ -0,0 +1,163 @@
+import random
+from collections import namedtuple
+from itertools import product
+
+from recipe_app.catalog import tags_changed
+from recipe_app.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+    make_name_key
+)
+from recipe_app.search.autocomplete import ingredients_changed
+from recipe_app.search.index import recipes_changed
+
+BATCH_SIZE = 5000
+
+# Catalog sizes are written recipes:ingredients:tags, e.g. 50000:5000:300.
+CatalogSize = namedtuple('CatalogSize', 'recipes ingredients tags')
+Catalog = namedtuple('Catalog', 'size ingredient_ids tag_ids recipe_ids')
+
+DEFAULT_ZIPF_EXPONENT = 1.0
+
+STAPLES = [
+    'Salt', 'Olive Oil', 'Onion', 'Garlic', 'Black Pepper', 'Butter', 'Flour',
+    'Sugar', 'Egg', 'Water', 'Milk', 'Lemon', 'Tomato', 'Carrot', 'Celery',
+    'Potato', 'Rice', 'Chicken Breast', 'Parsley', 'Basil', 'Cumin', 'Paprika',
+    'Ginger', 'Soy Sauce', 'Honey', 'Beef', 'Pork Shoulder', 'Shrimp',
+    'Spinach', 'Mushroom', 'Cheddar', 'Parmesan', 'Cream', 'Yogurt', 'Cinnamon',
+    'Vanilla', 'Oregano', 'Thyme', 'Rosemary', 'Chili', 'Lime', 'Cilantro',
+    'Bell Pepper', 'Zucchini', 'Corn', 'Black Beans', 'Chickpeas', 'Lentils',
+    'Bacon', 'Salmon', 'Tofu', 'Coconut Milk', 'Scallion', 'Vinegar',
+    'Mustard', 'Walnut', 'Almond', 'Oats', 'Apple', 'Banana',
+]
+INGREDIENT_MODIFIERS = [
+    '', 'Fresh', 'Dried', 'Ground', 'Chopped', 'Smoked', 'Roasted', 'Organic',
+    'Frozen', 'Toasted', 'Pickled', 'Shredded',
+]
+TAG_WORDS = [
+    'Quick', 'Dinner', 'Vegetarian', 'Breakfast', 'Dessert', 'Vegan',
+    'Gluten Free', 'Spicy', 'Comfort Food', 'Lunch', 'Holiday', 'Baking',
+    'Soup', 'Salad', 'Grilling', 'Slow Cooker', 'One Pot', 'Weeknight',
+    'Party', 'Kid Friendly', 'Meal Prep', 'Low Carb', 'Seafood', 'Summer',
+]
+RECIPE_STYLES = [
+    'Classic', 'Easy', 'Spicy', 'Creamy', 'Crispy', 'Roasted', 'Grandma\'s',
+    'Weeknight', 'Smoky', 'Herbed', 'Lemony', 'Rustic', 'Sheet Pan', 'Quick',
+]
+RECIPE_DISHES = [
+    'Soup', 'Stew', 'Salad', 'Curry', 'Pasta', 'Casserole', 'Tacos', 'Stir Fry',
+    'Bake', 'Risotto', 'Pie', 'Bowl', 'Skillet', 'Sandwich', 'Muffins', 'Chili',
+]
+MEASUREMENTS = [
+    '1 cup', '1/2 cup', '2 tbsp', '1 tbsp', '1 tsp', 'a pinch', '200 g',
+    '500 g', '2', '3 cloves', 'to taste', '1 can',
+]
+STEPS = [
+    'Chop the {0} and the {1}.',
+    'Heat the {0} over medium heat for {n} minutes.',
+    'Stir in the {1} and season to taste.',
+    'Whisk the {0} with the {1} until smooth.',
+    'Simmer for {n} minutes, stirring now and then.',
+    'Bake at 200C for {n} minutes until golden.',
+    'Serve topped with the {1}.',
+]
+
+
+def parse_size(text):
+    try:
+        size = CatalogSize(*(int(part) for part in text.split(':')))
+    except (TypeError, ValueError):
+        raise ValueError(f'Expected recipes:ingredients:tags, got {text!r}')
+    if min(size) < 1:
+        raise ValueError(f'Catalog sizes must be positive, got {text!r}')
+    return size
+
+
+def _names(words, modifiers, count):
+    # Plain names first, so the most popular ranks get the most common
+    # names; past the last combination the names repeat with a number.
+    combinations = [' '.join(filter(None, pair)) for pair in product(modifiers, words)]
+    return [
+        combinations[i] if i < len(combinations)
+        else f'{combinations[i % len(combinations)]} {i // len(combinations) + 1}'
+        for i in range(count)
+    ]
+
+
+def zipf_weights(count, exponent=DEFAULT_ZIPF_EXPONENT):
+    # Rank 1 shows up in the most recipes and the long tail is rare, the way
+    # salt and onion are in nearly everything.
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def _directions(rng, names):
+    return ' '.join(
+        rng.choice(STEPS).format(rng.choice(names), rng.choice(names), n=rng.randint(5, 60))
+        for _ in range(rng.randint(2, 5))
+    )
+
+
+def generate(size, seed=0, zipf_exponent=DEFAULT_ZIPF_EXPONENT):
+    # Loads a catalog into the current database. The same size and seed
+    # always produce the same rows. Ingredient and tag ids come back in
+    # popularity order, most used first.
+    rng = random.Random(seed)
+
+    ingredient_names = _names(STAPLES, INGREDIENT_MODIFIERS, size.ingredients)
+    ingredients = Ingredient.objects.bulk_create(
+        [Ingredient(name=name) for name in ingredient_names], batch_size=BATCH_SIZE)
+    ingredient_ids = [ingredient.pk for ingredient in ingredients]
+    ingredient_weights = zipf_weights(len(ingredient_ids), zipf_exponent)
+
+    tags = Tag.objects.bulk_create(
+        [Tag(name=name) for name in _names(TAG_WORDS, [''], size.tags)],
+        batch_size=BATCH_SIZE)
+    tag_ids = [tag.pk for tag in tags]
+    tag_weights = zipf_weights(len(tag_ids), zipf_exponent)
+
+    recipe_ids = []
+    recipe_keys = set()
+    for start in range(0, size.recipes, BATCH_SIZE):
+        recipes, chosen_ingredients, chosen_tags = [], [], []
+        for _ in range(min(BATCH_SIZE, size.recipes - start)):
+            picks = list(dict.fromkeys(rng.choices(
+                range(len(ingredient_ids)), ingredient_weights, k=rng.randint(4, 12))))
+            names = [ingredient_names[i] for i in picks]
+
+            # Named after the least common ingredient, which says the most
+            # about the dish.
+            name = f'{rng.choice(RECIPE_STYLES)} {names[picks.index(max(picks))]} ' \
+                   f'{rng.choice(RECIPE_DISHES)}'
+            if make_name_key(name) in recipe_keys:
+                name = f'{name} {len(recipe_ids) + len(recipes) + 1}'
+            recipe_keys.add(make_name_key(name))
+
+            recipes.append(Recipe(name=name, directions=_directions(rng, names)))
+            chosen_ingredients.append(picks)
+            chosen_tags.append(set(rng.choices(tag_ids, tag_weights, k=rng.randint(0, 4))))
+
+        recipes = Recipe.objects.bulk_create(recipes)
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
+                recipe_id=recipe.pk,
+                ingredient_id=ingredient_ids[i],
+                measurement=rng.choice(MEASUREMENTS)
+            )
+            for recipe, picks in zip(recipes, chosen_ingredients)
+            for i in picks
+        ], batch_size=BATCH_SIZE)
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+            for recipe, tag_set in zip(recipes, chosen_tags)
+            for tag_id in sorted(tag_set)
+        ], batch_size=BATCH_SIZE)
+        recipe_ids += [recipe.pk for recipe in recipes]
+
+    # bulk_create skips the signals that keep the search indexes current.
+    recipes_changed()
+    ingredients_changed()
+    tags_changed()
+
+    return Catalog(size, ingredient_ids, tag_ids, recipe_ids)
@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('RECIPE_BOX_DEV', '1')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'RecipeBox.settings')
+
+    import django
+    django.setup()
+
+
+@contextmanager
+def scratch_database():
+    # Benchmarks run against a throwaway test database so they can load as
+    # much synthetic data as they like without touching db.sqlite3.
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    # A file rather than SQLite's default in-memory test database, which
+    # outlives destroy_test_db and would leak rows into the next scratch
+    # database in the same process. DEBUG is off, as in production: with it
+    # on every query is also kept in connection.queries.
+    directory = tempfile.TemporaryDirectory()
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings['NAME']
+    test_settings['NAME'] = os.path.join(directory.name, 'scratch.sqlite3')
+
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        test_settings['NAME'] = old_test_name
+        directory.cleanup()
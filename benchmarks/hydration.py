@@ -0,0 +1,71 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+from benchmarks.environment import scratch_database, setup_django
+
+setup_django()
+
+from django.db import models  # noqa: E402
+
+from recipe_app.models import Ingredient  # noqa: E402
+
+BATCH_SIZE = 5000
+
+
+@contextmanager
+def normalizing_from_db(model):
+    # Django's own from_db, which builds every row through __init__ and so
+    # through the name setter: what loading cost when names were normalized
+    # on every instantiation.
+    model.from_db = classmethod(models.Model.from_db.__func__)
+    try:
+        yield
+    finally:
+        del model.from_db
+
+
+def time_load(queryset, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = list(queryset.all())
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), rows
+
+
+def main(row_count, repeat):
+    with scratch_database():
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=f'ingredient number {i}') for i in range(row_count)],
+            batch_size=BATCH_SIZE
+        )
+        queryset = Ingredient.objects.order_by('pk')
+
+        # The SQL and cursor work is the same for both; only building the
+        # instances differs.
+        fast_time, fast_rows = time_load(queryset, repeat)
+        with normalizing_from_db(Ingredient):
+            slow_time, slow_rows = time_load(queryset, repeat)
+
+        if [(r.pk, r.name, r.name_key) for r in fast_rows] != \
+                [(r.pk, r.name, r.name_key) for r in slow_rows]:
+            raise AssertionError('Loaded rows differ')
+
+        print(f'Loading {row_count} ingredients, median of {repeat}:')
+        print(f'  normalizing __init__  {slow_time * 1000:8.2f} ms '
+              f'({slow_time / row_count * 1e6:.2f} us/row)')
+        print(f'  from_db fast path     {fast_time * 1000:8.2f} ms '
+              f'({fast_time / row_count * 1e6:.2f} us/row)')
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    parser = ArgumentParser(
+        description='Compare the cost of hydrating ingredient rows with and '
+                    'without name normalization')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    main(args.rows, args.repeat)
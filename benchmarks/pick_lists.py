@@ -0,0 +1,65 @@
+import re
+import statistics
+import time
+
+from benchmarks.environment import setup_django
+
+setup_django()
+
+from recipe_app.forms.pick_lists import tag_selection_html  # noqa: E402
+from recipe_app.forms.tag_selection_formset import TagSelectionFormsetBase  # noqa: E402
+
+PREFIX = 'pick-list'
+INPUT = re.compile(r'<input [^>]*>')
+
+
+def tag_rows(count):
+    return [(i, f'Tag number {i}', i % 3 == 0) for i in range(1, count + 1)]
+
+
+def tag_formset_html(rows):
+    formset = TagSelectionFormsetBase(prefix=PREFIX, initial=[
+        {'tag_name': name, 'id': id, 'include': selected} for id, name, selected in rows
+    ])
+    return str(formset.management_form) + ''.join(str(form) for form in formset)
+
+
+def time_render(render, rows, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        html = render(rows)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), html
+
+
+def compare(label, rows, formset_render, compact_render, repeat):
+    # Building the rows is left out; only turning them into HTML is timed.
+    formset_time, formset_html = time_render(formset_render, rows, repeat)
+    compact_time, compact_html = time_render(
+        lambda rows: compact_render(rows, PREFIX), rows, repeat)
+
+    if INPUT.findall(formset_html) != INPUT.findall(compact_html):
+        raise AssertionError(f'{label}: rendered fields differ')
+
+    print(f'{label}, {len(rows)} rows, median of {repeat}:')
+    print(f'  formset   {formset_time * 1000:8.2f} ms  {len(formset_html) / 1024:8.1f} KiB')
+    print(f'  compact   {compact_time * 1000:8.2f} ms  {len(compact_html) / 1024:8.1f} KiB'
+          f'  ({formset_time / compact_time:.0f}x faster)')
+
+
+def main(row_count, repeat):
+    compare('Tag selection', tag_rows(row_count),
+            tag_formset_html, tag_selection_html, repeat)
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    parser = ArgumentParser(
+        description='Compare rendering pick lists through formsets and through '
+                    'the compact renderer')
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    main(args.rows, args.repeat)
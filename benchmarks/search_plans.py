@@ -0,0 +1,92 @@
+import statistics
+import time
+
+from benchmarks.environment import scratch_database, setup_django
+
+setup_django()
+
+from benchmarks.dataset import CatalogSize, generate  # noqa: E402
+from recipe_app.models import Recipe  # noqa: E402
+from recipe_app.search.index import RecipeSearchIndex  # noqa: E402
+from recipe_app.search.queries import matching_recipes  # noqa: E402
+
+
+def chained_join_plan(and_ids, or_ids, exclude_ids):
+    # The query recipe_search built before the aggregate rewrite.
+    recipe_matches = Recipe.objects.exclude(ingredients__id__in=exclude_ids)
+    if or_ids:
+        recipe_matches = recipe_matches.filter(ingredients__id__in=or_ids)
+    for id in and_ids:
+        recipe_matches = recipe_matches.filter(ingredients__id=id)
+    return recipe_matches.distinct().order_by('name')
+
+
+def aggregate_plan(and_ids, or_ids, exclude_ids):
+    return matching_recipes(
+        Recipe.objects.all(),
+        and_ids=and_ids,
+        or_ids=or_ids,
+        exclude_ids=exclude_ids
+    ).order_by('name')
+
+
+def time_call(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main(size, and_sizes, repeat, seed, show_plans):
+    with scratch_database():
+        print(f'Loading {size.recipes} recipes / {size.ingredients} ingredients...')
+        ingredient_ids = generate(size, seed).ingredient_ids
+
+        index = RecipeSearchIndex()
+        index.match()
+
+        # The most popular ingredients, so that AND searches still have hits.
+        staples = ingredient_ids[:20]
+        exclude_ids = [ingredient_ids[-1]]
+
+        print(f'{"and":>4} {"matches":>8} {"chained ms":>11} {"aggregate ms":>13} {"index ms":>9}')
+        for size in and_sizes:
+            and_ids = staples[:size]
+
+            chained_time, chained = time_call(
+                lambda: [r.pk for r in chained_join_plan(and_ids, [], exclude_ids)], repeat)
+            aggregate_time, aggregate = time_call(
+                lambda: [r.pk for r in aggregate_plan(and_ids, [], exclude_ids)], repeat)
+            index_time, indexed = time_call(
+                lambda: index.match(and_ids=and_ids, exclude_ids=exclude_ids), repeat)
+
+            if chained != aggregate or set(chained) != set(indexed):
+                raise AssertionError(f'Plans disagree for {size} "and" ingredients')
+
+            print(f'{size:>4} {len(chained):>8} {chained_time * 1000:>11.2f} '
+                  f'{aggregate_time * 1000:>13.2f} {index_time * 1000:>9.2f}')
+
+            if show_plans:
+                print('  chained:\n    ' + chained_join_plan(
+                    and_ids, [], exclude_ids).explain().replace('\n', '\n    '))
+                print('  aggregate:\n    ' + aggregate_plan(
+                    and_ids, [], exclude_ids).explain().replace('\n', '\n    '))
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    parser = ArgumentParser(
+        description='Compare the chained-join and aggregate recipe search plans')
+    parser.add_argument('--recipes', type=int, default=20000)
+    parser.add_argument('--ingredients', type=int, default=2000)
+    parser.add_argument('--tags', type=int, default=100)
+    parser.add_argument('--and-sizes', type=int, nargs='+', default=[2, 4, 6, 8])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--plans', action='store_true',
+                        help='print EXPLAIN QUERY PLAN output for each query')
+    args = parser.parse_args()
+
+    main(CatalogSize(args.recipes, args.ingredients, args.tags), args.and_sizes, args.repeat, args.seed, args.plans)
@@ -0,0 +1,274 @@
+import json
+import math
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.environment import scratch_database, setup_django
+
+setup_django()
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils.http import urlencode  # noqa: E402
+
+from benchmarks.dataset import (  # noqa: E402
+    DEFAULT_ZIPF_EXPONENT,
+    MEASUREMENTS,
+    generate,
+    parse_size,
+    zipf_weights
+)
+from recipe_app.middleware import QueryRecorder  # noqa: E402
+from recipe_app.models import Ingredient, Recipe, Tag  # noqa: E402
+from recipe_app.search.criteria import SearchCriteria  # noqa: E402
+from recipe_app.views import (  # noqa: E402
+    INGREDIENT_LIST_FORMSET_PREFIX,
+    TAG_CREATE_FORMSET_PREFIX
+)
+
+DEFAULT_SIZES = ['1000:200:30', '10000:1000:100', '50000:5000:300']
+
+# Requests per view that aren't measured: the first ones build the search
+# indexes and fill the caches.
+WARMUP_REQUESTS = 3
+
+# Requests per view run again under tracemalloc, which is too slow to leave
+# on while timing.
+MEMORY_REQUESTS = 5
+
+# Any 32 alphanumerics make a valid CSRF secret; sent as both the cookie and
+# the header so POSTs go through CsrfViewMiddleware like a browser's would.
+CSRF_TOKEN = 'recipeboxbenchmarkcsrftoken00000'
+
+
+class WSGIClient:
+    # Calls the WSGI application directly, so every request goes through the
+    # full middleware stack without a socket.
+
+    def __init__(self):
+        self.application = WSGIHandler()
+        self.factory = RequestFactory(
+            HTTP_COOKIE=f'{settings.CSRF_COOKIE_NAME}={CSRF_TOKEN}',
+            HTTP_X_CSRFTOKEN=CSRF_TOKEN
+        )
+
+    def __call__(self, method, path, data=None):
+        environ = getattr(self.factory, method)(path, data or {}).environ
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(int(status.split()[0]))
+
+        response = self.application(environ, start_response)
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return statuses[0]
+
+
+class Workload:
+    # Builds the requests for each view from the catalog, drawing ingredients
+    # and tags with the same popularity skew the catalog was made with.
+
+    def __init__(self, catalog, seed, zipf_exponent):
+        self.catalog = catalog
+        self.rng = random.Random(seed)
+        names = dict(Ingredient.objects.values_list('pk', 'name'))
+        self.ingredient_names = [names[pk] for pk in catalog.ingredient_ids]
+        self.ingredient_weights = zipf_weights(len(catalog.ingredient_ids), zipf_exponent)
+        names = dict(Tag.objects.values_list('pk', 'name'))
+        self.tag_names = [names[pk] for pk in catalog.tag_ids]
+        self.tag_weights = zipf_weights(len(catalog.tag_ids), zipf_exponent)
+        self.created = 0
+
+    def ingredient_picks(self, count):
+        return list(dict.fromkeys(self.rng.choices(
+            range(len(self.ingredient_names)), self.ingredient_weights, k=count)))
+
+    def recipe_form(self, name):
+        ingredients = [self.ingredient_names[i] for i in self.ingredient_picks(8)]
+        data = {
+            'name': name,
+            'directions': 'Mix everything together.',
+            f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS': str(len(ingredients)),
+            f'{INGREDIENT_LIST_FORMSET_PREFIX}-INITIAL_FORMS': '0',
+            f'{TAG_CREATE_FORMSET_PREFIX}-TOTAL_FORMS': '1',
+            f'{TAG_CREATE_FORMSET_PREFIX}-INITIAL_FORMS': '0',
+            f'{TAG_CREATE_FORMSET_PREFIX}-0-tag_name':
+                self.rng.choices(self.tag_names, self.tag_weights)[0],
+        }
+        for x, ingredient in enumerate(ingredients):
+            data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-{x}-name'] = ingredient
+            data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-{x}-measurement'] = \
+                self.rng.choice(MEASUREMENTS)
+        return data
+
+    def recipe_search(self):
+        return 'get', reverse('recipe-search'), None, 200
+
+    def recipe_results(self):
+        picks = self.ingredient_picks(self.rng.randint(1, 2))
+        tag_ids = self.rng.sample(self.catalog.tag_ids, self.rng.randint(0, 1))
+        criteria = SearchCriteria(
+            and_ids=[self.catalog.ingredient_ids[i] for i in picks], tag_ids=tag_ids)
+        path = f'{reverse("recipe-results")}?{urlencode(criteria.params())}'
+        return 'get', path, None, 200
+
+    def recipe_detail(self):
+        pk = self.rng.choice(self.catalog.recipe_ids)
+        return 'get', reverse('recipe-detail', args=[pk]), None, 200
+
+    def recipe_create(self):
+        self.created += 1
+        data = self.recipe_form(f'Benchmark Recipe {self.created}')
+        return 'post', reverse('recipe-create'), data, 302
+
+    def recipe_update(self):
+        pk = self.rng.choice(self.catalog.recipe_ids)
+        data = self.recipe_form(Recipe.objects.values_list('name', flat=True).get(pk=pk))
+        return 'post', reverse('recipe-update', args=[pk]), data, 302
+
+    def ingredient_autocomplete(self):
+        name = self.ingredient_names[self.ingredient_picks(1)[0]]
+        query = name[:self.rng.randint(2, 4)].lower()
+        return 'get', f'{reverse("ingredient-autocomplete")}?{urlencode({"query": query})}', \
+            None, 200
+
+
+VIEWS = {
+    'recipe-search': Workload.recipe_search,
+    'recipe-results': Workload.recipe_results,
+    'recipe-detail': Workload.recipe_detail,
+    'recipe-create': Workload.recipe_create,
+    'recipe-update': Workload.recipe_update,
+    'ingredient-autocomplete': Workload.ingredient_autocomplete,
+}
+
+
+def percentile(values, percent):
+    # Nearest rank, so the result is always a value that was measured.
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def send(client, request):
+    method, path, data, expected_status = request
+    status = client(method, path, data)
+    if status != expected_status:
+        raise AssertionError(f'{method.upper()} {path} returned {status}, not {expected_status}')
+
+
+def measure(client, make_request, request_count):
+    for _ in range(WARMUP_REQUESTS):
+        send(client, make_request())
+
+    timings = []
+    query_counts = []
+    for _ in range(request_count):
+        # Built before the clock starts; update looks up the recipe's name.
+        request = make_request()
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            start = time.perf_counter()
+            send(client, request)
+            timings.append(time.perf_counter() - start)
+        query_counts.append(recorder.count)
+
+    peak = 0
+    tracemalloc.start()
+    try:
+        for _ in range(MEMORY_REQUESTS):
+            request = make_request()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            send(client, request)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'requests': request_count,
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'mean_ms': round(statistics.mean(timings) * 1000, 3),
+        'queries_p50': percentile(query_counts, 50),
+        'queries_max': max(query_counts),
+        'peak_memory_kib': round(peak / 1024, 1),
+    }
+
+
+def run_catalog(size, views, request_count, seed, zipf_exponent):
+    with scratch_database():
+        start = time.perf_counter()
+        catalog = generate(size, seed, zipf_exponent)
+        load_seconds = time.perf_counter() - start
+
+        client = WSGIClient()
+        workload = Workload(catalog, seed, zipf_exponent)
+        results = {}
+        for view in views:
+            results[view] = measure(
+                client, lambda: VIEWS[view](workload), request_count)
+            print(f'  {view:<24} p50 {results[view]["p50_ms"]:>8.2f} ms  '
+                  f'p95 {results[view]["p95_ms"]:>8.2f} ms  '
+                  f'{results[view]["queries_p50"]:>3} queries  '
+                  f'{results[view]["peak_memory_kib"]:>8.1f} KiB',
+                  file=sys.stderr)
+
+    return {**size._asdict(), 'load_seconds': round(load_seconds, 2), 'views': results}
+
+
+def main(sizes, views, request_count, seed, zipf_exponent, output):
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+        },
+        'seed': seed,
+        'zipf_exponent': zipf_exponent,
+        'catalogs': [],
+    }
+    for size in sizes:
+        print(f'{size.recipes} recipes / {size.ingredients} ingredients / '
+              f'{size.tags} tags', file=sys.stderr)
+        report['catalogs'].append(
+            run_catalog(size, views, request_count, seed, zipf_exponent))
+
+    text = json.dumps(report, indent=2) + '\n'
+    if output:
+        with open(output, 'w') as file:
+            file.write(text)
+    else:
+        sys.stdout.write(text)
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    parser = ArgumentParser(
+        description='Time each view through the WSGI handler against synthetic '
+                    'catalogs; the JSON report goes to standard output')
+    parser.add_argument('--sizes', type=parse_size, nargs='+',
+                        default=[parse_size(size) for size in DEFAULT_SIZES],
+                        metavar='RECIPES:INGREDIENTS:TAGS')
+    parser.add_argument('--views', nargs='+', choices=list(VIEWS), default=list(VIEWS))
+    parser.add_argument('--requests', type=int, default=50,
+                        help='measured requests per view')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--zipf-exponent', type=float, default=DEFAULT_ZIPF_EXPONENT)
+    parser.add_argument('--output', '-o', help='write the report to this file')
+    args = parser.parse_args()
+
+    main(args.sizes, args.views, args.requests, args.seed, args.zipf_exponent, args.output)
@@ -0,0 +1,448 @@
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.db.models import Count, Prefetch
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from recipe_app.bulk import create_recipes, update_recipes
+from recipe_app.catalog import tag_catalog
+from recipe_app.forms.forms import IngredientForm, RecipeForm, TagCreationForm
+from recipe_app.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+    make_name_key
+)
+from recipe_app.search import cache as search_cache
+from recipe_app.search.criteria import MAX_ID, SearchCriteria, parse_ids
+from recipe_app.search.index import filter_by_ids
+from recipe_app.search.pagination import (
+    keyset_page,
+    name_prefix_page,
+    offset_page
+)
+
+# A JSON API over the same recipes as the HTML pages. Recipes are written as
+#   {"name": ..., "directions": ...,
+#    "ingredients": [{"name": ..., "measurement": ...}, ...], "tags": [...]}
+# and read back with only the fields named in ?fields=, e.g. fields=id,name.
+# Writes go through recipe_app.bulk, whatever the number of recipes.
+
+RECIPE_FIELD_VALUES = {
+    'id': lambda recipe: recipe.pk,
+    'name': lambda recipe: recipe.name,
+    'directions': lambda recipe: recipe.directions or '',
+    'ingredients': lambda recipe: [
+        {'name': row.ingredient.name, 'measurement': row.measurement}
+        for row in recipe.recipeingredient_set.all()
+    ],
+    'tags': lambda recipe: [tag.name for tag in recipe.tags.all()],
+    'url': lambda recipe: reverse('recipe-detail', args=[recipe.pk])
+}
+RECIPE_FIELDS = tuple(RECIPE_FIELD_VALUES)
+RECIPE_LIST_FIELDS = ('id', 'name', 'url')
+FIELDS_PARAM = 'fields'
+
+INGREDIENT_PAGE_SIZE = 100
+INGREDIENT_MAX_PAGE_SIZE = 500
+
+JSON_CONTENT_TYPE = 'application/json'
+JSON_CONTENT_TYPE_ERROR = 'Expected a JSON request body'
+INVALID_JSON_ERROR = 'Request body is not valid JSON'
+OBJECT_ERROR = 'Expected a JSON object'
+LIST_ERROR = 'Expected a list'
+STRING_ERROR = 'Expected a string'
+RECIPE_ID_ERROR = 'Expected the id of an existing recipe'
+DUPLICATE_RECIPE_ERROR = 'Recipe appears more than once'
+RECIPE_NAME_TAKEN_ERROR = 'A recipe with this name already exists'
+RECIPE_NOT_FOUND_ERROR = 'Recipe not found'
+
+
+class ApiError(Exception):
+
+    def __init__(self, status, error=None, errors=None):
+        super().__init__(error)
+        self.status = status
+        self.body = {'error': error} if errors is None else {'errors': errors}
+
+
+def api_view(methods):
+    # Scripts can't fetch a CSRF token, so the API is exempt. A browser can't
+    # send a cross-site application/json body without a preflight, which
+    # covers the writes the token would otherwise protect.
+    def decorator(view):
+        @csrf_exempt
+        @require_http_methods(methods)
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                return view(request, *args, **kwargs)
+            except ApiError as error:
+                return JsonResponse(error.body, status=error.status)
+        return wrapper
+    return decorator
+
+
+def _json_body(request):
+    if request.content_type != JSON_CONTENT_TYPE:
+        raise ApiError(415, JSON_CONTENT_TYPE_ERROR)
+    try:
+        return json.loads(request.body)
+    except ValueError:
+        raise ApiError(400, INVALID_JSON_ERROR)
+
+
+def _requested_fields(request, default):
+    if FIELDS_PARAM not in request.GET:
+        return default
+    fields = tuple(dict.fromkeys(
+        field.strip() for field in request.GET[FIELDS_PARAM].split(',') if field.strip()))
+    unknown = [field for field in fields if field not in RECIPE_FIELD_VALUES]
+    if unknown:
+        raise ApiError(400, f'Unknown fields: {", ".join(unknown)}. '
+                            f'Choose from {", ".join(RECIPE_FIELDS)}.')
+    return fields
+
+
+def _recipe_queryset(fields):
+    # Only what the fields need is read: ingredients and tags cost a query
+    # each, and only when asked for. The name and its key are always loaded
+    # for paging.
+    recipes = Recipe.objects.only(
+        'name', 'name_key', *(['directions'] if 'directions' in fields else []))
+    if 'ingredients' in fields:
+        recipes = recipes.prefetch_related(Prefetch(
+            'recipeingredient_set',
+            queryset=RecipeIngredient.objects.select_related('ingredient').only(
+                'recipe', 'measurement', 'ingredient__name').order_by('pk')
+        ))
+    if 'tags' in fields:
+        recipes = recipes.prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.only('name').order_by('name')))
+    return recipes
+
+
+def _recipe_json(recipe, fields):
+    return {field: RECIPE_FIELD_VALUES[field](recipe) for field in fields}
+
+
+def _recipes_json(recipe_ids, fields):
+    recipes = _recipe_queryset(fields).in_bulk(recipe_ids)
+    return [_recipe_json(recipes[id], fields) for id in recipe_ids if id in recipes]
+
+
+def _form_errors(form):
+    return {field: list(messages) for field, messages in form.errors.items()}
+
+
+def _text(data, field, errors):
+    value = data.get(field)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        errors[field] = [STRING_ERROR]
+        return ''
+    try:
+        return RecipeForm.base_fields[field].clean(value)
+    except ValidationError as error:
+        errors[field] = error.messages
+        return ''
+
+
+def _ingredients(data, errors):
+    if not isinstance(data, list):
+        errors['ingredients'] = [LIST_ERROR]
+        return []
+
+    ingredients = []
+    ingredient_errors = {}
+    for i, entry in enumerate(data):
+        if not isinstance(entry, dict):
+            ingredient_errors[i] = {'__all__': [OBJECT_ERROR]}
+            continue
+        form = IngredientForm({
+            'name': entry.get('name') or '',
+            'measurement': entry.get('measurement') or ''
+        })
+        if not form.is_valid():
+            ingredient_errors[i] = _form_errors(form)
+        elif form.cleaned_data['name']:
+            ingredients.append(
+                (form.cleaned_data['name'], form.cleaned_data['measurement']))
+    if ingredient_errors:
+        errors['ingredients'] = ingredient_errors
+    return ingredients
+
+
+def _tags(data, errors):
+    if not isinstance(data, list):
+        errors['tags'] = [LIST_ERROR]
+        return []
+
+    tags = []
+    tag_errors = {}
+    for i, name in enumerate(data):
+        if not isinstance(name, str):
+            tag_errors[i] = [STRING_ERROR]
+            continue
+        form = TagCreationForm({'tag_name': name})
+        if form.is_valid():
+            tags.append(form.cleaned_data['tag_name'])
+        else:
+            tag_errors[i] = list(form.errors['tag_name'])
+    if tag_errors:
+        errors['tags'] = tag_errors
+    return tags
+
+
+def _parse_recipe(data, partial=False):
+    # Returns the transfer record and the errors, field by field, that the
+    # HTML form would have shown. A partial record holds only the fields the
+    # data gave.
+    if not isinstance(data, dict):
+        return {}, {'__all__': [OBJECT_ERROR]}
+
+    record = {}
+    errors = {}
+    if not partial or 'name' in data:
+        record['name'] = _text(data, 'name', errors)
+        if not record['name'] and 'name' not in errors:
+            errors['name'] = [RecipeForm.name_error]
+    if not partial or 'directions' in data:
+        record['directions'] = _text(data, 'directions', errors)
+    if not partial or 'ingredients' in data:
+        record['ingredients'] = _ingredients(data.get('ingredients') or [], errors)
+    if not partial or 'tags' in data:
+        record['tags'] = _tags(data.get('tags') or [], errors)
+
+    if not partial and not record['directions'] and not record['ingredients']:
+        errors.setdefault('name', []).append(RecipeForm.content_error)
+    return record, errors
+
+
+def _batch(data):
+    if not isinstance(data, dict) or not isinstance(data.get('recipes'), list):
+        raise ApiError(400, 'Expected {"recipes": [...]}')
+    entries = data['recipes']
+    if len(entries) > settings.RECIPE_API_BATCH_SIZE:
+        raise ApiError(
+            400, f'At most {settings.RECIPE_API_BATCH_SIZE} recipes per request')
+    return entries
+
+
+def _create(entries):
+    # Returns the new recipes' ids, or raises with the errors of every entry.
+    records = []
+    errors = {}
+    for i, entry in enumerate(entries):
+        record, record_errors = _parse_recipe(entry)
+        records.append(record)
+        if record_errors:
+            errors[i] = record_errors
+
+    keys = [make_name_key(record.get('name', '')) for record in records]
+    taken = set(Recipe.objects.filter(name_key__in=keys).values_list('name_key', flat=True))
+    for i, key in enumerate(keys):
+        if key and (key in taken or key in keys[:i]):
+            errors.setdefault(i, {}).setdefault('name', []).append(RECIPE_NAME_TAKEN_ERROR)
+
+    if errors:
+        raise ApiError(400, errors=dict(sorted(errors.items())))
+    try:
+        return [recipe.pk for recipe in create_recipes(records)]
+    except IntegrityError:
+        # Another request took one of the names since they were checked.
+        raise ApiError(409, RECIPE_NAME_TAKEN_ERROR)
+
+
+def _update(changes):
+    # changes maps recipe ids to the entries updating them. Returns the ids,
+    # or raises with the errors of every entry.
+    records = {}
+    errors = {}
+    for pk, entry in changes.items():
+        records[pk], record_errors = _parse_recipe(entry, partial=True)
+        if record_errors:
+            errors[pk] = record_errors
+
+    # Names must stay unique, and a recipe can't be left with neither
+    # directions nor ingredients.
+    keys = {pk: make_name_key(record['name']) for pk, record in records.items()
+            if record.get('name')}
+    owners = dict(Recipe.objects.filter(
+        name_key__in=keys.values()).values_list('name_key', 'pk'))
+    renamed = list(keys.values())
+    for pk, key in keys.items():
+        if owners.get(key, pk) != pk or renamed.count(key) > 1:
+            errors.setdefault(pk, {}).setdefault('name', []).append(RECIPE_NAME_TAKEN_ERROR)
+
+    emptied = [
+        pk for pk, record in records.items()
+        if not record.get('directions', True) or not record.get('ingredients', True)
+    ]
+    for pk, directions, rows in Recipe.objects.filter(pk__in=emptied).annotate(
+            rows=Count('recipeingredient')).values_list('pk', 'directions', 'rows'):
+        record = records[pk]
+        if not record.get('directions', directions) and not record.get('ingredients', rows):
+            errors.setdefault(pk, {}).setdefault('name', []).append(RecipeForm.content_error)
+
+    if errors:
+        raise ApiError(400, errors=errors)
+    try:
+        update_recipes(records)
+    except IntegrityError:
+        raise ApiError(409, RECIPE_NAME_TAKEN_ERROR)
+    return list(records)
+
+
+@api_view(['GET', 'POST'])
+def recipes(request):
+    if 'POST' == request.method:
+        fields = _requested_fields(request, RECIPE_FIELDS)
+        data = _json_body(request)
+        try:
+            recipe_ids = _create([data])
+        except ApiError as error:
+            # A single recipe's errors aren't keyed by its position.
+            if 'errors' in error.body:
+                error.body['errors'] = error.body['errors'][0]
+            raise
+        return JsonResponse(_recipes_json(recipe_ids, fields)[0], status=201)
+
+    # The same searches as the results page: ?q=, and=, or=, not=, tags=,
+    # paged with the after and before cursors.
+    fields = _requested_fields(request, RECIPE_LIST_FIELDS)
+    criteria = SearchCriteria.from_params(request.GET)
+    recipes = _recipe_queryset(fields)
+
+    if criteria.text:
+        # Ranked matches, best first, paged by position.
+        page = offset_page(
+            search_cache.text_ids(criteria),
+            settings.RECIPE_LIST_PAGE_SIZE,
+            after=request.GET.get('after'),
+            before=request.GET.get('before')
+        )
+        found = recipes.in_bulk(page.items)
+        items = [found[recipe_id] for recipe_id in page.items if recipe_id in found]
+    else:
+        if criteria.has_filters():
+            recipes = filter_by_ids(recipes, search_cache.recipe_ids(criteria))
+        page = keyset_page(
+            recipes,
+            settings.RECIPE_LIST_PAGE_SIZE,
+            after=request.GET.get('after'),
+            before=request.GET.get('before')
+        )
+        items = page.items
+
+    return JsonResponse({
+        'recipes': [_recipe_json(recipe, fields) for recipe in items],
+        'previous': page.previous_cursor,
+        'next': page.next_cursor
+    })
+
+
+@api_view(['GET', 'PATCH'])
+def recipe(request, pk):
+    fields = _requested_fields(request, RECIPE_FIELDS)
+    if 'PATCH' == request.method:
+        data = _json_body(request)
+        if not Recipe.objects.filter(pk=pk).exists():
+            raise ApiError(404, RECIPE_NOT_FOUND_ERROR)
+        try:
+            _update({pk: data})
+        except ApiError as error:
+            # A single recipe's errors aren't keyed by its id.
+            if 'errors' in error.body:
+                error.body['errors'] = error.body['errors'][pk]
+            raise
+
+    found = _recipes_json([pk], fields)
+    if not found:
+        raise ApiError(404, RECIPE_NOT_FOUND_ERROR)
+    return JsonResponse(found[0])
+
+
+@api_view(['POST', 'PATCH'])
+def recipe_batch(request):
+    # POST creates every recipe in {"recipes": [...]}; PATCH updates them,
+    # each entry naming its recipe by "id". All or nothing: any invalid
+    # entry fails the request, with errors keyed by the entry's position.
+    fields = _requested_fields(request, RECIPE_FIELDS)
+    entries = _batch(_json_body(request))
+
+    if 'POST' == request.method:
+        recipe_ids = _create(entries)
+        return JsonResponse({'recipes': _recipes_json(recipe_ids, fields)}, status=201)
+
+    changes = {}
+    positions = {}
+    errors = {}
+    for i, entry in enumerate(entries):
+        pk = entry.get('id') if isinstance(entry, dict) else None
+        if not isinstance(pk, int) or isinstance(pk, bool) or not 0 < pk <= MAX_ID:
+            errors[i] = {'id': [RECIPE_ID_ERROR]}
+        elif pk in changes:
+            errors[i] = {'id': [DUPLICATE_RECIPE_ERROR]}
+        else:
+            changes[pk] = {field: value for field, value in entry.items() if field != 'id'}
+            positions[pk] = i
+    existing = set(Recipe.objects.filter(pk__in=changes).values_list('pk', flat=True))
+    for pk in changes.keys() - existing:
+        errors[positions[pk]] = {'id': [RECIPE_ID_ERROR]}
+    if errors:
+        raise ApiError(400, errors=dict(sorted(errors.items())))
+
+    try:
+        recipe_ids = _update(changes)
+    except ApiError as error:
+        if 'errors' in error.body:
+            error.body['errors'] = dict(sorted(
+                (positions[pk], entry_errors)
+                for pk, entry_errors in error.body['errors'].items()
+            ))
+        raise
+    return JsonResponse({'recipes': _recipes_json(recipe_ids, fields)})
+
+
+@api_view(['GET'])
+def ingredients(request):
+    # Look ingredients up by ?ids=, or page through them by name with an
+    # optional ?prefix=.
+    ingredients = Ingredient.objects.values('id', 'name')
+    if 'ids' in request.GET:
+        ingredients = ingredients.filter(pk__in=parse_ids(request.GET, 'ids'))
+
+    total, offset, ingredients = name_prefix_page(
+        ingredients, request.GET, INGREDIENT_PAGE_SIZE, INGREDIENT_MAX_PAGE_SIZE)
+    return JsonResponse({
+        'total': total,
+        'offset': offset,
+        'ingredients': ingredients
+    })
+
+
+@api_view(['GET'])
+def tags(request):
+    # Every tag, from the cached catalog; ?ids= and ?prefix= narrow it.
+    tags = tag_catalog.tags()
+    if 'ids' in request.GET:
+        ids = set(parse_ids(request.GET, 'ids'))
+        tags = [(id, name) for id, name in tags if id in ids]
+    prefix = make_name_key(request.GET.get('prefix', ''))
+    if prefix:
+        tags = [(id, name) for id, name in tags if make_name_key(name).startswith(prefix)]
+    return JsonResponse({
+        'tags': sorted(
+            ({'id': id, 'name': name} for id, name in tags),
+            key=lambda tag: make_name_key(tag['name'])
+        )
+    })
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import api
+
+urlpatterns = [
+    path('recipes', api.recipes, name='api-recipes'),
+    path('recipes/batch', api.recipe_batch, name='api-recipe-batch'),
+    path('recipes/<int:pk>', api.recipe, name='api-recipe'),
+    path('ingredients', api.ingredients, name='api-ingredients'),
+    path('tags', api.tags, name='api-tags')
+]
@@ -0,0 +1,161 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from recipe_app.catalog import tags_changed
+from recipe_app.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+    make_name_key
+)
+from recipe_app.search.autocomplete import ingredients_changed
+from recipe_app.search.index import recipes_changed
+from recipe_app.signals import batched_recipe_ingredient_writes
+
+# Writes for many recipes at once, in a fixed number of statements however
+# many recipes, ingredients and tags they carry. Recipes are given as
+# recipe_app.transfer records. Bulk writes send no signals, and deletes keep
+# theirs quiet, so these announce their changes themselves.
+
+
+def create_recipes(records):
+    # Returns the new recipes in record order. Recipe names must be new and
+    # distinct; callers check that first.
+    with transaction.atomic(savepoint=False):
+        recipes = Recipe.objects.bulk_create([
+            Recipe(name=record['name'], directions=record['directions'])
+            for record in records
+        ])
+
+        ingredient_pks = Ingredient.objects.ensure(
+            name for record in records for name, _ in record['ingredients'] if name)
+        tag_pks, created_tags = Tag.objects.get_or_create_many(
+            name for record in records for name in record['tags'] if name)
+
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=ingredient_pks[make_name_key(name)],
+                measurement=measurement
+            )
+            for recipe, record in zip(recipes, records)
+            for name, measurement in record['ingredients'] if name
+        ])
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe=recipe, tag_id=tag_pks[key])
+            for recipe, record in zip(recipes, records)
+            for key in dict.fromkeys(make_name_key(name) for name in record['tags'] if name)
+        ])
+
+        recipes_changed([recipe.pk for recipe in recipes])
+        ingredients_changed(ingredient_pks.values())
+        if created_tags:
+            tags_changed()
+
+    return recipes
+
+
+def update_recipes(changes):
+    # changes maps recipe pks to partial records: the parts given replace
+    # what's stored, the rest is left alone. Only rows that actually differ
+    # are written. The recipes must exist and new names must be free.
+    with transaction.atomic(savepoint=False):
+        recipes = Recipe.objects.only('name', 'name_key', 'directions').in_bulk(changes)
+        edited = []
+        for pk, record in changes.items():
+            recipe = recipes[pk]
+            before = (recipe.name, recipe.directions)
+            if 'name' in record:
+                recipe.name = record['name']
+            if 'directions' in record:
+                recipe.directions = record['directions']
+            if (recipe.name, recipe.directions) != before:
+                edited.append(recipe)
+        if edited:
+            Recipe.objects.bulk_update(edited, ['name', 'name_key', 'directions'])
+
+        usage_changed = _update_ingredients(
+            {pk: record['ingredients'] for pk, record in changes.items()
+             if 'ingredients' in record})
+        created_tags = _update_tags(
+            {pk: record['tags'] for pk, record in changes.items() if 'tags' in record})
+
+        recipes_changed(list(changes))
+        if usage_changed:
+            ingredients_changed(usage_changed)
+        if created_tags:
+            tags_changed()
+
+
+def _update_ingredients(ingredients):
+    # Returns the ids of the ingredients used by more or fewer rows.
+    if not ingredients:
+        return set()
+
+    ingredient_pks = Ingredient.objects.ensure(
+        name for entries in ingredients.values() for name, _ in entries if name)
+
+    stored = defaultdict(list)
+    for row in RecipeIngredient.objects.filter(recipe__in=ingredients).only(
+            'recipe', 'ingredient', 'measurement').order_by('pk'):
+        stored[row.recipe_id, row.ingredient_id].append(row)
+
+    added = []
+    changed = []
+    for recipe_id, entries in ingredients.items():
+        for name, measurement in entries:
+            if not name:
+                continue
+            ingredient_id = ingredient_pks[make_name_key(name)]
+            if stored[recipe_id, ingredient_id]:
+                row = stored[recipe_id, ingredient_id].pop(0)
+                if row.measurement != measurement:
+                    row.measurement = measurement
+                    changed.append(row)
+            else:
+                added.append(RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    measurement=measurement
+                ))
+    removed = [row for rows in stored.values() for row in rows]
+
+    if removed:
+        with batched_recipe_ingredient_writes():
+            RecipeIngredient.objects.filter(pk__in=[row.pk for row in removed]).delete()
+    if changed:
+        RecipeIngredient.objects.bulk_update(changed, ['measurement'])
+    if added:
+        RecipeIngredient.objects.bulk_create(added)
+
+    return {row.ingredient_id for row in added + removed}
+
+
+def _update_tags(tags):
+    # Returns whether any of the tags had to be created.
+    if not tags:
+        return False
+
+    tag_pks, created = Tag.objects.get_or_create_many(
+        name for names in tags.values() for name in names if name)
+    wanted = {
+        (recipe_id, tag_pks[make_name_key(name)])
+        for recipe_id, names in tags.items() for name in names if name
+    }
+
+    stored = {}
+    for pk, recipe_id, tag_id in Recipe.tags.through.objects.filter(
+            recipe__in=tags).values_list('pk', 'recipe', 'tag'):
+        stored[recipe_id, tag_id] = pk
+
+    unwanted = [pk for key, pk in stored.items() if key not in wanted]
+    if unwanted:
+        Recipe.tags.through.objects.filter(pk__in=unwanted).delete()
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id, tag_id in sorted(wanted - stored.keys())
+    ])
+
+    return bool(created)
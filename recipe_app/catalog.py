@@ -0,0 +1,43 @@
+from django.db import connection, transaction
+
+from recipe_app.models import Generation, Tag
+from recipe_app.snapshots import GenerationSnapshot
+
+TAGS_GENERATION = 'tags'
+
+
+# Per-process copy of every tag's id and name, for the tag pickers on the
+# search and recipe forms. Local writes drop it once they commit; other
+# workers' writes are noticed on the next generation check, which is made at
+# most every TAG_CATALOG_REFRESH_SECONDS, so most renders run no query.
+class TagCatalog(GenerationSnapshot):
+    refresh_setting = 'TAG_CATALOG_REFRESH_SECONDS'
+
+    def __init__(self):
+        super().__init__(TAGS_GENERATION)
+        self._tags = ()
+
+    def tags(self):
+        with self._lock:
+            self._sync()
+            return self._tags
+
+    # The generation tags() currently reflects, for keying anything rendered
+    # from them; None while the copy can't be trusted, e.g. in a transaction.
+    def generation(self):
+        if connection.in_atomic_block:
+            return None
+        with self._lock:
+            self._sync()
+            return self._generation
+
+    def _rebuild(self):
+        self._tags = tuple(Tag.objects.order_by('pk').values_list('pk', 'name'))
+
+
+tag_catalog = TagCatalog()
+
+
+def tags_changed():
+    Generation.objects.bump(TAGS_GENERATION)
+    transaction.on_commit(tag_catalog.invalidate)
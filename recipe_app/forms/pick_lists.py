@@ -0,0 +1,63 @@
+from django.forms.formsets import (
+    DEFAULT_MAX_NUM,
+    DEFAULT_MIN_NUM,
+    INITIAL_FORM_COUNT,
+    MAX_NUM_FORM_COUNT,
+    MIN_NUM_FORM_COUNT,
+    TOTAL_FORM_COUNT
+)
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from recipe_app.forms.forms import TagSelectionForm
+
+# Read-only pick lists rendered straight from row tuples in one pass, with
+# the field names, values and ids the formsets they stand in for would post.
+# Building and rendering a Form per row costs far more than the markup, and
+# these lists can run to thousands of rows.
+
+TAG_NAME_MAX_LENGTH = TagSelectionForm.base_fields['tag_name'].max_length
+
+
+def _hidden(name, value):
+    return f'<input type="hidden" name="{name}" value="{value}" id="id_{name}">'
+
+
+# Every row counts as an initial form, as in a formset built from initial.
+def management_form_html(prefix, total, min_num=DEFAULT_MIN_NUM, max_num=DEFAULT_MAX_NUM):
+    return ''.join(
+        _hidden(f'{prefix}-{field}', value) for field, value in (
+            (TOTAL_FORM_COUNT, total),
+            (INITIAL_FORM_COUNT, total),
+            (MIN_NUM_FORM_COUNT, min_num),
+            (MAX_NUM_FORM_COUNT, max_num)
+        )
+    )
+
+
+# rows are (id, name, selected).
+def tag_selection_html(rows, prefix, **management):
+    parts = []
+    for i, (id, name, selected) in enumerate(rows):
+        field = f'{prefix}-{i}'
+        parts.append(
+            f'<p><input type="text" name="{field}-tag_name" value="{escape(name)}" '
+            f'readonly="readonly" maxlength="{TAG_NAME_MAX_LENGTH}" id="id_{field}-tag_name"> '
+            f'<label for="id_{field}-include">Include:</label> '
+            f'<input type="checkbox" name="{field}-include" id="id_{field}-include"'
+            f'{" checked" if selected else ""}>'
+            f'{_hidden(f"{field}-id", id)}</p>'
+        )
+    return mark_safe(
+        management_form_html(prefix, len(parts), **management) + ''.join(parts))
+
+
+# rows are (id, name); every tag posts its id under the one parameter.
+def tag_checkbox_html(rows, param):
+    return mark_safe(''.join(
+        f"<div class='tag-selection-form'><label>"
+        f"<input type='checkbox' name='{param}' value='{id}'> {escape(name)}"
+        f"</label></div>"
+        for id, name in rows
+    ))
+
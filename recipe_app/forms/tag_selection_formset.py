@@ -1,8 +1,9 @@
-from django.db.models import QuerySet
 from django.forms import formset_factory
 
+from recipe_app.catalog import tag_catalog
 from recipe_app.forms.forms import TagSelectionForm
-from recipe_app.models import Tag
+from recipe_app.forms.pick_lists import tag_checkbox_html, tag_selection_html
+from recipe_app.search.criteria import TAGS_PARAM
 
 TagSelectionFormsetBase = formset_factory(TagSelectionForm, extra=0)
 
@@ -10,29 +11,31 @@ TagSelectionFormsetBase = formset_factory(TagSelectionForm, extra=0)
 class TagSelectionFormset(TagSelectionFormsetBase):
 
     def __init__(self, selected_tags=None, *args, **kwargs):
+        self.rows = None
         if 'data' not in kwargs:
-            all_tags = Tag.objects.all()
-
-            selected_tag_ids = []
-            if type(selected_tags) == QuerySet:
-                for item in selected_tags:
-                    if type(item) == Tag:
-                        selected_tag_ids.append(item.id)
-
-            form_prefix = kwargs.get('prefix', 'form')
-            formset_data = {
-                f'{form_prefix}-TOTAL_FORMS': str(len(all_tags)),
-                f'{form_prefix}-INITIAL_FORMS': str(len(all_tags)),
-                f'{form_prefix}-MIN_NUM_FORMS': '',
-                f'{form_prefix}-MAX_NUM_FORMS': '',
+            # Built unbound from the cached catalog: no query, and nothing to
+            # validate before it renders.
+            selected_tag_ids = {
+                tag.pk for tag in (selected_tags if selected_tags is not None else ())
             }
-
-            for i, tag in enumerate(all_tags):
-                formset_data[f'{form_prefix}-{i}-tag_name'] = tag.name
-                formset_data[f'{form_prefix}-{i}-id'] = str(tag.id)
-                if tag.id in selected_tag_ids:
-                    formset_data[f'{form_prefix}-{i}-include'] = True
-
-            kwargs['data'] = formset_data
+            self.rows = [
+                (id, name, id in selected_tag_ids) for id, name in tag_catalog.tags()
+            ]
+            kwargs['initial'] = [
+                {'tag_name': name, 'id': id, 'include': selected}
+                for id, name, selected in self.rows
+            ]
 
         super().__init__(*args, **kwargs)
+
+    # The unbound formset as posted by the recipe form, without building a
+    # form per tag. Bound formsets render through their forms, which carry
+    # the errors.
+    def as_pick_list(self):
+        return tag_selection_html(
+            self.rows, self.prefix, min_num=self.min_num, max_num=self.max_num)
+
+    # The tags as the search form's checkboxes, posted as TAGS_PARAM.
+    def as_search_checkboxes(self):
+        return tag_checkbox_html(
+            ((id, name) for id, name, _ in self.rows), TAGS_PARAM)
@@ -0,0 +1,65 @@
+import random
+
+from django.core.cache import caches
+from django.db import connection, transaction
+
+FRAGMENT_CACHE = 'fragments'
+
+
+# Rendered HTML for one kind of page fragment, one entry per object, in the
+# cache every worker shares. Keys carry a version for the object and one for
+# the whole kind. Writes bump them once they commit, so a render that raced a
+# write is stored under a version nobody reads any more.
+class FragmentCache:
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def _cache(self):
+        return caches[FRAGMENT_CACHE]
+
+    def _version_key(self, id=None):
+        return f'{self.name}:version' if id is None else f'{self.name}:version:{id}'
+
+    def _version(self, key):
+        version = self._cache.get(key)
+        if version is None:
+            # A version that was never set or got evicted starts somewhere
+            # random, so it can't come back to one whose HTML is still cached.
+            self._cache.add(key, random.randrange(1, 2 ** 32), timeout=None)
+            version = self._cache.get(key)
+        return version
+
+    def get_or_render(self, id, render):
+        key = f'{self.name}:{self._version(self._version_key())}:' \
+              f'{id}:{self._version(self._version_key(id))}'
+        html = self._cache.get(key)
+        if html is None:
+            html = render()
+            # Same rule as the search caches: rows read inside an open
+            # transaction may still be rolled back.
+            if not connection.in_atomic_block:
+                self._cache.set(key, html)
+        return html
+
+    # ids=None means the changed objects are unknown, so every fragment of
+    # this kind goes stale.
+    def invalidate(self, ids=None):
+        keys = [self._version_key()] if ids is None else [
+            self._version_key(id) for id in set(ids)]
+        transaction.on_commit(lambda: self._bump(keys))
+
+    def _bump(self, keys):
+        for key in keys:
+            try:
+                self._cache.incr(key)
+            except ValueError:
+                # Not cached, so the next read starts it afresh anyway.
+                pass
+
+    def clear(self):
+        self._cache.clear()
+
+
+recipe_detail_fragments = FragmentCache('recipe-detail')
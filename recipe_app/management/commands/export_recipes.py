@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe_app.transfer import EXPORT_CHUNK_SIZE, export_recipes, write_jsonl
+
+
+class Command(BaseCommand):
+    help = 'Export every recipe as JSON lines, in the format import_recipes reads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o',
+            help='File to write; standard output by default.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+            help='Recipes loaded per query.')
+
+    def handle(self, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        lines = write_jsonl(export_recipes(chunk_size=options['chunk_size']))
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        try:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.writelines(lines)
+        except OSError as error:
+            raise CommandError(error)
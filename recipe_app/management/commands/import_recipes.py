@@ -0,0 +1,112 @@
+import itertools
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipe_app.bulk import create_recipes
+from recipe_app.models import Recipe
+from recipe_app.transfer import FORMATS, READERS, RecordError, format_for_path
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def import_batch(records):
+    # Returns how many recipes were created. Recipe names are unique, so
+    # records whose recipe already exists are skipped; that is also what makes
+    # rerunning a batch after an interruption harmless.
+    recipes = {}
+    for record in records:
+        recipe = Recipe(name=record['name'], directions=record['directions'])
+        if recipe.name_key and recipe.name_key not in recipes:
+            recipes[recipe.name_key] = record
+
+    with transaction.atomic():
+        existing = set(Recipe.objects.filter(
+            name_key__in=recipes).values_list('name_key', flat=True))
+        new = [record for key, record in recipes.items() if key not in existing]
+        if new:
+            create_recipes(new)
+
+    return len(new)
+
+
+def _read_checkpoint(path):
+    try:
+        with open(path) as checkpoint:
+            return json.load(checkpoint)['records']
+    except FileNotFoundError:
+        return 0
+    except (ValueError, KeyError, TypeError) as error:
+        raise CommandError(f'Unreadable checkpoint {path}: {error}')
+
+
+def _write_checkpoint(path, records):
+    # Replaced in one step so an interruption can't leave half a file.
+    with open(f'{path}.tmp', 'w') as checkpoint:
+        json.dump({'records': records}, checkpoint)
+    os.replace(f'{path}.tmp', path)
+
+
+class Command(BaseCommand):
+    help = (
+        'Import recipes from a JSON lines or CSV file in batches. Progress is '
+        'checkpointed after every committed batch so an interrupted import '
+        'resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Input format; guessed from the file extension by default.')
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Recipes committed per transaction.')
+        parser.add_argument(
+            '--checkpoint',
+            help='Checkpoint file; defaults to PATH.checkpoint.')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore an existing checkpoint and start from the first record.')
+
+    def handle(self, path, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        read = READERS[options['format'] or format_for_path(path)]
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        done = 0 if options['restart'] else _read_checkpoint(checkpoint_path)
+        if done:
+            self.stdout.write(f'Resuming after record {done}.')
+
+        imported = 0
+        started = time.monotonic()
+        try:
+            with open(path, newline='', encoding='utf-8') as lines:
+                # Only one batch of records is held at a time.
+                records = itertools.islice(read(lines), done, None)
+                while batch := list(itertools.islice(records, options['batch_size'])):
+                    imported += import_batch(batch)
+                    done += len(batch)
+                    _write_checkpoint(checkpoint_path, done)
+
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(
+                        f'{done} records read, {imported} recipes imported '
+                        f'({imported / max(elapsed, 0.001):.0f} recipes/s)'
+                    )
+        except RecordError as error:
+            raise CommandError(
+                f'{path}: {error}. Rerun to resume after record {done}.')
+        except OSError as error:
+            raise CommandError(error)
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} recipes from {done} records in '
+            f'{time.monotonic() - started:.1f}s.'
+        ))
@@ -0,0 +1,96 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger('recipe_app.sql')
+
+# Statements are shortened to this many characters in the log line.
+LOGGED_SQL_LENGTH = 120
+
+
+def _shorten(sql):
+    sql = ' '.join(sql.split())
+    return sql if len(sql) <= LOGGED_SQL_LENGTH else sql[:LOGGED_SQL_LENGTH - 1] + '…'
+
+
+class QueryRecorder:
+    # execute_wrapper callable that times every statement run through the
+    # connection. Statements are grouped by their SQL text before parameters
+    # are bound, so an N+1 loop shows up as one statement run many times.
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.timings = []
+        self.executions = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            self.timings.append((elapsed, sql))
+            self.executions[sql] = self.executions.get(sql, 0) + 1
+
+    def slowest(self, limit):
+        return sorted(self.timings, key=lambda timing: timing[0], reverse=True)[:limit]
+
+    def duplicates(self):
+        return sorted(
+            ((count, sql) for sql, count in self.executions.items() if count > 1),
+            reverse=True
+        )
+
+
+class SQLInstrumentationMiddleware:
+    # Reports the queries each request ran as a Server-Timing header and one
+    # log line tagged with the URL name, and warns when a view goes over its
+    # budget in SQL_QUERY_BUDGETS. Queries run while a streaming response is
+    # being sent happen after this returns and aren't counted.
+
+    def __init__(self, get_response):
+        if not settings.SQL_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else request.path
+
+        response['Server-Timing'] = ', '.join([
+            f'db;desc="{recorder.count} queries";dur={recorder.duration * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+        slowest = [
+            f'{elapsed * 1000:.1f}ms {_shorten(sql)}'
+            for elapsed, sql in recorder.slowest(settings.SQL_INSTRUMENTATION_SLOWEST)
+        ]
+        duplicated = [f'{count}x {_shorten(sql)}' for count, sql in recorder.duplicates()]
+        logger.info(
+            '%s %s [%s] %d queries, %.1fms SQL, %.1fms total; slowest: %s; duplicated: %s',
+            request.method, request.path, view, recorder.count,
+            recorder.duration * 1000, total * 1000,
+            ' | '.join(slowest) or '-', ' | '.join(duplicated) or '-'
+        )
+
+        budget = settings.SQL_QUERY_BUDGETS.get(view)
+        if budget is not None and recorder.count > budget:
+            logger.warning(
+                '%s ran %d queries, over its budget of %d',
+                view, recorder.count, budget
+            )
+
+        return response
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+CREATE_FTS = [
+    """
+    CREATE VIRTUAL TABLE recipe_app_recipe_fts USING fts5(
+        name,
+        directions,
+        content='recipe_app_recipe',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER recipe_app_recipe_fts_insert AFTER INSERT ON recipe_app_recipe BEGIN
+        INSERT INTO recipe_app_recipe_fts (rowid, name, directions)
+        VALUES (new.id, new.name, new.directions);
+    END
+    """,
+    """
+    CREATE TRIGGER recipe_app_recipe_fts_delete AFTER DELETE ON recipe_app_recipe BEGIN
+        INSERT INTO recipe_app_recipe_fts (recipe_app_recipe_fts, rowid, name, directions)
+        VALUES ('delete', old.id, old.name, old.directions);
+    END
+    """,
+    """
+    CREATE TRIGGER recipe_app_recipe_fts_update AFTER UPDATE ON recipe_app_recipe BEGIN
+        INSERT INTO recipe_app_recipe_fts (recipe_app_recipe_fts, rowid, name, directions)
+        VALUES ('delete', old.id, old.name, old.directions);
+        INSERT INTO recipe_app_recipe_fts (rowid, name, directions)
+        VALUES (new.id, new.name, new.directions);
+    END
+    """,
+    "INSERT INTO recipe_app_recipe_fts (recipe_app_recipe_fts) VALUES ('rebuild')",
+]
+
+DROP_FTS = [
+    'DROP TRIGGER IF EXISTS recipe_app_recipe_fts_update',
+    'DROP TRIGGER IF EXISTS recipe_app_recipe_fts_delete',
+    'DROP TRIGGER IF EXISTS recipe_app_recipe_fts_insert',
+    'DROP TABLE IF EXISTS recipe_app_recipe_fts',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe_app', '0010_generation'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_FTS, DROP_FTS),
+    ]
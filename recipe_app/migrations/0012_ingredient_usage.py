@@ -0,0 +1,57 @@
+# Generated by Django 4.1.7 on 2026-10-17 20:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+CREATE_USAGE_TRIGGERS = [
+    """
+    CREATE TRIGGER recipe_app_ingredientusage_insert AFTER INSERT ON recipe_app_recipeingredient BEGIN
+        INSERT INTO recipe_app_ingredientusage (ingredient_id, recipe_count)
+        VALUES (new.ingredient_id, 1)
+        ON CONFLICT (ingredient_id) DO UPDATE SET recipe_count = recipe_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER recipe_app_ingredientusage_delete AFTER DELETE ON recipe_app_recipeingredient BEGIN
+        UPDATE recipe_app_ingredientusage SET recipe_count = recipe_count - 1
+        WHERE ingredient_id = old.ingredient_id;
+    END
+    """,
+    """
+    CREATE TRIGGER recipe_app_ingredientusage_update AFTER UPDATE OF ingredient_id ON recipe_app_recipeingredient BEGIN
+        UPDATE recipe_app_ingredientusage SET recipe_count = recipe_count - 1
+        WHERE ingredient_id = old.ingredient_id;
+        INSERT INTO recipe_app_ingredientusage (ingredient_id, recipe_count)
+        VALUES (new.ingredient_id, 1)
+        ON CONFLICT (ingredient_id) DO UPDATE SET recipe_count = recipe_count + 1;
+    END
+    """,
+    """
+    INSERT INTO recipe_app_ingredientusage (ingredient_id, recipe_count)
+    SELECT ingredient_id, COUNT(*) FROM recipe_app_recipeingredient GROUP BY ingredient_id
+    """,
+]
+
+DROP_USAGE_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS recipe_app_ingredientusage_update',
+    'DROP TRIGGER IF EXISTS recipe_app_ingredientusage_delete',
+    'DROP TRIGGER IF EXISTS recipe_app_ingredientusage_insert',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe_app', '0011_recipe_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngredientUsage',
+            fields=[
+                ('ingredient', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='usage', serialize=False, to='recipe_app.ingredient')),
+                ('recipe_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(CREATE_USAGE_TRIGGERS, DROP_USAGE_TRIGGERS),
+    ]
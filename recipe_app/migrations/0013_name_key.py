@@ -0,0 +1,73 @@
+import importlib
+import unicodedata
+
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 1000
+NAMED_MODELS = ('ingredient', 'tag', 'recipe')
+
+# Making name_key unique rebuilds recipe_app_recipe, which drops the full text
+# triggers from 0011 along with the old table. These put them back.
+_fts = importlib.import_module('recipe_app.migrations.0011_recipe_fts')
+CREATE_FTS_TRIGGERS = [
+    statement for statement in _fts.CREATE_FTS if 'CREATE TRIGGER' in statement
+]
+
+
+def make_name_key(name):
+    return unicodedata.normalize('NFKC', ' '.join(name.split())).casefold()
+
+
+def backfill_name_keys(apps, schema_editor):
+    for model_name in NAMED_MODELS:
+        model = apps.get_model('recipe_app', model_name)
+        seen = set()
+        last_pk = 0
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk).order_by('pk')
+                .only('name')[:BACKFILL_BATCH_SIZE]
+            )
+            if not batch:
+                break
+
+            for row in batch:
+                key = make_name_key(row.name)
+                # Names that only differed by case or spacing were distinct
+                # rows before; keep them apart rather than lose data.
+                if key in seen:
+                    key = f'{key} #{row.pk}'
+                seen.add(key)
+                row.name_key = key
+            model.objects.bulk_update(batch, ['name_key'])
+            last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe_app', '0012_ingredient_usage'),
+    ]
+
+    operations = [
+        # Runs last when migrating backwards, after the rebuilds below.
+        migrations.RunSQL(migrations.RunSQL.noop, CREATE_FTS_TRIGGERS),
+    ] + [
+        migrations.AddField(
+            model_name=model_name,
+            name='name_key',
+            field=models.CharField(editable=False, max_length=200, null=True),
+        )
+        for model_name in NAMED_MODELS
+    ] + [
+        migrations.RunPython(backfill_name_keys, migrations.RunPython.noop),
+    ] + [
+        migrations.AlterField(
+            model_name=model_name,
+            name='name_key',
+            field=models.CharField(editable=False, max_length=200, unique=True),
+        )
+        for model_name in NAMED_MODELS
+    ] + [
+        migrations.RunSQL(CREATE_FTS_TRIGGERS, migrations.RunSQL.noop),
+    ]
@@ -1,63 +1,187 @@
-from django.core.exceptions import ValidationError
-from django.db import models
+import json
+import random
+import unicodedata
 
+from django.db import connections, models
+from django.db.models.base import ModelState
+from django.db.models.query_utils import DeferredAttribute
+from django.db.models.signals import post_save
 
-class Ingredient(models.Model):
-    name = models.CharField(null=False, max_length=200,
-                            unique=True, blank=True)
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.name = self.name.title()
+def clean_name(name):
+    return ' '.join(name.split())
+
+
+def make_name_key(name):
+    # What two names must share to count as the same ingredient, tag or
+    # recipe: case, spacing and Unicode form are ignored.
+    return unicodedata.normalize('NFKC', clean_name(name)).casefold()
+
+
+class NameAttribute(DeferredAttribute):
+    # Assigning a name normalizes it and keeps name_key in step.
+
+    def __set__(self, instance, value):
+        value = clean_name(value)
+        instance.__dict__[self.field.attname] = value
+        instance.__dict__['name_key'] = make_name_key(value)
+
+
+def name_field(**kwargs):
+    field = models.CharField(**kwargs)
+    # The descriptor isn't part of the field's definition, so migrations
+    # don't see it.
+    field.descriptor_class = NameAttribute
+    return field
+
+
+class NameKeyModel(models.Model):
+    # Names are displayed as entered; lookups and uniqueness go through the
+    # indexed name_key column.
+    name_key = models.CharField(max_length=200, unique=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Stored rows are already normalized, so they're put straight into the
+        # instance instead of going through __init__ and the name setter.
+        # Deferred fields are simply left out of __dict__ and load on access.
+        new = cls.__new__(cls)
+        new._state = ModelState()
+        new._state.adding = False
+        new._state.db = db
+        new.__dict__.update(zip(field_names, values))
+        return new
+
+
+class NameManager(models.Manager):
+
+    def ensure(self, names):
+        # Returns {name_key: pk} for the names, inserting the missing ones
+        # with their first spelling. One INSERT for the whole batch, plus one
+        # SELECT when some of the names already existed. Like bulk_create,
+        # sends no signals.
+        return self.get_or_create_many(names)[0]
+
+    def get_or_create_many(self, names):
+        # ensure(), plus the set of name_keys it inserted, for callers that
+        # have to announce new rows themselves.
+        spellings = {}
+        for name in names:
+            spellings.setdefault(make_name_key(name), clean_name(name))
+        if not spellings:
+            return {}, set()
+
+        table = self.model._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            # Passing the names as one JSON array stays under SQLite's bound
+            # variable limit; WHERE true lets SQLite parse the upsert clause
+            # after a SELECT.
+            cursor.execute(
+                f'INSERT INTO {table} (name, name_key) '
+                "SELECT json_extract(value, '$[1]'), json_extract(value, '$[0]') "
+                'FROM json_each(%s) WHERE true '
+                'ON CONFLICT DO NOTHING '
+                'RETURNING name_key, id',
+                [json.dumps(list(spellings.items()))]
+            )
+            pks = dict(cursor.fetchall())
+
+        created = set(pks)
+        if len(pks) < len(spellings):
+            pks.update(self.filter(
+                name_key__in=[key for key in spellings if key not in created]
+            ).values_list('name_key', 'pk'))
+        return {key: pks[key] for key in spellings}, created
+
+
+class NamedModel(NameKeyModel):
+    objects = NameManager()
+
+    class Meta:
+        abstract = True
 
     def save(self, *args, **kwargs):
-        try:
-            self.validate_unique()
-        except ValidationError:
-            self.pk = Ingredient.objects.get(name=self.name).pk
-            return
+        if self.pk is not None:
+            return super().save(*args, **kwargs)
+
+        # Saving a name that already exists adopts the stored row instead of
+        # failing on the unique constraint.
+        using = kwargs.get('using') or type(self).objects.db
+        pks, created = type(self).objects.db_manager(using).get_or_create_many([self.name])
+        self.pk = pks[self.name_key]
+        self._state.adding = False
+        self._state.db = using
+
+        if created:
+            post_save.send(
+                sender=type(self), instance=self, created=True,
+                update_fields=None, raw=False, using=using)
 
-        models.Model.save(self, *args, **kwargs)
+
+class Ingredient(NamedModel):
+    name = name_field(null=False, max_length=200, unique=True, blank=True)
 
     def __str__(self):
         return self.name
 
-class Tag(models.Model):
-    name = models.CharField(
+class Tag(NamedModel):
+    name = name_field(
         null=False,
         max_length=200,
         unique=True,
         blank=False
     )
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.name = self.name.title()
 
-    def save(self, *args, **kwargs):
-        try:
-            self.validate_unique()
-        except ValidationError:
-            self.pk = Tag.objects.get(name=self.name).pk
-            return
-
-        models.Model.save(self, *args, **kwargs)
-
-
-class Recipe(models.Model):
-    name = models.CharField(null=False, max_length=200,
-                            unique=True, blank=True)
+class Recipe(NameKeyModel):
+    name = name_field(null=False, max_length=200, unique=True, blank=True)
     ingredients = models.ManyToManyField(
         Ingredient, through='RecipeIngredient', related_name='ingredients')
     directions = models.CharField(null=True, max_length=5000, blank=True)
     tags = models.ManyToManyField(Tag)
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.name = self.name.title()
-
 
 class RecipeIngredient(models.Model):
     measurement = models.CharField(null=False, max_length=200)
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
     ingredient = models.ForeignKey(Ingredient, on_delete=models.RESTRICT)
+
+
+class IngredientUsage(models.Model):
+    # Number of recipe ingredient rows using each ingredient. Kept current by
+    # triggers on recipe_app_recipeingredient (migration 0012), so it is never
+    # written through the ORM.
+    ingredient = models.OneToOneField(
+        Ingredient, primary_key=True, on_delete=models.CASCADE, related_name='usage')
+    recipe_count = models.PositiveIntegerField(default=0)
+
+
+class GenerationManager(models.Manager):
+
+    def current(self, name):
+        return self.filter(name=name).values_list('value', flat=True).first() or 0
+
+    def bump(self, name):
+        table = self.model._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            # A recreated row (flushed or restored table) starts somewhere
+            # random so it can't replay a generation a process has cached.
+            cursor.execute(
+                f'INSERT INTO {table} (name, value) VALUES (%s, %s) '
+                'ON CONFLICT (name) DO UPDATE SET value = value + 1 '
+                'RETURNING value',
+                [name, random.randrange(1, 2 ** 32)]
+            )
+            return cursor.fetchone()[0]
+
+
+class Generation(models.Model):
+    # Shared change counters; per-process caches compare against these to
+    # notice writes made by other gunicorn workers.
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    objects = GenerationManager()
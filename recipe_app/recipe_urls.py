@@ -7,5 +7,8 @@ urlpatterns = [
     path('detail/<int:pk>/', views.recipe_detail, name='recipe-detail'),
     path('create', views.recipe_create, name='recipe-create'),
     path('update/<int:pk>/', views.recipe_update, name='recipe-update'),
-    path('search', views.recipe_search, name='recipe-search')
+    path('search', views.recipe_search, name='recipe-search'),
+    path('results', views.recipe_results, name='recipe-results'),
+    path('pantry', views.recipe_pantry, name='recipe-pantry'),
+    path('export', views.recipe_export, name='recipe-export')
 ]
@@ -0,0 +1,159 @@
+import heapq
+import re
+from bisect import bisect_left, insort
+
+from django.db import transaction
+from django.db.models.functions import Coalesce
+
+from recipe_app.models import Generation, Ingredient, make_name_key
+from recipe_app.snapshots import GenerationSnapshot
+
+INGREDIENTS_GENERATION = 'ingredients'
+
+# Queries matching more names than this keep their ranked result until the
+# next change, so one or two letter prefixes don't re-rank thousands of names
+# on every keystroke.
+RANKED_MATCH_CACHE_THRESHOLD = 200
+RANKED_MATCH_CACHE_SIZE = 1000
+
+_WORD_START = re.compile(r'\b\w')
+_PREFIX_END = chr(0x10FFFF)
+
+
+def _index_keys(id, name):
+    key = make_name_key(name)
+    return (key, name, id), [
+        (key[match.start():], name, id)
+        for match in _WORD_START.finditer(key) if match.start()
+    ]
+
+
+def _prefix_ids(keys, query):
+    start = bisect_left(keys, (query,))
+    end = bisect_left(keys, (query + _PREFIX_END,), start)
+    return [id for _, _, id in keys[start:end]]
+
+
+# Per-process sorted arrays of name keys, one for whole names and one
+# for every later word start ("mustard" in "Honey Mustard"), so finding the
+# matches is a binary search. Matches are ranked by weight (how many recipes
+# use the ingredient). Local writes are patched in once they commit; other
+# workers' writes are noticed on the next generation check, which is made at
+# most every AUTOCOMPLETE_REFRESH_SECONDS.
+class NameIndex(GenerationSnapshot):
+    refresh_setting = 'AUTOCOMPLETE_REFRESH_SECONDS'
+
+    def __init__(self, rows, generation_name):
+        super().__init__(generation_name)
+        self._rows = rows
+        self._names = {}
+        self._weights = {}
+        self._name_keys = []
+        self._word_keys = []
+        self._ranked = {}
+
+    def match(self, query, limit):
+        query = make_name_key(query)
+        with self._lock:
+            self._sync()
+
+            ranked = self._ranked.get((query, limit))
+            if ranked is not None:
+                return ranked
+
+            # Heavier names first; among equals, names that start with the
+            # query come before ones where only a later word does.
+            name_ids = set(_prefix_ids(self._name_keys, query))
+            matches = name_ids.union(_prefix_ids(self._word_keys, query))
+            ranked = [self._names[id] for id in heapq.nsmallest(
+                limit, matches,
+                key=lambda id: (-self._weights[id], id not in name_ids, self._names[id])
+            )]
+
+            if len(matches) > RANKED_MATCH_CACHE_THRESHOLD:
+                if len(self._ranked) >= RANKED_MATCH_CACHE_SIZE:
+                    self._ranked.clear()
+                self._ranked[(query, limit)] = ranked
+        return ranked
+
+    def apply(self, generation, changes):
+        with self._lock:
+            if (changes is None or self._generation is None
+                    or self._generation != generation - 1):
+                # Check the generation again on the next lookup instead of
+                # waiting out the refresh interval.
+                self._generation = None
+                return
+
+            for id, row in changes.items():
+                if row is not None and self._names.get(id) == row[0]:
+                    self._weights[id] = row[1]
+                    continue
+
+                self._remove(id)
+                if row is not None:
+                    self._add(id, *row)
+            self._ranked.clear()
+            self._generation = generation
+
+    def _rebuild(self):
+        self._names = {}
+        self._weights = {}
+        name_keys = []
+        word_keys = []
+        for id, name, weight in self._rows().iterator():
+            self._names[id] = name
+            self._weights[id] = weight
+            name_key, keys = _index_keys(id, name)
+            name_keys.append(name_key)
+            word_keys += keys
+
+        name_keys.sort()
+        word_keys.sort()
+        self._name_keys = name_keys
+        self._word_keys = word_keys
+        self._ranked = {}
+
+    def _add(self, id, name, weight):
+        self._names[id] = name
+        self._weights[id] = weight
+        name_key, word_keys = _index_keys(id, name)
+        insort(self._name_keys, name_key)
+        for key in word_keys:
+            insort(self._word_keys, key)
+
+    def _remove(self, id):
+        name = self._names.pop(id, None)
+        self._weights.pop(id, None)
+        if name is None:
+            return
+
+        name_key, word_keys = _index_keys(id, name)
+        for keys, key in [(self._name_keys, name_key)] + [
+                (self._word_keys, key) for key in word_keys]:
+            position = bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
+
+
+def ingredient_rows():
+    return Ingredient.objects.values_list(
+        'pk', 'name', Coalesce('usage__recipe_count', 0))
+
+
+ingredient_name_index = NameIndex(ingredient_rows, INGREDIENTS_GENERATION)
+
+
+# Re-reads the given ingredients (their names and usage counts) and patches
+# them into the index once the transaction commits. ingredient_ids=None means
+# the changes are unknown and the index rebuilds instead.
+def ingredients_changed(ingredient_ids=None):
+    changes = None
+    if ingredient_ids is not None:
+        changes = dict.fromkeys(ingredient_ids)
+        for id, name, weight in ingredient_rows().filter(pk__in=changes):
+            changes[id] = (name, weight)
+
+    generation = Generation.objects.bump(INGREDIENTS_GENERATION)
+    transaction.on_commit(
+        lambda: ingredient_name_index.apply(generation, changes))
@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection
+
+from recipe_app.models import Generation, Recipe
+from recipe_app.search import full_text
+from recipe_app.search.criteria import SearchCriteria
+from recipe_app.search.index import RECIPES_GENERATION
+from recipe_app.search.queries import filter_recipes, matching_ids
+
+
+# Per-process LRU of search results. Every entry remembers the recipes
+# generation it was computed at, so any recipe, ingredient list or tag write
+# (from any worker) turns the whole cache into misses.
+class SearchResultCache:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_or_compute(self, key, compute):
+        generation = Generation.objects.current(RECIPES_GENERATION)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        value = compute()
+
+        # Same rule as the search index: a generation read inside an open
+        # transaction may be rolled back and reused, so it can't key a result.
+        if not connection.in_atomic_block:
+            with self._lock:
+                self._entries[key] = (generation, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > settings.RECIPE_SEARCH_CACHE_SIZE:
+                    self._entries.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+search_result_cache = SearchResultCache()
+
+
+def recipe_ids(criteria):
+    # Text is irrelevant to the ingredient/tag filters, so searches that only
+    # differ in text share one entry.
+    filters = criteria.filters()
+    return search_result_cache.get_or_compute(
+        ('ids', SearchCriteria(**filters)),
+        lambda: matching_ids(**filters)
+    )
+
+
+def text_ids(criteria):
+    return search_result_cache.get_or_compute(
+        ('text', criteria),
+        lambda: full_text.ranked_ids(
+            criteria.text,
+            recipes=filter_recipes(Recipe.objects.all(), **criteria.filters())
+        )
+    )
+
+
+def text_hits(text, recipe_ids):
+    # Snippets for one page of text_ids().
+    recipe_ids = tuple(recipe_ids)
+    return search_result_cache.get_or_compute(
+        ('hits', text, recipe_ids),
+        lambda: full_text.hits(text, recipe_ids)
+    )
@@ -0,0 +1,88 @@
+# Searches are described by a handful of compact parameters, e.g.
+# and=12,40&or=7&not=3&tags=2,5&q=soup, so a request only carries the
+# selections that actually filter something.
+AND_PARAM = 'and'
+OR_PARAM = 'or'
+EXCLUDE_PARAM = 'not'
+TAGS_PARAM = 'tags'
+TEXT_PARAM = 'q'
+PANTRY_PARAM = 'have'
+
+# IngredientInclusionForm choices and the parameter each one is sent as.
+INCLUSION_PARAMS = {
+    'and': AND_PARAM,
+    'or': OR_PARAM,
+    'exclude': EXCLUDE_PARAM
+}
+
+
+# The largest id SQLite can store; bigger ones can't name a row and can't
+# even be bound as a query parameter.
+MAX_ID = 2 ** 63 - 1
+
+
+def parse_ids(params, name):
+    ids = set()
+    for value in params.getlist(name):
+        for token in value.split(','):
+            token = token.strip()
+            if token.isdigit() and int(token) <= MAX_ID:
+                ids.add(int(token))
+    return tuple(sorted(ids))
+
+
+class SearchCriteria:
+
+    def __init__(self, and_ids=(), or_ids=(), exclude_ids=(), tag_ids=(), text=''):
+        self.and_ids = tuple(sorted(set(and_ids)))
+        self.or_ids = tuple(sorted(set(or_ids)))
+        self.exclude_ids = tuple(sorted(set(exclude_ids)))
+        self.tag_ids = tuple(sorted(set(tag_ids)))
+        self.text = ' '.join(text.split())
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(
+            and_ids=parse_ids(params, AND_PARAM),
+            or_ids=parse_ids(params, OR_PARAM),
+            exclude_ids=parse_ids(params, EXCLUDE_PARAM),
+            tag_ids=parse_ids(params, TAGS_PARAM),
+            text=params.get(TEXT_PARAM, '')
+        )
+
+    def filters(self):
+        return {
+            'and_ids': self.and_ids,
+            'or_ids': self.or_ids,
+            'exclude_ids': self.exclude_ids,
+            'tag_ids': self.tag_ids
+        }
+
+    def has_filters(self):
+        return any(self.filters().values())
+
+    def params(self):
+        params = {}
+        for name, ids in [
+            (AND_PARAM, self.and_ids),
+            (OR_PARAM, self.or_ids),
+            (EXCLUDE_PARAM, self.exclude_ids),
+            (TAGS_PARAM, self.tag_ids)
+        ]:
+            if ids:
+                params[name] = ','.join(str(id) for id in ids)
+        if self.text:
+            params[TEXT_PARAM] = self.text
+        return params
+
+    def _key(self):
+        return (self.and_ids, self.or_ids, self.exclude_ids, self.tag_ids, self.text)
+
+    def __eq__(self, other):
+        return type(self) == type(other) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f'SearchCriteria({self.params()!r})'
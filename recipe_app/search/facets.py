@@ -0,0 +1,109 @@
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.models import Count
+
+from recipe_app.catalog import tag_catalog
+from recipe_app.models import Ingredient, Recipe, RecipeIngredient
+from recipe_app.search.index import filter_by_ids, recipe_search_index
+from recipe_app.search.queries import matching_recipes
+
+# SQLite checks the time limit every this many virtual machine instructions.
+PROGRESS_CHECK_INTERVAL = 1000
+
+Facets = namedtuple('Facets', 'tags ingredients complete')
+
+
+@contextmanager
+def _time_limit(seconds):
+    # Makes SQLite abandon the running statement, with OperationalError, once
+    # the time is up. Only reads run under it, and an interrupted read leaves
+    # the transaction as it was.
+    deadline = time.monotonic() + seconds
+    connection.ensure_connection()
+    connection.connection.set_progress_handler(
+        lambda: time.monotonic() >= deadline, PROGRESS_CHECK_INTERVAL)
+    try:
+        yield
+    finally:
+        connection.connection.set_progress_handler(None, 0)
+
+
+def _database_counts(filters, recipe_ids, skip_ingredient_ids, ingredient_limit, time_limit):
+    # One GROUP BY per facet over the matching recipes.
+    recipes = Recipe.objects.all()
+    if recipe_ids is not None:
+        recipes = filter_by_ids(recipes, recipe_ids)
+    recipes = matching_recipes(recipes, **filters).values('pk')
+
+    tag_counts, ingredient_counts = {}, []
+    try:
+        with _time_limit(time_limit):
+            tag_counts = dict(
+                Recipe.tags.through.objects.filter(recipe__in=recipes)
+                .values_list('tag_id').annotate(count=Count('*')).order_by()
+            )
+            ingredient_counts = list(
+                RecipeIngredient.objects.filter(recipe__in=recipes)
+                .exclude(ingredient__in=skip_ingredient_ids)
+                .values_list('ingredient_id').annotate(count=Count('*'))
+                .order_by('-count', 'ingredient_id')[:ingredient_limit]
+            )
+    except OperationalError:
+        return tag_counts, ingredient_counts, False
+    return tag_counts, ingredient_counts, True
+
+
+def facets(criteria, recipe_ids=None):
+    # Counts of the results each tag, and each of the most common other
+    # ingredients, would keep if added to the search. recipe_ids narrows the
+    # results further, e.g. to the hits of a text search. Counting stops at
+    # RECIPE_FACET_TIME_LIMIT_MS; complete is False when it did.
+    skip_ingredient_ids = set(
+        criteria.and_ids + criteria.or_ids + criteria.exclude_ids)
+    time_limit = settings.RECIPE_FACET_TIME_LIMIT_MS / 1000
+
+    if settings.RECIPE_SEARCH_INDEX:
+        tag_counts, ingredient_counts, complete = recipe_search_index.facet_counts(
+            **criteria.filters(),
+            recipe_ids=recipe_ids,
+            skip_ingredient_ids=skip_ingredient_ids,
+            ingredient_limit=settings.RECIPE_FACET_INGREDIENTS,
+            time_limit=time_limit
+        )
+    else:
+        tag_counts, ingredient_counts, complete = _database_counts(
+            criteria.filters(), recipe_ids, skip_ingredient_ids,
+            settings.RECIPE_FACET_INGREDIENTS, time_limit)
+
+    tags = sorted(
+        (
+            {
+                'id': tag_id,
+                'name': name,
+                'count': tag_counts.get(tag_id, 0),
+                'selected': tag_id in criteria.tag_ids
+            }
+            for tag_id, name in tag_catalog.tags()
+            if tag_id in tag_counts or tag_id in criteria.tag_ids
+        ),
+        key=lambda tag: (-tag['count'], tag['name'])
+    )
+
+    # Ingredients already in the search are listed first, checked and
+    # without a count.
+    names = dict(Ingredient.objects.filter(
+        pk__in=[id for id, _ in ingredient_counts] + list(criteria.and_ids)
+    ).values_list('pk', 'name'))
+    ingredients = [
+        {'id': id, 'name': names[id], 'count': None, 'selected': True}
+        for id in criteria.and_ids if id in names
+    ] + [
+        {'id': id, 'name': names[id], 'count': count, 'selected': False}
+        for id, count in ingredient_counts if id in names
+    ]
+
+    return Facets(tags, ingredients, complete)
@@ -0,0 +1,99 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from recipe_app.models import Recipe
+
+FTS_TABLE = 'recipe_app_recipe_fts'
+
+# bm25 column weights: a hit in the recipe name counts for more than one
+# buried in the directions.
+NAME_WEIGHT = 10.0
+DIRECTIONS_WEIGHT = 1.0
+
+SNIPPET_TOKENS = 12
+# Control characters can't appear in submitted text, so they're safe to mark
+# the highlights with before the snippet is HTML escaped.
+_HIGHLIGHT_START = '\x02'
+_HIGHLIGHT_END = '\x03'
+
+
+def match_expression(text):
+    # Quoting every word keeps FTS5 operators in user input from being
+    # interpreted; the trailing * makes each word a prefix match.
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def _highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(_HIGHLIGHT_START, '<mark>')
+        .replace(_HIGHLIGHT_END, '</mark>')
+    )
+
+
+def ranked_ids(text, recipes=None):
+    # Every match, best first. Snippets are left to hits(), which only needs
+    # to build them for the page being shown.
+    expression = match_expression(text)
+    if not expression:
+        return []
+
+    sql = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+    params = [expression]
+
+    if recipes is not None and recipes.query.has_filters():
+        recipes_sql, recipes_params = recipes.values('pk').query.sql_with_params()
+        sql += f' AND rowid IN ({recipes_sql})'
+        params += recipes_params
+
+    sql += f' ORDER BY bm25({FTS_TABLE}, %s, %s), rowid'
+    params += [NAME_WEIGHT, DIRECTIONS_WEIGHT]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [recipe_id for recipe_id, in cursor.fetchall()]
+
+
+def hits(text, recipe_ids):
+    # (recipe_id, snippet) for each of the ranked recipe_ids that matches,
+    # in the same order.
+    expression = match_expression(text)
+    if not expression or not recipe_ids:
+        return []
+
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    sql = (
+        f'SELECT rowid, snippet({FTS_TABLE}, -1, %s, %s, %s, %s) '
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid IN ({placeholders})'
+    )
+    params = [_HIGHLIGHT_START, _HIGHLIGHT_END, '…', SNIPPET_TOKENS, expression, *recipe_ids]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        snippets = dict(cursor.fetchall())
+    return [
+        (recipe_id, _highlight(snippets[recipe_id]))
+        for recipe_id in recipe_ids if recipe_id in snippets
+    ]
+
+
+def search(text, recipes=None, limit=None):
+    return hits(text, ranked_ids(text, recipes=recipes)[:limit])
+
+
+def hit_recipes(hits):
+    recipes = Recipe.objects.in_bulk([recipe_id for recipe_id, _ in hits])
+
+    ranked = []
+    for recipe_id, snippet in hits:
+        if recipe_id in recipes:
+            recipes[recipe_id].snippet = snippet
+            ranked.append(recipes[recipe_id])
+    return ranked
+
+
+def ranked_recipes(text, recipes=None, limit=None):
+    return hit_recipes(search(text, recipes=recipes, limit=limit))
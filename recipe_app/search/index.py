@@ -0,0 +1,256 @@
+import heapq
+import json
+import time
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models.expressions import RawSQL
+
+from recipe_app.fragments import recipe_detail_fragments
+from recipe_app.models import Generation, Recipe, RecipeIngredient
+from recipe_app.snapshots import GenerationSnapshot
+
+RECIPES_GENERATION = 'recipes'
+
+
+def _bitset(ids):
+    if not ids:
+        return 0
+
+    bits = bytearray(max(ids) // 8 + 1)
+    for id in ids:
+        bits[id >> 3] |= 1 << (id & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _members(bits):
+    # Scanning the binary string is linear in the bitset size, where peeling
+    # off one bit at a time would copy the whole integer for every member.
+    binary = bin(bits)[:1:-1]
+    members = []
+    position = binary.find('1')
+    while position != -1:
+        members.append(position)
+        position = binary.find('1', position + 1)
+    return members
+
+
+def _invert(recipe_members):
+    postings = defaultdict(list)
+    for recipe_id, members in recipe_members.items():
+        for member in members:
+            postings[member].append(recipe_id)
+    return {member: _bitset(ids) for member, ids in postings.items()}
+
+
+def _move(postings, bit, old_members, new_members):
+    for member in old_members - new_members:
+        remaining = postings.get(member, 0) & ~bit
+        if remaining:
+            postings[member] = remaining
+        else:
+            postings.pop(member, None)
+
+    for member in new_members - old_members:
+        postings[member] = postings.get(member, 0) | bit
+
+
+# Per-process ingredient -> recipe and tag -> recipe bitsets. Writes made in
+# this process are patched in once they commit; writes from other workers show
+# up as a skipped generation and trigger a rebuild on the next lookup.
+class RecipeSearchIndex(GenerationSnapshot):
+
+    def __init__(self):
+        super().__init__(RECIPES_GENERATION)
+        self._recipes = 0
+        self._ingredient_recipes = {}
+        self._tag_recipes = {}
+        self._recipe_ingredients = {}
+        self._recipe_tags = {}
+        # Ingredients by how many recipes use them, built when facets first
+        # need it after a change.
+        self._ingredient_order = None
+
+    def match(self, and_ids=(), or_ids=(), exclude_ids=(), tag_ids=()):
+        with self._lock:
+            self._sync()
+            matches = self._matches(and_ids, or_ids, exclude_ids, tag_ids)
+
+        return _members(matches)
+
+    def facet_counts(self, and_ids=(), or_ids=(), exclude_ids=(), tag_ids=(),
+                     recipe_ids=None, skip_ingredient_ids=(), ingredient_limit=10,
+                     time_limit=None):
+        # How many matching recipes have each tag, and the ingredient_limit
+        # ingredients found in the most of them. Ingredients are counted most
+        # used first, so once the limit is filled and the next one isn't in
+        # more recipes than the weakest count kept, none after it can place.
+        # The scan stops early after time_limit seconds, and complete says
+        # whether it did.
+        with self._lock:
+            self._sync()
+            deadline = None if time_limit is None else time.monotonic() + time_limit
+
+            matches = self._matches(and_ids, or_ids, exclude_ids, tag_ids)
+            if recipe_ids is not None:
+                matches &= _bitset(recipe_ids)
+            if not matches:
+                return {}, [], True
+
+            tag_counts = {}
+            for tag_id, recipes in self._tag_recipes.items():
+                count = (matches & recipes).bit_count()
+                if count:
+                    tag_counts[tag_id] = count
+
+            if self._ingredient_order is None:
+                self._ingredient_order = sorted((
+                    (recipes.bit_count(), ingredient_id)
+                    for ingredient_id, recipes in self._ingredient_recipes.items()
+                ), reverse=True)
+
+            best = []
+            complete = True
+            for position, (used, ingredient_id) in enumerate(self._ingredient_order):
+                if len(best) == ingredient_limit and used <= best[0][0]:
+                    break
+                if (deadline is not None and not position % 64
+                        and time.monotonic() >= deadline):
+                    complete = False
+                    break
+                if ingredient_id in skip_ingredient_ids:
+                    continue
+
+                count = (matches & self._ingredient_recipes[ingredient_id]).bit_count()
+                if count:
+                    entry = (count, -ingredient_id)
+                    if len(best) < ingredient_limit:
+                        heapq.heappush(best, entry)
+                    else:
+                        heapq.heappushpop(best, entry)
+
+        return tag_counts, [
+            (-negated_id, count) for count, negated_id in sorted(best, reverse=True)
+        ], complete
+
+    def _matches(self, and_ids, or_ids, exclude_ids, tag_ids):
+        matches = self._recipes
+        if or_ids:
+            any_of = 0
+            for ingredient_id in or_ids:
+                any_of |= self._ingredient_recipes.get(ingredient_id, 0)
+            matches &= any_of
+        for ingredient_id in and_ids:
+            matches &= self._ingredient_recipes.get(ingredient_id, 0)
+        for tag_id in tag_ids:
+            matches &= self._tag_recipes.get(tag_id, 0)
+        for ingredient_id in exclude_ids:
+            matches &= ~self._ingredient_recipes.get(ingredient_id, 0)
+        return matches
+
+    def pantry_matches(self, ingredient_ids, limit):
+        # Only recipes sharing an ingredient with the pantry are visited, and
+        # the per-recipe ingredient sets give the missing count directly.
+        ingredient_ids = set(ingredient_ids)
+        with self._lock:
+            self._sync()
+
+            hits = Counter()
+            for ingredient_id in ingredient_ids:
+                hits.update(_members(self._ingredient_recipes.get(ingredient_id, 0)))
+
+            best = heapq.nsmallest(limit, hits.items(), key=lambda item: (
+                len(self._recipe_ingredients[item[0]]) - item[1], -item[1], item[0]
+            ))
+            return [
+                (recipe_id, self._recipe_ingredients[recipe_id] - ingredient_ids)
+                for recipe_id, _ in best
+            ]
+
+    def apply(self, generation, recipe_ids):
+        with self._lock:
+            if self._generation is None or self._generation != generation - 1:
+                return
+
+            self._refresh(recipe_ids)
+            self._generation = generation
+
+    def _rebuild(self):
+        recipe_ingredients = defaultdict(set)
+        for recipe_id, ingredient_id in RecipeIngredient.objects.values_list(
+                'recipe_id', 'ingredient_id').iterator():
+            recipe_ingredients[recipe_id].add(ingredient_id)
+
+        recipe_tags = defaultdict(set)
+        for recipe_id, tag_id in Recipe.tags.through.objects.values_list(
+                'recipe_id', 'tag_id').iterator():
+            recipe_tags[recipe_id].add(tag_id)
+
+        recipe_ids = list(Recipe.objects.values_list('pk', flat=True).iterator())
+
+        self._recipes = _bitset(recipe_ids)
+        self._recipe_ingredients = {
+            pk: frozenset(recipe_ingredients.get(pk, ())) for pk in recipe_ids
+        }
+        self._recipe_tags = {
+            pk: frozenset(recipe_tags.get(pk, ())) for pk in recipe_ids
+        }
+        self._ingredient_recipes = _invert(self._recipe_ingredients)
+        self._tag_recipes = _invert(self._recipe_tags)
+        self._ingredient_order = None
+
+    def _refresh(self, recipe_ids):
+        self._ingredient_order = None
+        existing = set(
+            Recipe.objects.filter(pk__in=recipe_ids).values_list('pk', flat=True)
+        )
+
+        ingredients = defaultdict(set)
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+                recipe_id__in=recipe_ids).values_list('recipe_id', 'ingredient_id'):
+            ingredients[recipe_id].add(ingredient_id)
+
+        tags = defaultdict(set)
+        for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+                recipe_id__in=recipe_ids).values_list('recipe_id', 'tag_id'):
+            tags[recipe_id].add(tag_id)
+
+        for recipe_id in recipe_ids:
+            bit = 1 << recipe_id
+            new_ingredients = frozenset(ingredients[recipe_id])
+            new_tags = frozenset(tags[recipe_id])
+
+            _move(self._ingredient_recipes, bit,
+                  self._recipe_ingredients.pop(recipe_id, frozenset()), new_ingredients)
+            _move(self._tag_recipes, bit,
+                  self._recipe_tags.pop(recipe_id, frozenset()), new_tags)
+
+            if recipe_id in existing:
+                self._recipes |= bit
+                self._recipe_ingredients[recipe_id] = new_ingredients
+                self._recipe_tags[recipe_id] = new_tags
+            else:
+                self._recipes &= ~bit
+
+
+recipe_search_index = RecipeSearchIndex()
+
+
+# recipe_ids=None means the affected recipes are unknown, so indexes rebuild
+# on their next lookup instead of patching themselves. Every recipe write
+# comes through here, so it also retires the recipes' cached detail pages.
+def recipes_changed(recipe_ids=None):
+    generation = Generation.objects.bump(RECIPES_GENERATION)
+    if recipe_ids is not None:
+        recipe_ids = set(recipe_ids)
+        transaction.on_commit(
+            lambda: recipe_search_index.apply(generation, recipe_ids))
+    recipe_detail_fragments.invalidate(recipe_ids)
+
+
+def filter_by_ids(queryset, ids):
+    # One JSON parameter instead of one per id keeps large result sets under
+    # SQLite's bound-variable limit.
+    return queryset.filter(
+        pk__in=RawSQL('SELECT value FROM json_each(%s)', [json.dumps(ids)])
+    )
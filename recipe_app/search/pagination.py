@@ -0,0 +1,145 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+
+from recipe_app.models import make_name_key
+
+PREFIX_PARAM = 'prefix'
+OFFSET_PARAM = 'offset'
+LIMIT_PARAM = 'limit'
+
+
+def encode_cursor(recipe):
+    return base64.urlsafe_b64encode(
+        json.dumps([recipe.name_key, recipe.pk]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        name_key, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, TypeError, UnicodeError):
+        return None
+
+    if not isinstance(name_key, str) or not isinstance(pk, int):
+        return None
+    return name_key, pk
+
+
+class KeysetPage:
+
+    def __init__(self, items, has_previous, has_next):
+        self.items = items
+        self.has_previous = has_previous
+        self.has_next = has_next
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous and self.items:
+            return encode_cursor(self.items[0])
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.items:
+            return encode_cursor(self.items[-1])
+
+
+def keyset_page(queryset, page_size, after=None, before=None):
+    # Seeking on (name_key, id) instead of OFFSET lets SQLite start the page
+    # by walking the unique name_key index from the cursor, so later pages
+    # cost the same as the first one. name_key is casefolded, so mixed-case
+    # names sort together; name itself compares with BINARY collation.
+    after = decode_cursor(after) if after else None
+    before = decode_cursor(before) if before else None
+
+    if before:
+        name_key, pk = before
+        queryset = queryset.filter(
+            Q(name_key__lte=name_key) & (Q(name_key__lt=name_key) | Q(pk__lt=pk))
+        ).order_by('-name_key', '-pk')
+    else:
+        queryset = queryset.order_by('name_key', 'pk')
+        if after:
+            name_key, pk = after
+            queryset = queryset.filter(
+                Q(name_key__gte=name_key) & (Q(name_key__gt=name_key) | Q(pk__gt=pk))
+            )
+
+    items = list(queryset[:page_size + 1])
+    has_more = len(items) > page_size
+    items = items[:page_size]
+
+    if before:
+        items.reverse()
+        return KeysetPage(items, has_previous=has_more, has_next=True)
+    return KeysetPage(items, has_previous=after is not None, has_next=has_more)
+
+
+def decode_offset(cursor):
+    try:
+        offset = int(cursor)
+    except (TypeError, ValueError):
+        return None
+    return offset if offset >= 0 else None
+
+
+class OffsetPage:
+
+    def __init__(self, items, start, total):
+        self.items = items
+        self.has_previous = start > 0
+        self.has_next = start + len(items) < total
+        self._start = start
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous:
+            return str(self._start)
+
+    @property
+    def next_cursor(self):
+        if self.has_next:
+            return str(self._start + len(self.items))
+
+
+def offset_page(items, page_size, after=None, before=None):
+    # Pages through a list that is already in order, such as ranked full-text
+    # matches, which have no column to seek on. The cursors are positions in
+    # the list: after is where a page starts, before where it ends.
+    after = decode_offset(after) if after else None
+    before = decode_offset(before) if before else None
+
+    if before is not None:
+        end = min(before, len(items))
+        start = max(0, end - page_size)
+    else:
+        start = min(after or 0, len(items))
+        end = start + page_size
+    return OffsetPage(items[start:end], start, len(items))
+
+
+def int_param(params, name, default, maximum=None):
+    try:
+        value = max(0, int(params[name]))
+    except (KeyError, ValueError):
+        return default
+    return min(value, maximum) if maximum is not None else value
+
+
+def name_prefix_page(queryset, params, page_size, max_page_size):
+    # One ?offset= and ?limit= page of queryset in name order, narrowed to
+    # the names starting with ?prefix=. Returns the total, the offset and the
+    # page's rows.
+    queryset = queryset.order_by('name_key')
+
+    # A range on name_key rather than istartswith, so SQLite can seek the
+    # unique index.
+    prefix = make_name_key(params.get(PREFIX_PARAM, ''))
+    if prefix:
+        queryset = queryset.filter(
+            name_key__gte=prefix, name_key__lt=prefix + chr(0x10FFFF))
+
+    offset = int_param(params, OFFSET_PARAM, 0)
+    limit = int_param(params, LIMIT_PARAM, page_size, max_page_size)
+    return queryset.count(), offset, list(queryset[offset:offset + limit])
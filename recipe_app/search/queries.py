@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, Q
+
+from recipe_app.models import Recipe, RecipeIngredient
+from recipe_app.search.index import filter_by_ids, recipe_search_index
+
+
+def _ingredient_groups(and_ids, or_ids):
+    # One pass over the rows for every selected ingredient, grouped per
+    # recipe: the recipe qualifies when it has all of the "and" ingredients
+    # and at least one of the "or" ingredients.
+    groups = RecipeIngredient.objects.filter(
+        ingredient_id__in=and_ids | or_ids
+    ).values('recipe_id')
+
+    if and_ids:
+        groups = groups.annotate(
+            and_count=Count('ingredient_id', distinct=True,
+                            filter=Q(ingredient_id__in=and_ids))
+        ).filter(and_count=len(and_ids))
+    if or_ids:
+        groups = groups.annotate(
+            or_count=Count('ingredient_id', filter=Q(ingredient_id__in=or_ids))
+        ).filter(or_count__gt=0)
+
+    return groups.values('recipe_id')
+
+
+def _tag_groups(tag_ids):
+    return Recipe.tags.through.objects.filter(
+        tag_id__in=tag_ids
+    ).values('recipe_id').annotate(
+        tag_count=Count('tag_id', distinct=True)
+    ).filter(tag_count=len(tag_ids)).values('recipe_id')
+
+
+def matching_recipes(queryset, and_ids=(), or_ids=(), exclude_ids=(), tag_ids=()):
+    and_ids, or_ids, tag_ids = set(and_ids), set(or_ids), set(tag_ids)
+
+    if and_ids or or_ids:
+        queryset = queryset.filter(pk__in=_ingredient_groups(and_ids, or_ids))
+    if tag_ids:
+        queryset = queryset.filter(pk__in=_tag_groups(tag_ids))
+    if exclude_ids:
+        queryset = queryset.filter(~Exists(RecipeIngredient.objects.filter(
+            recipe_id=OuterRef('pk'),
+            ingredient_id__in=exclude_ids
+        )))
+
+    return queryset
+
+
+def filter_recipes(queryset, and_ids=(), or_ids=(), exclude_ids=(), tag_ids=()):
+    if not (and_ids or or_ids or exclude_ids or tag_ids):
+        return queryset
+
+    if settings.RECIPE_SEARCH_INDEX:
+        return filter_by_ids(queryset, recipe_search_index.match(
+            and_ids=and_ids,
+            or_ids=or_ids,
+            exclude_ids=exclude_ids,
+            tag_ids=tag_ids
+        ))
+    return matching_recipes(
+        queryset,
+        and_ids=and_ids,
+        or_ids=or_ids,
+        exclude_ids=exclude_ids,
+        tag_ids=tag_ids
+    )
+
+
+def matching_ids(and_ids=(), or_ids=(), exclude_ids=(), tag_ids=()):
+    # The ids filter_recipes() would keep. The index has them already, so
+    # the database is only asked when the index is off.
+    filters = {
+        'and_ids': and_ids,
+        'or_ids': or_ids,
+        'exclude_ids': exclude_ids,
+        'tag_ids': tag_ids
+    }
+    if settings.RECIPE_SEARCH_INDEX:
+        return recipe_search_index.match(**filters)
+    return list(matching_recipes(Recipe.objects.all(), **filters).values_list('pk', flat=True))
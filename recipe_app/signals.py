@@ -0,0 +1,93 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from recipe_app.catalog import tags_changed
+from recipe_app.fragments import recipe_detail_fragments
+from recipe_app.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipe_app.search.autocomplete import ingredients_changed
+from recipe_app.search.index import recipes_changed
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_written(sender, instance, **kwargs):
+    recipes_changed([instance.pk])
+
+
+_batched_writes = threading.local()
+
+
+# Edits that rewrite many RecipeIngredient rows at once announce their
+# changes once, for the whole batch, instead of the receiver below bumping
+# the generations again for every deleted row. The flag is per thread:
+# disconnecting the receiver would silence it for every request the process
+# is serving.
+@contextmanager
+def batched_recipe_ingredient_writes():
+    depth = getattr(_batched_writes, 'depth', 0)
+    _batched_writes.depth = depth + 1
+    try:
+        yield
+    finally:
+        _batched_writes.depth = depth
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_ingredient_written(sender, instance, **kwargs):
+    if getattr(_batched_writes, 'depth', 0):
+        return
+    recipes_changed([instance.recipe_id])
+    # Usage counts are kept by database triggers; this only refreshes the
+    # autocomplete ranking.
+    ingredients_changed([instance.ingredient_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        recipes_changed([instance.pk])
+    else:
+        # A reverse clear doesn't report which recipes lost the tag.
+        recipes_changed(pk_set)
+
+
+# Deleting a tag cascades through the tags table without m2m_changed, so the
+# affected recipes have to be collected before the rows go away.
+@receiver(pre_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    recipes_changed(instance.recipe_set.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_written(sender, instance, **kwargs):
+    tags_changed()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_written(sender, instance, **kwargs):
+    ingredients_changed([instance.pk])
+
+
+# Renames show on the detail page of every recipe using the ingredient or
+# tag. Deletes are covered by the cascades above.
+@receiver(post_save, sender=Ingredient)
+def ingredient_saved(sender, instance, created, **kwargs):
+    if not created:
+        recipe_detail_fragments.invalidate(RecipeIngredient.objects.filter(
+            ingredient=instance.pk).values_list('recipe_id', flat=True))
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, **kwargs):
+    if not created:
+        recipe_detail_fragments.invalidate(
+            instance.recipe_set.values_list('pk', flat=True))
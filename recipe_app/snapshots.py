@@ -0,0 +1,46 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from recipe_app.models import Generation
+
+
+# Base for the per-process copies of database rows: the search index, the
+# ingredient autocomplete index and the tag catalog. Each follows one
+# Generation counter and is rebuilt by _rebuild() when the counter moves on.
+# With a refresh_setting the counter itself is read at most that many seconds
+# apart, so most lookups run no query. Subclasses call _sync() holding
+# self._lock.
+class GenerationSnapshot:
+    refresh_setting = None
+
+    def __init__(self, generation_name):
+        self._generation_name = generation_name
+        self._lock = threading.Lock()
+        self._generation = None
+        self._checked = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._generation = None
+
+    def _sync(self):
+        now = time.monotonic()
+        if (self._generation is not None and self.refresh_setting is not None
+                and now - self._checked < getattr(settings, self.refresh_setting)):
+            return
+
+        generation = Generation.objects.current(self._generation_name)
+        self._checked = now
+        if generation == self._generation:
+            return
+
+        self._rebuild()
+        # Rows read inside an open transaction may still be rolled back, so
+        # only a snapshot taken in autocommit is trusted for this generation.
+        self._generation = None if connection.in_atomic_block else generation
+
+    def _rebuild(self):
+        raise NotImplementedError
@@ -1,22 +1,34 @@
+const AUTOCOMPLETE_DELAY = 150;
+
 function initializeAutocomplete(input) {
     const awesomplete = new Awesomplete(input, {
         minChars: 1,
         autoFirst: true
     });
 
+    // Wait for a pause in typing, and ignore any response that arrives after
+    // a newer query was sent.
+    let timer;
+    let latestQuery;
     input.addEventListener("input", function () {
+        clearTimeout(timer);
         const query = input.value;
         if (query.length < 1) return;
 
-        fetch("/ingredient-autocomplete?query=" + encodeURIComponent(query))
-            .then(response => response.json())
-            .then(data => {
-                awesomplete.list = data;
-            });
+        timer = setTimeout(function () {
+            latestQuery = query;
+            fetch("/ingredient-autocomplete?query=" + encodeURIComponent(query))
+                .then(response => response.json())
+                .then(data => {
+                    if (query !== latestQuery) return;
+                    awesomplete.list = data;
+                    awesomplete.evaluate();
+                });
+        }, AUTOCOMPLETE_DELAY);
     });
 }
 
 document.addEventListener("DOMContentLoaded", function () {
     const inputs = document.querySelectorAll(".ingredient-input");
     inputs.forEach(input => initializeAutocomplete(input));
-});
\ No newline at end of file
+});
@@ -0,0 +1,196 @@
+// Renders only the ingredient rows scrolled into view, fetching the catalog
+// a page at a time, so the search page costs the same however many
+// ingredients there are. Selections live in a Map rather than the DOM; on
+// submit only the non-neutral ones are sent, as e.g. and=12,40&not=3.
+const PICKER_ROW_HEIGHT = 28;
+const PICKER_OVERSCAN = 10;
+const PICKER_FILTER_DELAY = 200;
+const NEUTRAL_INCLUSION = 'neutral';
+
+class IngredientPicker {
+    constructor(root, choices, params) {
+        this.choices = choices;
+        this.params = params;
+        this.catalogUrl = root.dataset.catalogUrl;
+        this.pageSize = Number(root.dataset.pageSize);
+
+        this.viewport = root.querySelector('.ingredient-picker-viewport');
+        this.spacer = root.querySelector('.ingredient-picker-spacer');
+        this.rows = root.querySelector('.ingredient-picker-rows');
+        this.selectionFields = root.querySelector('.ingredient-picker-selections');
+        this.selections = new Map();
+        this.generation = 0;
+
+        const filter = root.querySelector('.ingredient-picker-filter');
+        filter.addEventListener('input', () => {
+            clearTimeout(this.filterTimer);
+            this.filterTimer = setTimeout(() => this.reset(filter.value), PICKER_FILTER_DELAY);
+        });
+        this.viewport.addEventListener('scroll', () => this.render());
+        root.closest('form').addEventListener('submit', event => this.submit(event));
+
+        this.reset('');
+    }
+
+    reset(prefix) {
+        this.prefix = prefix;
+        this.pages = new Map();
+        this.total = 0;
+        this.generation++;
+        this.viewport.scrollTop = 0;
+        this.loadPage(0);
+    }
+
+    loadPage(page) {
+        if (this.pages.has(page)) return;
+        this.pages.set(page, null);
+
+        const generation = this.generation;
+        const params = new URLSearchParams({
+            prefix: this.prefix,
+            offset: page * this.pageSize,
+            limit: this.pageSize
+        });
+        fetch(`${this.catalogUrl}?${params}`)
+            .then(response => response.json())
+            .then(data => {
+                // A newer filter has replaced this one while it was in flight.
+                if (generation !== this.generation) return;
+                this.pages.set(page, data.ingredients);
+                this.total = data.total;
+                this.spacer.style.height = `${this.total * PICKER_ROW_HEIGHT}px`;
+                this.render();
+            });
+    }
+
+    ingredientAt(index) {
+        const page = this.pages.get(Math.floor(index / this.pageSize));
+        return page ? page[index % this.pageSize] : undefined;
+    }
+
+    render() {
+        const first = Math.max(0, Math.floor(this.viewport.scrollTop / PICKER_ROW_HEIGHT) - PICKER_OVERSCAN);
+        const last = Math.min(
+            this.total,
+            Math.ceil((this.viewport.scrollTop + this.viewport.clientHeight) / PICKER_ROW_HEIGHT) + PICKER_OVERSCAN
+        );
+
+        const rows = [];
+        for (let index = first; index < last; index++) {
+            const ingredient = this.ingredientAt(index);
+            if (ingredient) {
+                rows.push(this.row(ingredient));
+            } else {
+                this.loadPage(Math.floor(index / this.pageSize));
+                rows.push(this.placeholderRow());
+            }
+        }
+
+        this.rows.style.transform = `translateY(${first * PICKER_ROW_HEIGHT}px)`;
+        this.rows.replaceChildren(...rows);
+    }
+
+    placeholderRow() {
+        const row = document.createElement('div');
+        row.className = 'ingredient-inclusion-form';
+        row.textContent = '…';
+        return row;
+    }
+
+    row(ingredient) {
+        const row = document.createElement('div');
+        row.className = 'ingredient-inclusion-form';
+
+        const name = document.createElement('span');
+        name.className = 'ingredient-picker-name';
+        name.textContent = ingredient.name;
+        row.appendChild(name);
+
+        const inclusion = this.selections.get(ingredient.id) || NEUTRAL_INCLUSION;
+
+        for (const [value, text] of this.choices) {
+            const label = document.createElement('label');
+            const radio = document.createElement('input');
+            radio.type = 'radio';
+            radio.name = `ingredient-pick-${ingredient.id}`;
+            radio.value = value;
+            radio.checked = value === inclusion;
+            radio.addEventListener('change', () => this.select(ingredient, value));
+            label.append(radio, ` ${text}`);
+            row.appendChild(label);
+        }
+        return row;
+    }
+
+    select(ingredient, inclusion) {
+        if (inclusion === NEUTRAL_INCLUSION) {
+            this.selections.delete(ingredient.id);
+        } else {
+            this.selections.set(ingredient.id, inclusion);
+        }
+    }
+
+    writeSelections() {
+        // The on-screen radios are only for picking; keep them out of the POST.
+        this.rows.querySelectorAll('input').forEach(input => input.disabled = true);
+
+        const ids = new Map();
+        for (const [id, inclusion] of this.selections) {
+            const param = this.params[inclusion];
+            ids.set(param, [...(ids.get(param) || []), id]);
+        }
+
+        const fields = [];
+        for (const [param, paramIds] of ids) {
+            const input = document.createElement('input');
+            input.type = 'hidden';
+            input.name = param;
+            input.value = paramIds.join(',');
+            fields.push(input);
+        }
+        this.selectionFields.replaceChildren(...fields);
+    }
+
+    submit(event) {
+        // Go straight to the URL the results page treats as canonical (see
+        // SearchCriteria.params()): each id list sorted and comma-joined under
+        // one parameter, in and/or/not/tags order, then the text with its
+        // whitespace collapsed, leaving out the empty ones. Submitted as it
+        // stands, the form sends an empty q= and a tags= per checkbox, and
+        // the results page redirects it.
+        event.preventDefault();
+        this.writeSelections();
+
+        const form = event.target;
+        const values = new Map();
+        for (const [name, value] of new FormData(form)) {
+            values.set(name, [...(values.get(name) || []), value]);
+        }
+
+        const query = new URLSearchParams();
+        for (const param of [...Object.values(this.params), form.dataset.tagsParam]) {
+            const ids = new Set((values.get(param) || [])
+                .flatMap(value => value.split(','))
+                .map(token => token.trim())
+                .filter(token => /^\d+$/.test(token))
+                .map(Number));
+            if (ids.size) {
+                query.set(param, [...ids].sort((a, b) => a - b).join(','));
+            }
+        }
+        const text = (values.get(form.dataset.textParam) || []).join(' ')
+            .split(/\s+/).filter(Boolean).join(' ');
+        if (text) {
+            query.set(form.dataset.textParam, text);
+        }
+
+        const search = query.toString();
+        window.location.assign(search ? `${form.action}?${search}` : form.action);
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    const choices = JSON.parse(document.getElementById('ingredient-inclusion-choices').textContent);
+    const params = JSON.parse(document.getElementById('ingredient-inclusion-params').textContent);
+    document.querySelectorAll('.ingredient-picker').forEach(root => new IngredientPicker(root, choices, params));
+});
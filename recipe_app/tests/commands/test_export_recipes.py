@@ -0,0 +1,46 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from recipe_app.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipe_app.transfer import export_recipes
+
+
+class ExportRecipesCommandTests(TestCase):
+    def setUp(self):
+        water = Ingredient.objects.create(name='Water')
+        quick = Tag.objects.create(name='Quick')
+        for x in range(5):
+            recipe = Recipe.objects.create(name=f'Recipe {x}', directions='Stir.')
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=water, measurement=f'{x} cups')
+            recipe.tags.add(quick)
+
+    def test_queries_per_chunk(self):
+        # One recipes query read a chunk at a time, plus an ingredients and a
+        # tags query for each chunk of two.
+        with self.assertNumQueries(1 + 3 * 2):
+            records = list(export_recipes(chunk_size=2))
+
+        self.assertEqual(len(records), 5)
+
+    def test_writes_to_stdout(self):
+        out = StringIO()
+        call_command('export_recipes', stdout=out)
+
+        self.assertEqual(len(out.getvalue().splitlines()), 5)
+        self.assertIn('"measurement": "4 cups"', out.getvalue())
+
+    def test_round_trips_through_import(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'recipes.jsonl')
+            call_command('export_recipes', '--output', path)
+
+            exported = list(export_recipes())
+            Recipe.objects.all().delete()
+            call_command('import_recipes', path, stdout=StringIO())
+
+        self.assertEqual(list(export_recipes()), exported)
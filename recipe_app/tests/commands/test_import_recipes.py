@@ -0,0 +1,186 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from recipe_app.management.commands import import_recipes
+from recipe_app.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipe_app.transfer import RecordError, read_csv, read_jsonl
+
+
+def recipe_record(name, ingredients=(), tags=()):
+    return {
+        'name': name,
+        'directions': f'Make {name}.',
+        'ingredients': [
+            {'name': ingredient, 'measurement': '1 cup'} for ingredient in ingredients
+        ],
+        'tags': list(tags),
+    }
+
+
+class ImportRecipesCommandTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, filename, text):
+        path = os.path.join(self.directory.name, filename)
+        with open(path, 'w', newline='') as file:
+            file.write(text)
+        return path
+
+    def write_jsonl(self, records):
+        return self.write(
+            'recipes.jsonl', ''.join(json.dumps(record) + '\n' for record in records))
+
+    def run_import(self, path, *args):
+        out = StringIO()
+        call_command('import_recipes', path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_imports_jsonl(self):
+        Ingredient.objects.create(name='Salt')
+        path = self.write_jsonl([
+            recipe_record('Soup', ['salt', 'Water'], ['quick', 'Quick']),
+            recipe_record('Bread', ['Water', 'Flour']),
+        ])
+
+        self.run_import(path)
+
+        soup = Recipe.objects.get(name='Soup')
+        self.assertEqual(soup.directions, 'Make Soup.')
+        self.assertCountEqual(
+            soup.recipeingredient_set.values_list('ingredient__name', 'measurement'),
+            [('Salt', '1 cup'), ('Water', '1 cup')]
+        )
+        self.assertEqual(list(soup.tags.values_list('name', flat=True)), ['quick'])
+        self.assertEqual(Ingredient.objects.count(), 3)
+        self.assertEqual(RecipeIngredient.objects.count(), 4)
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_imports_csv(self):
+        path = self.write('recipes.csv', (
+            'name,directions,ingredient,measurement,tags\n'
+            'Soup,Simmer.,Water,1 cup,Quick;Cheap\n'
+            'Soup,,Salt,a pinch,\n'
+            'Toast,Toast it.,,,Quick\n'
+        ))
+
+        self.run_import(path)
+
+        soup = Recipe.objects.get(name='Soup')
+        self.assertEqual(soup.directions, 'Simmer.')
+        self.assertEqual(soup.recipeingredient_set.count(), 2)
+        self.assertCountEqual(
+            soup.tags.values_list('name', flat=True), ['Quick', 'Cheap'])
+        self.assertEqual(
+            list(Recipe.objects.get(name='Toast').tags.values_list('name', flat=True)),
+            ['Quick']
+        )
+
+    def test_skips_existing_recipes(self):
+        Recipe.objects.create(name='Soup', directions='Original.')
+        path = self.write_jsonl([recipe_record('SOUP', ['Water']), recipe_record('Bread')])
+
+        output = self.run_import(path)
+
+        self.assertEqual(Recipe.objects.get(name='Soup').directions, 'Original.')
+        self.assertFalse(RecipeIngredient.objects.exists())
+        self.assertIn('Imported 1 recipes from 2 records', output)
+
+    def test_query_count_is_per_batch(self):
+        path = self.write_jsonl([
+            recipe_record(f'Recipe {x}', [f'Ingredient {x}', 'Water'], ['Tag'])
+            for x in range(40)
+        ])
+
+        # Plus one to announce the new tag, which only the first batch creates.
+        with self.assertNumQueries(2 * 12 + 1):
+            self.run_import(path, '--batch-size', '20')
+
+        self.assertEqual(Recipe.objects.count(), 40)
+        self.assertEqual(Tag.objects.get().recipe_set.count(), 40)
+
+    def test_resumes_after_last_committed_batch(self):
+        path = self.write_jsonl([recipe_record(f'Recipe {x}') for x in range(5)])
+        real_import_batch = import_recipes.import_batch
+        batches = []
+
+        def interrupted(records):
+            if len(batches) == 1:
+                raise KeyboardInterrupt
+            batches.append(records)
+            return real_import_batch(records)
+
+        with patch.object(import_recipes, 'import_batch', side_effect=interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.run_import(path, '--batch-size', '2')
+        self.assertEqual(Recipe.objects.count(), 2)
+
+        output = self.run_import(path, '--batch-size', '2')
+
+        self.assertIn('Resuming after record 2.', output)
+        self.assertEqual(Recipe.objects.count(), 5)
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_malformed_record(self):
+        path = self.write('recipes.jsonl', json.dumps(recipe_record('Soup')) + '\n{oops\n')
+
+        with self.assertRaisesRegex(CommandError, 'line 2'):
+            self.run_import(path)
+
+    def test_mistyped_record(self):
+        path = self.write('recipes.jsonl', '\n'.join([
+            json.dumps(recipe_record('Soup')),
+            json.dumps({'name': 5})
+        ]) + '\n')
+
+        with self.assertRaisesRegex(CommandError, 'line 2: name must be a string.*resume'):
+            self.run_import(path)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            self.run_import(os.path.join(self.directory.name, 'missing.jsonl'))
+
+
+class ReadCsvTests(TestCase):
+
+    def test_missing_columns(self):
+        with self.assertRaises(ValueError):
+            list(read_csv(StringIO('name,directions\nSoup,Simmer.\n')))
+
+
+class ReadJsonlTests(TestCase):
+
+    def read(self, record):
+        return list(read_jsonl([json.dumps(record)]))
+
+    def test_reads_a_record(self):
+        self.assertEqual(
+            self.read({'name': 'Soup', 'directions': None,
+                       'ingredients': [{'name': 'Salt', 'measurement': None}],
+                       'tags': ['Quick']}),
+            [{'name': 'Soup', 'directions': '', 'ingredients': [('Salt', '')],
+              'tags': ['Quick']}]
+        )
+
+    def test_field_types_are_checked(self):
+        for record in [
+            ['Soup'],
+            {'name': 5},
+            {'name': 'Soup', 'directions': 3},
+            {'name': 'Soup', 'ingredients': {'name': 'Salt'}},
+            {'name': 'Soup', 'ingredients': ['Salt']},
+            {'name': 'Soup', 'ingredients': [{'name': ['x']}]},
+            {'name': 'Soup', 'ingredients': [{'name': 'Salt', 'measurement': 1}]},
+            {'name': 'Soup', 'tags': 'abc'},
+            {'name': 'Soup', 'tags': [7]}
+        ]:
+            with self.subTest(record=record), self.assertRaisesRegex(RecordError, 'line 1'):
+                self.read(record)
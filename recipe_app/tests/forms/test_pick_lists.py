@@ -0,0 +1,100 @@
+from html.parser import HTMLParser
+
+from django.test import TestCase
+
+from recipe_app.forms.pick_lists import tag_checkbox_html, tag_selection_html
+from recipe_app.forms.tag_selection_formset import (
+    TagSelectionFormset,
+    TagSelectionFormsetBase
+)
+from recipe_app.models import Tag
+
+
+class InputParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.inputs = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'input':
+            self.inputs.append(dict(attrs))
+
+
+def inputs(html):
+    parser = InputParser()
+    parser.feed(str(html))
+    return parser.inputs
+
+
+def posted(html):
+    # What a browser submits for the form, untouched.
+    return {
+        field['name']: field.get('value', 'on') for field in inputs(html)
+        if field['type'] not in ('checkbox', 'radio') or 'checked' in field
+    }
+
+
+def formset_html(formset):
+    return str(formset.management_form) + ''.join(str(form) for form in formset)
+
+
+class TagSelectionHtmlTests(TestCase):
+    rows = [(3, 'Quick & Easy', True), (7, '"Cheap"', False), (9, 'Vegan', True)]
+
+    def formset(self):
+        return TagSelectionFormsetBase(prefix='tag-select-form', initial=[
+            {'tag_name': name, 'id': id, 'include': selected}
+            for id, name, selected in self.rows
+        ])
+
+    def test_same_fields_as_the_formset(self):
+        self.assertEqual(
+            inputs(tag_selection_html(self.rows, 'tag-select-form')),
+            inputs(formset_html(self.formset()))
+        )
+
+    def test_posts_back_as_the_formset(self):
+        formset = TagSelectionFormsetBase(
+            data=posted(tag_selection_html(self.rows, 'tag-select-form')),
+            prefix='tag-select-form'
+        )
+        self.assertTrue(formset.is_valid())
+        self.assertEqual(formset.cleaned_data, self.formset().initial)
+
+    def test_no_rows(self):
+        self.assertEqual(
+            inputs(tag_selection_html([], 'tag-select-form')),
+            inputs(TagSelectionFormsetBase(prefix='tag-select-form').management_form)
+        )
+
+    def test_formset_renders_the_catalog(self):
+        quick = Tag.objects.create(name='Quick')
+        cheap = Tag.objects.create(name='Cheap')
+        formset = TagSelectionFormset(prefix='tag-select-form', selected_tags=[cheap])
+
+        self.assertEqual(
+            inputs(formset.as_pick_list()),
+            inputs(formset_html(formset))
+        )
+        self.assertEqual(
+            [(field['name'], field['value']) for field in inputs(
+                formset.as_search_checkboxes())],
+            [('tags', str(quick.pk)), ('tags', str(cheap.pk))]
+        )
+
+
+class TagCheckboxHtmlTests(TestCase):
+
+    def test_one_checkbox_per_tag(self):
+        html = tag_checkbox_html([(3, 'Quick & Easy'), (7, "Grandma's")], 'tags')
+
+        self.assertEqual(
+            inputs(html),
+            [
+                {'type': 'checkbox', 'name': 'tags', 'value': '3'},
+                {'type': 'checkbox', 'name': 'tags', 'value': '7'}
+            ]
+        )
+        self.assertIn('Quick &amp; Easy', html)
+        self.assertIn('Grandma&#x27;s', html)
+
@@ -1,8 +1,8 @@
-from unittest.mock import ANY
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
 
-from django.test import TestCase
-
-from recipe_app.models import Tag
+from recipe_app.catalog import TAGS_GENERATION, tag_catalog
+from recipe_app.models import Generation, Tag
 from recipe_app.forms.forms import TagSelectionForm
 from recipe_app.forms.tag_selection_formset import TagSelectionFormset
 
@@ -29,73 +29,52 @@ class TagSelectionFormsetTests(TestCase):
     def test_formset_returns_all_tags_unselected_by_default(self):
         uut = TagSelectionFormset()
 
-        self.assertTrue(uut.is_valid())
+        self.assertFalse(uut.is_bound)
         self.assertEqual(len(uut), 3)
-
-        tag_form1 = uut.cleaned_data[0]
-        self.assertEqual(tag_form1['tag_name'], self.tag1.name)
-        self.assertEqual(tag_form1['id'], self.tag1.id)
-        self.assertFalse(tag_form1['include'])
-
-        tag_form2 = uut.cleaned_data[1]
-        self.assertEqual(tag_form2['tag_name'], self.tag2.name)
-        self.assertEqual(tag_form2['id'], self.tag2.id)
-        self.assertFalse(tag_form2['include'])
-
-        tag_form3 = uut.cleaned_data[2]
-        self.assertEqual(tag_form3['tag_name'], self.tag3.name)
-        self.assertEqual(tag_form3['id'], self.tag3.id)
-        self.assertFalse(tag_form3['include'])
+        self.assertEqual(uut.initial, [
+            {'tag_name': self.tag1.name, 'id': self.tag1.id, 'include': False},
+            {'tag_name': self.tag2.name, 'id': self.tag2.id, 'include': False},
+            {'tag_name': self.tag3.name, 'id': self.tag3.id, 'include': False},
+        ])
 
     def test_formset_marks_input_tags_as_selected(self):
         input_tags = Tag.objects.all()[:2]
 
         uut = TagSelectionFormset(input_tags)
 
-        self.assertTrue(uut.is_valid())
+        self.assertFalse(uut.is_bound)
         self.assertEqual(len(uut), 3)
-
-        tag_form1 = uut.cleaned_data[0]
-        self.assertEqual(tag_form1['tag_name'], self.tag1.name)
-        self.assertEqual(tag_form1['id'], self.tag1.id)
-        self.assertTrue(tag_form1['include'])
-
-        tag_form2 = uut.cleaned_data[1]
-        self.assertEqual(tag_form2['tag_name'], self.tag2.name)
-        self.assertEqual(tag_form2['id'], self.tag2.id)
-        self.assertTrue(tag_form2['include'])
-
-        tag_form3 = uut.cleaned_data[2]
-        self.assertEqual(tag_form3['tag_name'], self.tag3.name)
-        self.assertEqual(tag_form3['id'], self.tag3.id)
-        self.assertFalse(tag_form3['include'])
+        self.assertEqual(uut.initial, [
+            {'tag_name': self.tag1.name, 'id': self.tag1.id, 'include': True},
+            {'tag_name': self.tag2.name, 'id': self.tag2.id, 'include': True},
+            {'tag_name': self.tag3.name, 'id': self.tag3.id, 'include': False},
+        ])
 
     def test_init_handles_custom_prefix(self):
         uut = TagSelectionFormset(prefix='test-prefix')
 
-        self.assertTrue(uut.is_valid())
         self.assertEqual(len(uut), 3)
+        self.assertIn('name="test-prefix-0-tag_name"', str(uut))
 
     def test_init_properly_constructs_management_form(self):
         uut = TagSelectionFormset()
 
         self.assertEqual(
-            uut.data['form-TOTAL_FORMS'],
-            str(len(Tag.objects.all()))
-        )
-        self.assertEqual(
-            uut.data['form-INITIAL_FORMS'],
-            str(len(Tag.objects.all()))
-        )
-        self.assertEqual(
-            uut.data['form-MIN_NUM_FORMS'],
-            ANY
+            uut.management_form.initial['TOTAL_FORMS'],
+            len(Tag.objects.all())
         )
         self.assertEqual(
-            uut.data['form-MAX_NUM_FORMS'],
-            ANY
+            uut.management_form.initial['INITIAL_FORMS'],
+            len(Tag.objects.all())
         )
 
+    def test_rendered_forms_round_trip(self):
+        uut = TagSelectionFormset(Tag.objects.filter(pk=self.tag2.pk))
+        html = str(uut)
+
+        self.assertIn(f'value="{self.tag1.name}"', html)
+        self.assertEqual(html.count('checked'), 1)
+
     def test_init_passes_through_data_param_when_provided(self):
         form_data = {
             'form-TOTAL_FORMS': str(len(Tag.objects.all())),
@@ -115,3 +94,51 @@ class TagSelectionFormsetTests(TestCase):
             form_data,
             uut.data
         )
+
+
+class CachedTagCatalogTests(TransactionTestCase):
+    def setUp(self):
+        tag_catalog.invalidate()
+        Tag.objects.create(name='Quick')
+
+    def names(self):
+        return [form.initial['tag_name'] for form in TagSelectionFormset()]
+
+    def test_repeat_builds_run_no_queries(self):
+        self.names()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ['Quick'])
+
+    def test_tag_writes_invalidate(self):
+        self.names()
+        tag = Tag.objects.create(name='Cheap')
+        self.assertEqual(self.names(), ['Quick', 'Cheap'])
+
+        tag.name = 'Thrifty'
+        tag.save()
+        self.assertEqual(self.names(), ['Quick', 'Thrifty'])
+
+        tag.delete()
+        self.assertEqual(self.names(), ['Quick'])
+
+    def test_tags_made_with_a_recipe_invalidate(self):
+        self.names()
+        self.client.post(reverse('recipe-create'), {
+            'name': 'Soup',
+            'directions': 'Simmer.',
+            'ingredient-form-TOTAL_FORMS': '0',
+            'ingredient-form-INITIAL_FORMS': '0',
+            'tag-create-form-TOTAL_FORMS': '1',
+            'tag-create-form-INITIAL_FORMS': '0',
+            'tag-create-form-0-tag_name': 'Cheap',
+        })
+        self.assertEqual(self.names(), ['Quick', 'Cheap'])
+
+    @override_settings(TAG_CATALOG_REFRESH_SECONDS=0)
+    def test_other_workers_writes_are_noticed(self):
+        self.names()
+        Tag.objects.bulk_create([Tag(name='Cheap')])
+        self.assertEqual(self.names(), ['Quick'])
+
+        Generation.objects.bump(TAGS_GENERATION)
+        self.assertEqual(self.names(), ['Quick', 'Cheap'])
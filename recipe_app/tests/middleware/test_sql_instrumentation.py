@@ -0,0 +1,55 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from recipe_app.middleware import QueryRecorder
+from recipe_app.models import Tag
+
+
+class QueryRecorderTests(TestCase):
+
+    def test_counts_and_groups_statements(self):
+        Tag.objects.create(name='Quick')
+        recorder = QueryRecorder()
+
+        with connection.execute_wrapper(recorder):
+            for name in ['Quick', 'Easy', 'Cheap']:
+                Tag.objects.filter(name=name).exists()
+            Tag.objects.count()
+
+        self.assertEqual(recorder.count, 4)
+        self.assertGreater(recorder.duration, 0)
+        [(count, sql)] = recorder.duplicates()
+        self.assertEqual(count, 3)
+        self.assertIn('"name" = %s', sql)
+        self.assertEqual(len(recorder.slowest(2)), 2)
+
+
+class SQLInstrumentationMiddlewareTests(TestCase):
+
+    def test_off_by_default(self):
+        response = self.client.get(reverse('recipe-search'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SQL_INSTRUMENTATION=True)
+    def test_reports_queries(self):
+        with self.assertLogs('recipe_app.sql', 'INFO') as logs:
+            response = self.client.get(reverse('recipe-search'))
+
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;desc="2 queries";dur=[\d.]+, total;dur=[\d.]+$'
+        )
+        [line] = logs.output
+        self.assertIn('GET /recipes/search [recipe-search] 2 queries', line)
+        self.assertIn('FROM "recipe_app_tag"', line)
+
+    @override_settings(SQL_INSTRUMENTATION=True, SQL_QUERY_BUDGETS={'recipe-search': 0})
+    def test_warns_over_budget(self):
+        with self.assertLogs('recipe_app.sql', 'WARNING') as logs:
+            self.client.get(reverse('recipe-search'))
+
+        self.assertEqual(
+            logs.output,
+            ['WARNING:recipe_app.sql:recipe-search ran 2 queries, over its budget of 0']
+        )
@@ -1,9 +1,13 @@
+from django.db import IntegrityError
 from django.test import TestCase
 from django.db.models import ForeignKey, ManyToManyField, CASCADE, RESTRICT
+from django.db.models.signals import post_save
 from django.db.models.fields import CharField
 
 from recipe_app.models import (
+    Generation,
     Ingredient,
+    IngredientUsage,
     Recipe,
     RecipeIngredient,
     Tag
@@ -14,9 +18,16 @@ class IngredientModelTests(TestCase):
     mixed_case_name = 'iNgrEdIeNt nAme'
     title_case_name = mixed_case_name.title()
 
-    def test_name_casing_on_save(self):
-        ingredient = Ingredient(name=self.mixed_case_name)
-        self.assertEqual(ingredient.name, self.title_case_name)
+    def test_name_keeps_casing_and_sets_key(self):
+        ingredient = Ingredient(name=' BBQ   Sauce ')
+        self.assertEqual(ingredient.name, 'BBQ Sauce')
+        self.assertEqual(ingredient.name_key, 'bbq sauce')
+
+    def test_name_key_ignores_unicode_form(self):
+        self.assertEqual(
+            Ingredient(name='Cre\u0301me Fraîche').name_key,
+            Ingredient(name='CRÈME FRAÎCHE'.replace('È', 'É')).name_key
+        )
 
     def test_save_duplicates(self):
         ingredient1 = Ingredient.objects.create(name=self.mixed_case_name)
@@ -42,9 +53,47 @@ class RecipeModelTests(TestCase):
     mixed_case_name = 'rEcIpE nAme'
     tile_case_name = mixed_case_name.title()
 
-    def test_name_casing_on_save(self):
+    def test_name_keeps_casing_and_sets_key(self):
         recipe = Recipe(name=self.mixed_case_name)
-        self.assertEqual(recipe.name, self.tile_case_name)
+        self.assertEqual(recipe.name, self.mixed_case_name)
+        self.assertEqual(recipe.name_key, 'recipe name')
+
+    def test_save_refreshes_key(self):
+        recipe = Recipe.objects.create(name='Soup')
+        recipe.name = 'Stew'
+        recipe.save()
+        self.assertEqual(Recipe.objects.get(name_key='stew').pk, recipe.pk)
+
+    def test_assignment_updates_key(self):
+        recipe = Recipe(name='Soup')
+        recipe.name = '  Beef   Stew '
+        self.assertEqual(recipe.name, 'Beef Stew')
+        self.assertEqual(recipe.name_key, 'beef stew')
+
+    def test_loaded_rows_are_not_renormalized(self):
+        recipe = Recipe.objects.create(name='Soup', directions='Simmer.')
+        Recipe.objects.filter(pk=recipe.pk).update(name=' raw  name ')
+
+        loaded = Recipe.objects.get(pk=recipe.pk)
+
+        self.assertEqual(loaded.name, ' raw  name ')
+        self.assertEqual(loaded.name_key, 'soup')
+        self.assertFalse(loaded._state.adding)
+        self.assertEqual(loaded, recipe)
+
+    def test_loaded_rows_load_deferred_fields(self):
+        recipe = Recipe.objects.create(name='Soup', directions='Simmer.')
+
+        loaded = Recipe.objects.only('name').get(pk=recipe.pk)
+
+        self.assertEqual(loaded.get_deferred_fields(), {'name_key', 'directions'})
+        self.assertEqual(loaded.directions, 'Simmer.')
+        self.assertEqual(loaded.name_key, 'soup')
+
+    def test_name_key_is_unique(self):
+        Recipe.objects.create(name='Soup')
+        with self.assertRaises(IntegrityError):
+            Recipe.objects.create(name='SOUP')
 
     def test_fields(self):
         recipe = Recipe()
@@ -128,9 +177,10 @@ class TagModelTests(TestCase):
     mixed_case_name = 'TaG nAme'
     title_case_name = mixed_case_name.title()
 
-    def test_name_casing_on_save(self):
+    def test_name_keeps_casing_and_sets_key(self):
         tag = Tag(name=self.mixed_case_name)
-        self.assertEqual(tag.name, self.title_case_name)
+        self.assertEqual(tag.name, self.mixed_case_name)
+        self.assertEqual(tag.name_key, 'tag name')
 
     def test_dup_save_returns_original(self):
         tag_1 = Tag.objects.create(name=self.mixed_case_name)
@@ -146,3 +196,93 @@ class TagModelTests(TestCase):
         self.assertTrue(name_field.unique)
         self.assertEqual(200, name_field.max_length)
         self.assertFalse(name_field.blank)
+
+
+class NameManagerTests(TestCase):
+
+    def test_ensure_creates_missing_names(self):
+        salt = Ingredient.objects.create(name='Salt')
+
+        with self.assertNumQueries(2):
+            pks = Ingredient.objects.ensure(['pepper', 'SALT', 'Pepper'])
+
+        self.assertEqual(list(pks), ['pepper', 'salt'])
+        self.assertEqual(pks['salt'], salt.pk)
+        # The first spelling of a new name is the one stored.
+        self.assertEqual(
+            pks['pepper'], Ingredient.objects.get(name='pepper').pk)
+        self.assertEqual(Ingredient.objects.get(pk=salt.pk).name, 'Salt')
+
+    def test_ensure_all_new_is_one_query(self):
+        with self.assertNumQueries(1):
+            pks = Tag.objects.ensure(['Quick', 'Easy'])
+
+        self.assertEqual(
+            pks, dict(Tag.objects.values_list('name_key', 'pk')))
+
+    def test_ensure_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(Tag.objects.ensure([]), {})
+
+    def test_save_signals_only_new_rows(self):
+        received = []
+
+        def receiver(sender, instance, created, **kwargs):
+            received.append((instance.name, created))
+
+        post_save.connect(receiver, sender=Tag)
+        self.addCleanup(post_save.disconnect, receiver, sender=Tag)
+
+        Tag.objects.create(name='Quick')
+        Tag.objects.create(name='quick')
+
+        self.assertEqual(received, [('Quick', True)])
+
+    def test_save_renames_existing_row(self):
+        tag = Tag.objects.create(name='Quick')
+        tag.name = 'Fast'
+        tag.save()
+
+        self.assertEqual(Tag.objects.get(pk=tag.pk).name, 'Fast')
+
+
+class GenerationModelTests(TestCase):
+
+    def test_current_defaults_to_zero(self):
+        self.assertEqual(Generation.objects.current('unknown'), 0)
+
+    def test_bump_increments(self):
+        first = Generation.objects.bump('counter')
+        second = Generation.objects.bump('counter')
+
+        self.assertEqual(second, first + 1)
+        self.assertEqual(Generation.objects.current('counter'), second)
+
+
+class IngredientUsageModelTests(TestCase):
+    def setUp(self):
+        self.salt = Ingredient.objects.create(name='Salt')
+        self.pepper = Ingredient.objects.create(name='Pepper')
+        self.recipe = Recipe.objects.create(name='Recipe')
+
+    def usage(self, ingredient):
+        return IngredientUsage.objects.filter(
+            ingredient=ingredient).values_list('recipe_count', flat=True).first()
+
+    def test_counts_follow_recipe_ingredients(self):
+        self.assertIsNone(self.usage(self.salt))
+
+        salted = RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=self.salt)
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=Recipe.objects.create(name='Other'), ingredient=self.salt)
+        ])
+        self.assertEqual(self.usage(self.salt), 2)
+
+        salted.ingredient = self.pepper
+        salted.save()
+        self.assertEqual(self.usage(self.salt), 1)
+        self.assertEqual(self.usage(self.pepper), 1)
+
+        self.recipe.delete()
+        self.assertEqual(self.usage(self.pepper), 0)
@@ -0,0 +1,129 @@
+from unittest.mock import patch
+
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from recipe_app.models import Generation, Ingredient, Recipe, RecipeIngredient
+from recipe_app.search.autocomplete import (
+    INGREDIENTS_GENERATION,
+    NameIndex,
+    ingredient_name_index,
+    ingredient_rows
+)
+
+
+class NameIndexMatchTests(TestCase):
+    def setUp(self):
+        for name in ['Mustard Seed', 'Honey Mustard', 'Mushroom', 'Carrot',
+                     'Half-And-Half']:
+            Ingredient.objects.create(name=name)
+        self.uut = NameIndex(ingredient_rows, INGREDIENTS_GENERATION)
+
+    def use(self, name, times):
+        for i in range(times):
+            RecipeIngredient.objects.create(
+                recipe=Recipe.objects.create(name=f'{name} {i}'),
+                ingredient=Ingredient.objects.get(name=name)
+            )
+
+    def test_name_prefixes_come_first(self):
+        self.assertEqual(
+            self.uut.match('mus', 10),
+            ['Mushroom', 'Mustard Seed', 'Honey Mustard']
+        )
+
+    def test_word_starts(self):
+        self.assertEqual(self.uut.match('seed', 10), ['Mustard Seed'])
+        self.assertEqual(self.uut.match('and', 10), ['Half-And-Half'])
+
+    def test_no_mid_word_matches(self):
+        self.assertEqual(self.uut.match('tard', 10), [])
+
+    def test_names_are_not_repeated(self):
+        self.assertEqual(self.uut.match('half', 10), ['Half-And-Half'])
+
+    def test_query_spans_words(self):
+        self.assertEqual(self.uut.match(' HONEY m', 10), ['Honey Mustard'])
+
+    def test_empty_query_lists_names(self):
+        self.assertEqual(
+            self.uut.match('', 2), ['Carrot', 'Half-And-Half'])
+
+    def test_limit(self):
+        self.assertEqual(len(self.uut.match('m', 2)), 2)
+
+    def test_most_used_first(self):
+        self.use('Honey Mustard', 2)
+        self.use('Mustard Seed', 1)
+
+        self.assertEqual(
+            self.uut.match('mus', 10),
+            ['Honey Mustard', 'Mustard Seed', 'Mushroom']
+        )
+        self.assertEqual(self.uut.match('', 1), ['Honey Mustard'])
+
+    @patch('recipe_app.search.autocomplete.RANKED_MATCH_CACHE_THRESHOLD', 0)
+    def test_ranking_follows_usage_changes(self):
+        self.assertEqual(self.uut.match('c', 1), ['Carrot'])
+        self.use('Mushroom', 1)
+        self.assertEqual(self.uut.match('', 1), ['Mushroom'])
+
+
+@override_settings(AUTOCOMPLETE_REFRESH_SECONDS=60)
+class NameIndexSyncTests(TransactionTestCase):
+    def setUp(self):
+        self.carrot = Ingredient.objects.create(name='Carrot')
+        ingredient_name_index.match('', 10)
+
+    def test_local_writes_are_applied_without_rebuilding(self):
+        with patch.object(ingredient_name_index, '_rebuild') as mock_rebuild:
+            Ingredient.objects.create(name='Cabbage')
+            self.assertEqual(
+                ingredient_name_index.match('ca', 10), ['Cabbage', 'Carrot'])
+
+            self.carrot.name = 'Parsnip'
+            self.carrot.save()
+            self.assertEqual(ingredient_name_index.match('ca', 10), ['Cabbage'])
+            self.assertEqual(ingredient_name_index.match('pa', 10), ['Parsnip'])
+
+            parsnip_recipe = Recipe.objects.create(name='Parsnip Recipe')
+            RecipeIngredient.objects.create(
+                recipe=parsnip_recipe, ingredient=self.carrot)
+            self.assertEqual(
+                ingredient_name_index.match('', 10), ['Parsnip', 'Cabbage'])
+
+            cabbage_recipe = Recipe.objects.create(name='Cabbage Recipe')
+            for _ in range(2):
+                RecipeIngredient.objects.create(
+                    recipe=cabbage_recipe,
+                    ingredient=Ingredient.objects.get(name='Cabbage')
+                )
+            self.assertEqual(
+                ingredient_name_index.match('', 10), ['Cabbage', 'Parsnip'])
+
+            cabbage_recipe.delete()
+            parsnip_recipe.delete()
+
+            self.carrot.delete()
+            self.assertEqual(ingredient_name_index.match('pa', 10), [])
+
+        mock_rebuild.assert_not_called()
+
+    def test_skipped_generation_is_rechecked_on_next_lookup(self):
+        Generation.objects.bump(INGREDIENTS_GENERATION)
+        Ingredient.objects.create(name='Cabbage')
+        self.assertEqual(
+            ingredient_name_index.match('ca', 10), ['Cabbage', 'Carrot'])
+
+    def test_lookups_between_checks_skip_the_database(self):
+        with self.assertNumQueries(0):
+            ingredient_name_index.match('ca', 10)
+
+    def test_writes_from_other_workers_are_seen_after_the_interval(self):
+        # Another worker's write only shows up as a newer generation.
+        Ingredient.objects.bulk_create([Ingredient(name='Cabbage')])
+        Generation.objects.bump(INGREDIENTS_GENERATION)
+        self.assertEqual(ingredient_name_index.match('ca', 10), ['Carrot'])
+
+        with override_settings(AUTOCOMPLETE_REFRESH_SECONDS=0):
+            self.assertEqual(
+                ingredient_name_index.match('ca', 10), ['Cabbage', 'Carrot'])
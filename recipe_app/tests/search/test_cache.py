@@ -0,0 +1,86 @@
+from unittest.mock import Mock
+
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from recipe_app.models import Ingredient, Recipe, RecipeIngredient
+from recipe_app.search import cache
+from recipe_app.search.cache import search_result_cache
+from recipe_app.search.criteria import SearchCriteria
+from recipe_app.search.index import recipes_changed
+
+
+class SearchResultCacheTests(TransactionTestCase):
+    def setUp(self):
+        search_result_cache.clear()
+        self.compute = Mock(side_effect=lambda: [1, 2])
+
+    def test_repeated_lookups_are_cached(self):
+        self.assertEqual(search_result_cache.get_or_compute('key', self.compute), [1, 2])
+        self.assertEqual(search_result_cache.get_or_compute('key', self.compute), [1, 2])
+        self.compute.assert_called_once()
+
+    def test_recipe_writes_invalidate(self):
+        search_result_cache.get_or_compute('key', self.compute)
+        Recipe.objects.create(name='Recipe')
+        search_result_cache.get_or_compute('key', self.compute)
+        self.assertEqual(self.compute.call_count, 2)
+
+    @override_settings(RECIPE_SEARCH_CACHE_SIZE=2)
+    def test_least_recently_used_is_evicted(self):
+        search_result_cache.get_or_compute('a', self.compute)
+        search_result_cache.get_or_compute('b', self.compute)
+        search_result_cache.get_or_compute('a', self.compute)
+        search_result_cache.get_or_compute('c', self.compute)
+        self.assertEqual(self.compute.call_count, 3)
+
+        search_result_cache.get_or_compute('a', self.compute)
+        self.assertEqual(self.compute.call_count, 3)
+        search_result_cache.get_or_compute('b', self.compute)
+        self.assertEqual(self.compute.call_count, 4)
+
+    def test_results_read_in_a_transaction_are_not_cached(self):
+        with transaction.atomic():
+            search_result_cache.get_or_compute('key', self.compute)
+        search_result_cache.get_or_compute('key', self.compute)
+        self.assertEqual(self.compute.call_count, 2)
+
+
+class CachedSearchTests(TransactionTestCase):
+    def setUp(self):
+        search_result_cache.clear()
+        self.salt = Ingredient.objects.create(name='Salt')
+        self.soup = Recipe.objects.create(name='Soup', directions='Salt it')
+        RecipeIngredient.objects.create(recipe=self.soup, ingredient=self.salt)
+        self.stew = Recipe.objects.create(name='Stew', directions='Salt it')
+
+    def test_recipe_ids(self):
+        criteria = SearchCriteria(and_ids=[self.salt.pk])
+        self.assertEqual(cache.recipe_ids(criteria), [self.soup.pk])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(cache.recipe_ids(criteria), [self.soup.pk])
+
+        RecipeIngredient.objects.create(recipe=self.stew, ingredient=self.salt)
+        self.assertCountEqual(
+            cache.recipe_ids(criteria), [self.soup.pk, self.stew.pk])
+
+    def test_text_ids(self):
+        criteria = SearchCriteria(and_ids=[self.salt.pk], text='salt')
+        self.assertEqual(cache.text_ids(criteria), [self.soup.pk])
+
+        with self.assertNumQueries(1):
+            cache.text_ids(criteria)
+
+        Recipe.objects.filter(pk=self.soup.pk).update(directions='Pepper it')
+        recipes_changed([self.soup.pk])
+        self.assertEqual(cache.text_ids(criteria), [])
+
+    def test_text_hits(self):
+        self.assertEqual(
+            [recipe_id for recipe_id, _ in cache.text_hits('salt', [self.soup.pk])],
+            [self.soup.pk]
+        )
+
+        with self.assertNumQueries(1):
+            cache.text_hits('salt', [self.soup.pk])
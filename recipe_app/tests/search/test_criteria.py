@@ -0,0 +1,54 @@
+from django.http import QueryDict
+from django.test import TestCase
+
+from recipe_app.search.criteria import MAX_ID, SearchCriteria
+
+
+class SearchCriteriaTests(TestCase):
+
+    def test_from_params(self):
+        criteria = SearchCriteria.from_params(
+            QueryDict('and=40,12&or=7&not=3&tags=5&tags=2&q=soup'))
+
+        self.assertEqual(criteria.and_ids, (12, 40))
+        self.assertEqual(criteria.or_ids, (7,))
+        self.assertEqual(criteria.exclude_ids, (3,))
+        self.assertEqual(criteria.tag_ids, (2, 5))
+        self.assertEqual(criteria.text, 'soup')
+
+    def test_malformed_ids_are_ignored(self):
+        criteria = SearchCriteria.from_params(QueryDict('and=1,,x, 2 ,-3,4.5'))
+        self.assertEqual(criteria.and_ids, (1, 2))
+
+    def test_ids_beyond_sqlite_integers_are_ignored(self):
+        criteria = SearchCriteria.from_params(QueryDict(f'and=1,{MAX_ID},{MAX_ID + 1}'))
+        self.assertEqual(criteria.and_ids, (1, MAX_ID))
+
+    def test_empty(self):
+        criteria = SearchCriteria.from_params(QueryDict(''))
+        self.assertEqual(criteria, SearchCriteria())
+        self.assertEqual(criteria.params(), {})
+
+    def test_params_are_normalized(self):
+        criteria = SearchCriteria(
+            and_ids=[40, 12, 12], exclude_ids=[3], text='  chicken   soup ')
+
+        self.assertEqual(criteria.params(), {
+            'and': '12,40',
+            'not': '3',
+            'q': 'chicken soup'
+        })
+
+    def test_round_trip(self):
+        criteria = SearchCriteria(
+            and_ids=[1], or_ids=[2, 3], exclude_ids=[4], tag_ids=[5], text='a')
+
+        query = QueryDict(mutable=True)
+        query.update(criteria.params())
+        self.assertEqual(SearchCriteria.from_params(query), criteria)
+
+    def test_equal_criteria_hash_equal(self):
+        self.assertEqual(
+            hash(SearchCriteria(and_ids=[2, 1], text='x ')),
+            hash(SearchCriteria(and_ids=[1, 2], text='x'))
+        )
@@ -0,0 +1,97 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from recipe_app.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipe_app.search.criteria import SearchCriteria
+from recipe_app.search.facets import facets
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        self.salt = Ingredient.objects.create(name='Salt')
+        self.pepper = Ingredient.objects.create(name='Pepper')
+        self.garlic = Ingredient.objects.create(name='Garlic')
+        self.quick = Tag.objects.create(name='Quick')
+        self.cheap = Tag.objects.create(name='Cheap')
+        Tag.objects.create(name='Unused')
+
+        self.recipes = []
+        for name, ingredients, tags in [
+            ('Soup', [self.salt, self.pepper], [self.quick, self.cheap]),
+            ('Stew', [self.salt, self.pepper, self.garlic], [self.cheap]),
+            ('Toast', [self.salt], [self.quick]),
+            ('Aioli', [self.garlic], []),
+        ]:
+            recipe = Recipe.objects.create(name=name)
+            for ingredient in ingredients:
+                RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient)
+            recipe.tags.add(*tags)
+            self.recipes.append(recipe)
+
+    def counts(self, result):
+        return (
+            [(tag['name'], tag['count'], tag['selected']) for tag in result.tags],
+            [(i['name'], i['count'], i['selected']) for i in result.ingredients],
+        )
+
+    def check_both_strategies(self, criteria, expected, **kwargs):
+        for use_index in (True, False):
+            with self.subTest(index=use_index), \
+                    override_settings(RECIPE_SEARCH_INDEX=use_index):
+                result = facets(criteria, **kwargs)
+                self.assertTrue(result.complete)
+                self.assertEqual(self.counts(result), expected)
+
+    def test_counts_over_all_recipes(self):
+        self.check_both_strategies(SearchCriteria(), (
+            [('Cheap', 2, False), ('Quick', 2, False)],
+            [('Salt', 3, False), ('Pepper', 2, False), ('Garlic', 2, False)],
+        ))
+
+    def test_counts_over_matching_recipes(self):
+        criteria = SearchCriteria(and_ids=[self.salt.pk], tag_ids=[self.quick.pk])
+        self.check_both_strategies(criteria, (
+            [('Quick', 2, True), ('Cheap', 1, False)],
+            [('Salt', None, True), ('Pepper', 1, False)],
+        ))
+
+    def test_narrowed_to_given_recipes(self):
+        self.check_both_strategies(SearchCriteria(), (
+            [('Cheap', 1, False), ('Quick', 1, False)],
+            [('Salt', 1, False), ('Pepper', 1, False)],
+        ), recipe_ids=[self.recipes[0].pk])
+
+    def test_no_matches_keeps_selected_ingredients(self):
+        criteria = SearchCriteria(and_ids=[self.pepper.pk], exclude_ids=[self.salt.pk])
+        self.check_both_strategies(criteria, ([], [('Pepper', None, True)]))
+
+    @override_settings(RECIPE_FACET_INGREDIENTS=1)
+    def test_ingredient_limit(self):
+        self.check_both_strategies(SearchCriteria(), (
+            [('Cheap', 2, False), ('Quick', 2, False)],
+            [('Salt', 3, False)],
+        ))
+
+    @override_settings(RECIPE_FACET_TIME_LIMIT_MS=0)
+    def test_index_scan_stops_at_time_limit(self):
+        result = facets(SearchCriteria())
+        self.assertFalse(result.complete)
+        self.assertEqual(result.ingredients, [])
+
+    @override_settings(RECIPE_FACET_TIME_LIMIT_MS=0, RECIPE_SEARCH_INDEX=False)
+    @patch('recipe_app.search.facets.PROGRESS_CHECK_INTERVAL', 1)
+    def test_query_is_interrupted_at_time_limit(self):
+        result = facets(SearchCriteria())
+        self.assertFalse(result.complete)
+        self.assertEqual(Recipe.objects.count(), 4)
+
+    def test_results_page_shows_counts(self):
+        response = self.client.get(
+            reverse('recipe-results') + f'?and={self.salt.pk}')
+
+        self.assertContains(response, f"name='tags' value='{self.quick.pk}'")
+        self.assertContains(response, "Pepper <span class='facet-count'>2</span>")
+        self.assertContains(
+            response, f"name='and' value='{self.salt.pk}' checked")
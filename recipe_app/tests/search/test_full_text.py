@@ -0,0 +1,87 @@
+from django.test import TestCase
+
+from recipe_app.models import Recipe
+from recipe_app.search import full_text
+
+
+class MatchExpressionTests(TestCase):
+
+    def test_words_become_quoted_prefixes(self):
+        self.assertEqual(
+            full_text.match_expression('chick soup'),
+            '"chick"* "soup"*'
+        )
+
+    def test_fts_syntax_is_ignored(self):
+        self.assertEqual(
+            full_text.match_expression('beef" OR name:(x*'),
+            '"beef"* "OR"* "name"* "x"*'
+        )
+
+    def test_no_words(self):
+        self.assertEqual(full_text.match_expression(' -- '), '')
+
+
+class FullTextSearchTests(TestCase):
+    def setUp(self):
+        self.chicken_soup = Recipe.objects.create(
+            name='Chicken Soup', directions='Simmer the broth.')
+        self.pot_pie = Recipe.objects.create(
+            name='Pot Pie', directions='Fold the chicken into the <crust>.')
+        self.beef_stew = Recipe.objects.create(
+            name='Beef Stew', directions='Brown the beef.')
+
+    def result_ids(self, text, **kwargs):
+        return [recipe_id for recipe_id, _ in full_text.search(text, **kwargs)]
+
+    def test_matches_prefixes(self):
+        self.assertEqual(self.result_ids('sou'), [self.chicken_soup.pk])
+
+    def test_matches_directions(self):
+        self.assertEqual(self.result_ids('broth'), [self.chicken_soup.pk])
+
+    def test_name_hits_rank_above_directions_hits(self):
+        self.assertEqual(
+            self.result_ids('chicken'),
+            [self.chicken_soup.pk, self.pot_pie.pk]
+        )
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.result_ids('chicken fold'), [self.pot_pie.pk])
+
+    def test_restricts_to_recipes(self):
+        self.assertEqual(
+            self.result_ids(
+                'chicken', recipes=Recipe.objects.filter(name__startswith='Pot')),
+            [self.pot_pie.pk]
+        )
+
+    def test_limit(self):
+        self.assertEqual(len(self.result_ids('chicken', limit=1)), 1)
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        [(_, snippet)] = full_text.search('crust')
+        self.assertIn('<mark>crust</mark>', snippet)
+        self.assertIn('&lt;', snippet)
+
+    def test_hits_keep_the_given_order(self):
+        hits = full_text.hits(
+            'chicken', [self.pot_pie.pk, self.beef_stew.pk, self.chicken_soup.pk])
+        self.assertEqual(
+            [recipe_id for recipe_id, _ in hits],
+            [self.pot_pie.pk, self.chicken_soup.pk]
+        )
+
+    def test_index_follows_updates_and_deletes(self):
+        Recipe.objects.filter(pk=self.beef_stew.pk).update(
+            name='Lamb Stew', directions='Brown the lamb.')
+        self.assertEqual(self.result_ids('beef'), [])
+        self.assertEqual(self.result_ids('lamb'), [self.beef_stew.pk])
+
+        self.beef_stew.delete()
+        self.assertEqual(self.result_ids('lamb'), [])
+
+    def test_ranked_recipes(self):
+        ranked = full_text.ranked_recipes('chicken')
+        self.assertEqual(ranked, [self.chicken_soup, self.pot_pie])
+        self.assertIn('<mark>', ranked[0].snippet)
@@ -0,0 +1,186 @@
+from unittest.mock import patch
+
+from django.test import TestCase, TransactionTestCase
+
+from recipe_app.models import (
+    Generation,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Tag
+)
+from recipe_app.search.index import (
+    RECIPES_GENERATION,
+    RecipeSearchIndex,
+    filter_by_ids,
+    recipe_search_index
+)
+
+
+class RecipeSearchIndexMatchTests(TestCase):
+    def setUp(self):
+        self.salt = Ingredient.objects.create(name='Salt')
+        self.pepper = Ingredient.objects.create(name='Pepper')
+        self.garlic = Ingredient.objects.create(name='Garlic')
+        self.quick = Tag.objects.create(name='Quick')
+
+        self.salt_only = Recipe.objects.create(name='Salt Only')
+        RecipeIngredient.objects.create(
+            recipe=self.salt_only, ingredient=self.salt)
+
+        self.salt_and_pepper = Recipe.objects.create(name='Salt And Pepper')
+        RecipeIngredient.objects.create(
+            recipe=self.salt_and_pepper, ingredient=self.salt)
+        RecipeIngredient.objects.create(
+            recipe=self.salt_and_pepper, ingredient=self.pepper)
+        self.salt_and_pepper.tags.add(self.quick)
+
+        self.garlic_only = Recipe.objects.create(name='Garlic Only')
+        RecipeIngredient.objects.create(
+            recipe=self.garlic_only, ingredient=self.garlic)
+
+        self.empty = Recipe.objects.create(name='Empty')
+
+        self.uut = RecipeSearchIndex()
+
+    def test_no_filters_matches_every_recipe(self):
+        self.assertCountEqual(
+            self.uut.match(),
+            Recipe.objects.values_list('pk', flat=True)
+        )
+
+    def test_and(self):
+        self.assertEqual(
+            self.uut.match(and_ids=[self.salt.pk, self.pepper.pk]),
+            [self.salt_and_pepper.pk]
+        )
+
+    def test_or(self):
+        self.assertCountEqual(
+            self.uut.match(or_ids=[self.pepper.pk, self.garlic.pk]),
+            [self.salt_and_pepper.pk, self.garlic_only.pk]
+        )
+
+    def test_exclude(self):
+        self.assertCountEqual(
+            self.uut.match(exclude_ids=[self.salt.pk]),
+            [self.garlic_only.pk, self.empty.pk]
+        )
+
+    def test_tags(self):
+        self.assertEqual(
+            self.uut.match(tag_ids=[self.quick.pk]),
+            [self.salt_and_pepper.pk]
+        )
+
+    def test_combined(self):
+        self.assertEqual(
+            self.uut.match(
+                and_ids=[self.salt.pk],
+                or_ids=[self.salt.pk, self.garlic.pk],
+                exclude_ids=[self.pepper.pk]
+            ),
+            [self.salt_only.pk]
+        )
+
+    def test_unknown_ids_match_nothing(self):
+        self.assertEqual(self.uut.match(and_ids=[12345]), [])
+        self.assertEqual(self.uut.match(tag_ids=[12345]), [])
+
+    def test_sees_writes_made_after_first_lookup(self):
+        self.uut.match()
+
+        RecipeIngredient.objects.filter(recipe=self.salt_only).delete()
+        self.garlic_only.tags.add(self.quick)
+
+        self.assertEqual(self.uut.match(and_ids=[self.salt.pk]),
+                         [self.salt_and_pepper.pk])
+        self.assertCountEqual(
+            self.uut.match(tag_ids=[self.quick.pk]),
+            [self.salt_and_pepper.pk, self.garlic_only.pk]
+        )
+
+    def test_tag_delete(self):
+        self.uut.match()
+        self.quick.delete()
+        self.assertEqual(self.uut.match(tag_ids=[self.quick.pk]), [])
+
+    def test_pantry_matches(self):
+        self.assertEqual(
+            self.uut.pantry_matches([self.salt.pk, self.garlic.pk], limit=10),
+            [
+                (self.salt_only.pk, set()),
+                (self.garlic_only.pk, set()),
+                (self.salt_and_pepper.pk, {self.pepper.pk})
+            ]
+        )
+
+    def test_pantry_matches_prefers_more_coverage(self):
+        self.assertEqual(
+            self.uut.pantry_matches([self.pepper.pk], limit=10),
+            [(self.salt_and_pepper.pk, {self.salt.pk})]
+        )
+
+    def test_pantry_matches_limit(self):
+        self.assertEqual(
+            self.uut.pantry_matches([self.salt.pk, self.pepper.pk], limit=1),
+            [(self.salt_and_pepper.pk, set())]
+        )
+
+    def test_pantry_matches_unknown_ingredients(self):
+        self.assertEqual(self.uut.pantry_matches([12345], limit=10), [])
+
+    def test_filter_by_ids(self):
+        self.assertCountEqual(
+            filter_by_ids(Recipe.objects.all(), [
+                          self.salt_only.pk, self.empty.pk]),
+            [self.salt_only, self.empty]
+        )
+
+
+class RecipeSearchIndexSyncTests(TransactionTestCase):
+    def setUp(self):
+        self.ingredient = Ingredient.objects.create(name='Ingredient')
+        self.recipe = Recipe.objects.create(name='Recipe')
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=self.ingredient)
+        recipe_search_index.match()
+
+    def test_local_writes_are_applied_without_rebuilding(self):
+        with patch.object(recipe_search_index, '_rebuild') as mock_rebuild:
+            other = Recipe.objects.create(name='Other')
+            RecipeIngredient.objects.create(
+                recipe=other, ingredient=self.ingredient)
+            tag = Tag.objects.create(name='Tag')
+            other.tags.add(tag)
+
+            self.assertCountEqual(
+                recipe_search_index.match(and_ids=[self.ingredient.pk]),
+                [self.recipe.pk, other.pk]
+            )
+            self.assertEqual(
+                recipe_search_index.match(tag_ids=[tag.pk]),
+                [other.pk]
+            )
+
+            self.recipe.delete()
+            self.assertEqual(
+                recipe_search_index.match(and_ids=[self.ingredient.pk]),
+                [other.pk]
+            )
+
+        mock_rebuild.assert_not_called()
+
+    def test_writes_from_other_workers_trigger_rebuild(self):
+        # Another worker's write only shows up as a skipped generation.
+        Generation.objects.bump(RECIPES_GENERATION)
+        other = Recipe.objects.create(name='Other')
+
+        with patch.object(recipe_search_index, '_rebuild',
+                          wraps=recipe_search_index._rebuild) as mock_rebuild:
+            self.assertCountEqual(
+                recipe_search_index.match(),
+                [self.recipe.pk, other.pk]
+            )
+
+        mock_rebuild.assert_called_once()
@@ -0,0 +1,144 @@
+from django.test import TestCase
+
+from recipe_app.models import Ingredient, Recipe
+from recipe_app.search.pagination import (
+    decode_cursor,
+    decode_offset,
+    encode_cursor,
+    int_param,
+    keyset_page,
+    name_prefix_page,
+    offset_page
+)
+
+
+class CursorTests(TestCase):
+
+    def test_round_trip(self):
+        recipe = Recipe(pk=7, name='Recipe Name')
+        self.assertEqual(
+            decode_cursor(encode_cursor(recipe)),
+            ('recipe name', 7)
+        )
+
+    def test_malformed_cursor(self):
+        self.assertIsNone(decode_cursor('not a cursor'))
+        self.assertIsNone(decode_cursor(''))
+
+
+class KeysetPageTests(TestCase):
+    def setUp(self):
+        for name in ['Recipe C', 'Recipe A', 'Recipe E', 'Recipe B', 'Recipe D']:
+            Recipe.objects.create(name=name)
+
+    def names(self, page):
+        return [recipe.name for recipe in page.items]
+
+    def test_first_page(self):
+        page = keyset_page(Recipe.objects.all(), 2)
+
+        self.assertEqual(self.names(page), ['Recipe A', 'Recipe B'])
+        self.assertFalse(page.has_previous)
+        self.assertIsNone(page.previous_cursor)
+        self.assertTrue(page.has_next)
+
+    def test_walks_forward_and_back(self):
+        first = keyset_page(Recipe.objects.all(), 2)
+        second = keyset_page(Recipe.objects.all(), 2, after=first.next_cursor)
+        third = keyset_page(Recipe.objects.all(), 2, after=second.next_cursor)
+
+        self.assertEqual(self.names(second), ['Recipe C', 'Recipe D'])
+        self.assertEqual(self.names(third), ['Recipe E'])
+        self.assertFalse(third.has_next)
+        self.assertIsNone(third.next_cursor)
+
+        back = keyset_page(Recipe.objects.all(), 2, before=third.previous_cursor)
+        self.assertEqual(self.names(back), ['Recipe C', 'Recipe D'])
+        self.assertTrue(back.has_previous)
+        self.assertTrue(back.has_next)
+
+        back = keyset_page(Recipe.objects.all(), 2, before=back.previous_cursor)
+        self.assertEqual(self.names(back), ['Recipe A', 'Recipe B'])
+        self.assertFalse(back.has_previous)
+
+    def test_orders_names_regardless_of_case(self):
+        Recipe.objects.all().delete()
+        for name in ['Zucchini Bread', 'apple pie', 'Carrot Cake', 'banana split']:
+            Recipe.objects.create(name=name)
+
+        first = keyset_page(Recipe.objects.all(), 2)
+        second = keyset_page(Recipe.objects.all(), 2, after=first.next_cursor)
+        back = keyset_page(Recipe.objects.all(), 2, before=second.previous_cursor)
+
+        self.assertEqual(self.names(first), ['apple pie', 'banana split'])
+        self.assertEqual(self.names(second), ['Carrot Cake', 'Zucchini Bread'])
+        self.assertFalse(second.has_next)
+        self.assertEqual(self.names(back), self.names(first))
+
+    def test_respects_queryset_filters(self):
+        page = keyset_page(Recipe.objects.exclude(name='Recipe A'), 2)
+        self.assertEqual(self.names(page), ['Recipe B', 'Recipe C'])
+
+    def test_malformed_cursor_starts_from_the_beginning(self):
+        page = keyset_page(Recipe.objects.all(), 2, after='garbage')
+        self.assertEqual(self.names(page), ['Recipe A', 'Recipe B'])
+
+    def test_fetches_one_page_of_rows(self):
+        with self.assertNumQueries(1):
+            keyset_page(Recipe.objects.all(), 2)
+
+
+class OffsetPageTests(TestCase):
+    items = [10, 20, 30, 40, 50]
+
+    def test_first_page(self):
+        page = offset_page(self.items, 2)
+
+        self.assertEqual(page.items, [10, 20])
+        self.assertFalse(page.has_previous)
+        self.assertIsNone(page.previous_cursor)
+        self.assertEqual(page.next_cursor, '2')
+
+    def test_walks_forward_and_back(self):
+        second = offset_page(self.items, 2, after='2')
+        third = offset_page(self.items, 2, after=second.next_cursor)
+
+        self.assertEqual(second.items, [30, 40])
+        self.assertEqual(third.items, [50])
+        self.assertIsNone(third.next_cursor)
+
+        back = offset_page(self.items, 2, before=third.previous_cursor)
+        self.assertEqual(back.items, [30, 40])
+        back = offset_page(self.items, 2, before=back.previous_cursor)
+        self.assertEqual(back.items, [10, 20])
+        self.assertFalse(back.has_previous)
+
+    def test_malformed_cursor_starts_from_the_beginning(self):
+        self.assertIsNone(decode_offset('-1'))
+        self.assertEqual(offset_page(self.items, 2, after='garbage').items, [10, 20])
+
+    def test_cursor_past_the_end(self):
+        page = offset_page(self.items, 2, after='9')
+        self.assertEqual(page.items, [])
+        self.assertFalse(page.has_next)
+
+
+class NamePrefixPageTests(TestCase):
+    def setUp(self):
+        for name in ['basil', 'Bay Leaf', 'Allspice', 'Basmati']:
+            Ingredient.objects.create(name=name)
+
+    def page(self, **params):
+        return name_prefix_page(Ingredient.objects.values_list('name', flat=True), params, 2, 3)
+
+    def test_pages_by_name(self):
+        self.assertEqual(self.page(), (4, 0, ['Allspice', 'basil']))
+        self.assertEqual(self.page(offset='2', limit='9'), (4, 2, ['Basmati', 'Bay Leaf']))
+
+    def test_prefix(self):
+        self.assertEqual(self.page(prefix='BAS'), (2, 0, ['basil', 'Basmati']))
+
+    def test_int_param(self):
+        self.assertEqual(int_param({'n': '7'}, 'n', 1, maximum=5), 5)
+        self.assertEqual(int_param({'n': '-3'}, 'n', 1), 0)
+        self.assertEqual(int_param({'n': 'x'}, 'n', 1), 1)
@@ -0,0 +1,126 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from recipe_app.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Tag
+)
+from recipe_app.search.queries import filter_recipes, matching_ids, matching_recipes
+
+
+class MatchingRecipesTests(TestCase):
+    def setUp(self):
+        self.salt = Ingredient.objects.create(name='Salt')
+        self.pepper = Ingredient.objects.create(name='Pepper')
+        self.garlic = Ingredient.objects.create(name='Garlic')
+        self.quick = Tag.objects.create(name='Quick')
+        self.easy = Tag.objects.create(name='Easy')
+
+        self.salt_only = Recipe.objects.create(name='Salt Only')
+        RecipeIngredient.objects.create(
+            recipe=self.salt_only, ingredient=self.salt)
+
+        self.salt_and_pepper = Recipe.objects.create(name='Salt And Pepper')
+        RecipeIngredient.objects.create(
+            recipe=self.salt_and_pepper, ingredient=self.salt)
+        RecipeIngredient.objects.create(
+            recipe=self.salt_and_pepper, ingredient=self.pepper)
+        self.salt_and_pepper.tags.add(self.quick, self.easy)
+
+        self.garlic_only = Recipe.objects.create(name='Garlic Only')
+        RecipeIngredient.objects.create(
+            recipe=self.garlic_only, ingredient=self.garlic)
+        self.garlic_only.tags.add(self.quick)
+
+        self.empty = Recipe.objects.create(name='Empty')
+
+    def match(self, **kwargs):
+        return list(matching_recipes(Recipe.objects.all(), **kwargs))
+
+    def test_and(self):
+        self.assertEqual(
+            self.match(and_ids=[self.salt.pk, self.pepper.pk]),
+            [self.salt_and_pepper]
+        )
+
+    def test_and_counts_each_ingredient_once(self):
+        RecipeIngredient.objects.create(
+            recipe=self.salt_only, ingredient=self.salt)
+        self.assertEqual(
+            self.match(and_ids=[self.salt.pk, self.pepper.pk]),
+            [self.salt_and_pepper]
+        )
+
+    def test_or(self):
+        self.assertCountEqual(
+            self.match(or_ids=[self.pepper.pk, self.garlic.pk]),
+            [self.salt_and_pepper, self.garlic_only]
+        )
+
+    def test_and_with_or(self):
+        self.assertEqual(
+            self.match(and_ids=[self.salt.pk], or_ids=[
+                       self.pepper.pk, self.garlic.pk]),
+            [self.salt_and_pepper]
+        )
+
+    def test_exclude(self):
+        self.assertCountEqual(
+            self.match(exclude_ids=[self.salt.pk]),
+            [self.garlic_only, self.empty]
+        )
+
+    def test_tags(self):
+        self.assertEqual(
+            self.match(tag_ids=[self.quick.pk, self.easy.pk]),
+            [self.salt_and_pepper]
+        )
+
+    def test_runs_as_one_query(self):
+        with self.assertNumQueries(1):
+            self.match(
+                and_ids=[self.salt.pk],
+                or_ids=[self.pepper.pk],
+                exclude_ids=[self.garlic.pk],
+                tag_ids=[self.quick.pk]
+            )
+
+
+class FilterRecipesTests(TestCase):
+
+    def test_no_filters_returns_queryset_untouched(self):
+        queryset = Recipe.objects.all()
+        self.assertIs(filter_recipes(queryset), queryset)
+
+    @override_settings(RECIPE_SEARCH_INDEX=True)
+    @patch('recipe_app.search.queries.recipe_search_index')
+    def test_uses_index_when_enabled(self, mock_index):
+        mock_index.match.return_value = []
+        filter_recipes(Recipe.objects.all(), and_ids=[1])
+        mock_index.match.assert_called_once()
+
+    @override_settings(RECIPE_SEARCH_INDEX=False)
+    @patch('recipe_app.search.queries.recipe_search_index')
+    def test_uses_database_when_disabled(self, mock_index):
+        list(filter_recipes(Recipe.objects.all(), and_ids=[1]))
+        mock_index.match.assert_not_called()
+
+
+class MatchingIdsTests(TestCase):
+
+    @override_settings(RECIPE_SEARCH_INDEX=True)
+    @patch('recipe_app.search.queries.recipe_search_index')
+    def test_index_answers_without_queries(self, mock_index):
+        mock_index.match.return_value = [3, 5]
+        with self.assertNumQueries(0):
+            self.assertEqual(matching_ids(and_ids=[1]), [3, 5])
+
+    @override_settings(RECIPE_SEARCH_INDEX=False)
+    @patch('recipe_app.search.queries.recipe_search_index')
+    def test_uses_database_when_disabled(self, mock_index):
+        recipe = Recipe.objects.create(name='Soup', directions='Simmer.')
+        self.assertEqual(matching_ids(exclude_ids=[1]), [recipe.pk])
+        mock_index.match.assert_not_called()
@@ -0,0 +1,447 @@
+import json
+
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from recipe_app.api import (
+    RECIPE_FIELDS,
+    RECIPE_ID_ERROR,
+    RECIPE_NAME_TAKEN_ERROR,
+    STRING_ERROR
+)
+from recipe_app.forms.forms import IngredientForm, RecipeForm
+from recipe_app.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipe_app.search.index import recipe_search_index
+
+
+def recipe_data(name, ingredients=(), tags=(), directions=''):
+    return {
+        'name': name,
+        'directions': directions,
+        'ingredients': [
+            {'name': ingredient, 'measurement': measurement}
+            for ingredient, measurement in ingredients
+        ],
+        'tags': list(tags)
+    }
+
+
+class ApiTestCase(TestCase):
+    def setUp(self):
+        self.salt = Ingredient.objects.create(name='Salt')
+        self.pepper = Ingredient.objects.create(name='Pepper')
+        self.quick = Tag.objects.create(name='Quick')
+
+        self.soup = self.recipe('Soup', [(self.salt, '1 tsp'), (self.pepper, 'a pinch')],
+                                [self.quick], directions='Simmer.')
+        self.toast = self.recipe('Toast', [(self.salt, 'a pinch')])
+
+    def recipe(self, name, ingredients=(), tags=(), directions=''):
+        recipe = Recipe.objects.create(name=name, directions=directions)
+        for ingredient, measurement in ingredients:
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, measurement=measurement)
+        recipe.tags.add(*tags)
+        return recipe
+
+    def send(self, method, url, data, **params):
+        if params:
+            url = f'{url}?{"&".join(f"{k}={v}" for k, v in params.items())}'
+        return getattr(self.client, method)(
+            url, json.dumps(data), content_type='application/json')
+
+    def stored(self, recipe):
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        return {
+            'name': recipe.name,
+            'directions': recipe.directions,
+            'ingredients': [
+                (row.ingredient.name, row.measurement)
+                for row in recipe.recipeingredient_set.order_by('pk')
+            ],
+            'tags': sorted(tag.name for tag in recipe.tags.all())
+        }
+
+
+class ApiRecipeReadTests(ApiTestCase):
+
+    def test_list_defaults_to_ids_names_and_urls(self):
+        response = self.client.get(reverse('api-recipes')).json()
+
+        self.assertEqual(response, {
+            'recipes': [
+                {'id': self.soup.pk, 'name': 'Soup',
+                 'url': reverse('recipe-detail', args=[self.soup.pk])},
+                {'id': self.toast.pk, 'name': 'Toast',
+                 'url': reverse('recipe-detail', args=[self.toast.pk])}
+            ],
+            'previous': None,
+            'next': None
+        })
+
+    def test_list_field_selection(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api-recipes'), {'fields': 'name'}).json()
+        self.assertEqual(response['recipes'], [{'name': 'Soup'}, {'name': 'Toast'}])
+
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse('api-recipes'), {'fields': 'id,ingredients,tags'}).json()
+        self.assertEqual(response['recipes'][0], {
+            'id': self.soup.pk,
+            'ingredients': [
+                {'name': 'Salt', 'measurement': '1 tsp'},
+                {'name': 'Pepper', 'measurement': 'a pinch'}
+            ],
+            'tags': ['Quick']
+        })
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse('api-recipes'), {'fields': 'name,color'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('color', response.json()['error'])
+
+    def test_list_searches(self):
+        response = self.client.get(
+            reverse('api-recipes'), {'and': self.pepper.pk, 'fields': 'name'}).json()
+        self.assertEqual(response['recipes'], [{'name': 'Soup'}])
+
+        response = self.client.get(
+            reverse('api-recipes'), {'tags': self.quick.pk, 'fields': 'name'}).json()
+        self.assertEqual(response['recipes'], [{'name': 'Soup'}])
+
+        response = self.client.get(
+            reverse('api-recipes'), {'q': 'toast', 'fields': 'name'}).json()
+        self.assertEqual(response['recipes'], [{'name': 'Toast'}])
+
+    @override_settings(RECIPE_LIST_PAGE_SIZE=1)
+    def test_list_pages(self):
+        first = self.client.get(reverse('api-recipes'), {'fields': 'name'}).json()
+        second = self.client.get(
+            reverse('api-recipes'), {'fields': 'name', 'after': first['next']}).json()
+        back = self.client.get(
+            reverse('api-recipes'), {'fields': 'name', 'before': second['previous']}).json()
+
+        self.assertEqual(first['recipes'], [{'name': 'Soup'}])
+        self.assertEqual(second['recipes'], [{'name': 'Toast'}])
+        self.assertIsNone(second['next'])
+        self.assertEqual(back['recipes'], first['recipes'])
+
+    @override_settings(RECIPE_LIST_PAGE_SIZE=1)
+    def test_text_search_pages(self):
+        self.recipe('French Toast')
+        first = self.client.get(reverse('api-recipes'), {'q': 'toast', 'fields': 'name'}).json()
+        second = self.client.get(reverse('api-recipes'), {
+            'q': 'toast', 'fields': 'name', 'after': first['next']}).json()
+
+        self.assertCountEqual(
+            first['recipes'] + second['recipes'],
+            [{'name': 'Toast'}, {'name': 'French Toast'}]
+        )
+        self.assertIsNone(second['next'])
+        self.assertTrue(second['previous'])
+
+    def test_detail_defaults_to_every_field(self):
+        response = self.client.get(reverse('api-recipe', args=[self.soup.pk])).json()
+
+        self.assertEqual(list(response), list(RECIPE_FIELDS))
+        self.assertEqual(response['directions'], 'Simmer.')
+        self.assertEqual(response['tags'], ['Quick'])
+
+    def test_detail_field_selection(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse('api-recipe', args=[self.soup.pk]), {'fields': 'directions'})
+        self.assertEqual(response.json(), {'directions': 'Simmer.'})
+
+    def test_missing_recipe(self):
+        response = self.client.get(reverse('api-recipe', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unsupported_method(self):
+        response = self.client.delete(reverse('api-recipe', args=[self.soup.pk]))
+        self.assertEqual(response.status_code, 405)
+
+
+class ApiRecipeCreateTests(ApiTestCase):
+
+    def test_creates_recipe(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.send('post', reverse('api-recipes'), recipe_data(
+                'Stew', [('Salt', '2 tsp'), ('Beef', '500 g')], ['Quick', 'Hearty'],
+                directions='Braise.'))
+
+        self.assertEqual(response.status_code, 201)
+        stew = Recipe.objects.get(name='Stew')
+        self.assertEqual(response.json()['id'], stew.pk)
+        self.assertEqual(self.stored(stew), {
+            'name': 'Stew',
+            'directions': 'Braise.',
+            'ingredients': [('Salt', '2 tsp'), ('Beef', '500 g')],
+            'tags': ['Hearty', 'Quick']
+        })
+        self.assertIn(stew.pk, recipe_search_index.match(
+            and_ids=[Ingredient.objects.get(name='Beef').pk]))
+
+    def test_response_field_selection(self):
+        response = self.send(
+            'post', reverse('api-recipes'), recipe_data('Stew', directions='Braise.'),
+            fields='id')
+        self.assertEqual(list(response.json()), ['id'])
+
+    def test_invalid_recipe(self):
+        response = self.send('post', reverse('api-recipes'), {
+            'name': 'Soup',
+            'ingredients': [{'measurement': '1 cup'}, 'Salt'],
+            'tags': [7]
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'errors': {
+            'name': [RecipeForm.content_error, RECIPE_NAME_TAKEN_ERROR],
+            'ingredients': {
+                '0': {'name': [IngredientForm.name_error]},
+                '1': {'__all__': ['Expected a JSON object']}
+            },
+            'tags': {'0': [STRING_ERROR]}
+        }})
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    def test_name_is_required(self):
+        response = self.send('post', reverse('api-recipes'), {'directions': 'Stir.'})
+        self.assertEqual(
+            response.json()['errors'], {'name': [RecipeForm.name_error]})
+
+    def test_body_must_be_json(self):
+        response = self.client.post(reverse('api-recipes'), {'name': 'Stew'})
+        self.assertEqual(response.status_code, 415)
+
+        response = self.client.post(
+            reverse('api-recipes'), '{"name":', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_needs_no_csrf_token(self):
+        self.client = Client(enforce_csrf_checks=True)
+        response = self.send('post', reverse('api-recipes'), recipe_data(
+            'Stew', directions='Braise.'))
+        self.assertEqual(response.status_code, 201)
+
+
+class ApiRecipeUpdateTests(ApiTestCase):
+
+    def test_partial_update(self):
+        response = self.send(
+            'patch', reverse('api-recipe', args=[self.soup.pk]), {'directions': 'Boil.'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['directions'], 'Boil.')
+        self.assertEqual(self.stored(self.soup), {
+            'name': 'Soup',
+            'directions': 'Boil.',
+            'ingredients': [('Salt', '1 tsp'), ('Pepper', 'a pinch')],
+            'tags': ['Quick']
+        })
+
+    def test_replaces_ingredients_and_tags(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.send('patch', reverse('api-recipe', args=[self.soup.pk]), {
+                'name': 'Pepper Soup',
+                'ingredients': [
+                    {'name': 'pepper', 'measurement': '1 tsp'},
+                    {'name': 'Leek', 'measurement': '1'}
+                ],
+                'tags': ['Spicy']
+            })
+
+        self.assertEqual(self.stored(self.soup), {
+            'name': 'Pepper Soup',
+            'directions': 'Simmer.',
+            'ingredients': [('Pepper', '1 tsp'), ('Leek', '1')],
+            'tags': ['Spicy']
+        })
+        self.assertNotIn(self.soup.pk, recipe_search_index.match(and_ids=[self.salt.pk]))
+
+    def test_unchanged_rows_are_not_written(self):
+        pks = list(self.soup.recipeingredient_set.values_list('pk', flat=True))
+        self.send('patch', reverse('api-recipe', args=[self.soup.pk]), {
+            'ingredients': [
+                {'name': 'Salt', 'measurement': '1 tsp'},
+                {'name': 'Pepper', 'measurement': 'a pinch'}
+            ]
+        })
+        self.assertEqual(
+            list(self.soup.recipeingredient_set.values_list('pk', flat=True)), pks)
+
+    def test_invalid_update(self):
+        response = self.send(
+            'patch', reverse('api-recipe', args=[self.soup.pk]), {'name': 'toast'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'errors': {'name': [RECIPE_NAME_TAKEN_ERROR]}})
+
+        response = self.send(
+            'patch', reverse('api-recipe', args=[self.toast.pk]), {'ingredients': []})
+        self.assertEqual(response.json(), {'errors': {'name': [RecipeForm.content_error]}})
+        self.assertEqual(self.toast.recipeingredient_set.count(), 1)
+
+    def test_keeping_the_name(self):
+        response = self.send(
+            'patch', reverse('api-recipe', args=[self.soup.pk]), {'name': 'SOUP'})
+        self.assertEqual(response.json()['name'], 'SOUP')
+
+    def test_missing_recipe(self):
+        response = self.send('patch', reverse('api-recipe', args=[0]), {'name': 'Stew'})
+        self.assertEqual(response.status_code, 404)
+
+
+class ApiRecipeBatchTests(ApiTestCase):
+
+    def create(self, count, offset=0):
+        return self.send('post', reverse('api-recipe-batch'), {'recipes': [
+            recipe_data(f'Recipe {i}', [(f'Ingredient {i}', '1'), ('Salt', '2')],
+                        [f'Tag {i}', 'Quick'])
+            for i in range(offset, offset + count)
+        ]}, fields='id,name')
+
+    def test_creates_recipes(self):
+        response = self.create(3)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [recipe['name'] for recipe in response.json()['recipes']],
+            ['Recipe 0', 'Recipe 1', 'Recipe 2'])
+        self.assertEqual(self.stored(Recipe.objects.get(name='Recipe 1')), {
+            'name': 'Recipe 1',
+            'directions': '',
+            'ingredients': [('Ingredient 1', '1'), ('Salt', '2')],
+            'tags': ['Quick', 'Tag 1']
+        })
+
+    def test_query_count_does_not_grow_with_batch(self):
+        with self.assertNumQueries(13):
+            self.create(2)
+        with self.assertNumQueries(13):
+            self.create(20, offset=2)
+
+    def test_any_invalid_recipe_fails_the_batch(self):
+        response = self.send('post', reverse('api-recipe-batch'), {'recipes': [
+            recipe_data('Stew', directions='Braise.'),
+            recipe_data('stew', directions='Braise.'),
+            recipe_data(''),
+        ]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']), ['1', '2'])
+        self.assertFalse(Recipe.objects.filter(name='Stew').exists())
+
+    @override_settings(RECIPE_API_BATCH_SIZE=2)
+    def test_batch_size_is_limited(self):
+        response = self.create(3)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Recipe.objects.filter(name='Recipe 0').exists())
+
+    def test_updates_recipes(self):
+        response = self.send('patch', reverse('api-recipe-batch'), {'recipes': [
+            {'id': self.toast.pk, 'tags': ['Quick'], 'directions': 'Grill.'},
+            {'id': self.soup.pk, 'ingredients': [{'name': 'Salt', 'measurement': '2 tsp'}]}
+        ]}, fields='id,tags')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['recipes'], [
+            {'id': self.toast.pk, 'tags': ['Quick']},
+            {'id': self.soup.pk, 'tags': ['Quick']}
+        ])
+        self.assertEqual(self.stored(self.toast)['directions'], 'Grill.')
+        self.assertEqual(self.stored(self.soup)['ingredients'], [('Salt', '2 tsp')])
+
+    def test_update_query_count_does_not_grow_with_batch(self):
+        self.create(20)
+        recipes = list(Recipe.objects.filter(name__startswith='Recipe').order_by('pk'))
+
+        def update(recipes):
+            return self.send('patch', reverse('api-recipe-batch'), {'recipes': [
+                {'id': recipe.pk, 'directions': 'Bake.', 'tags': ['Baked'],
+                 'ingredients': [{'name': 'Flour', 'measurement': '1 cup'}]}
+                for recipe in recipes
+            ]}, fields='id')
+
+        # The first update makes Flour and Baked, which the others reuse.
+        update(recipes[:1])
+        with CaptureQueriesContext(connection) as few:
+            update(recipes[1:3])
+        with self.assertNumQueries(len(few.captured_queries)):
+            update(recipes[3:])
+
+    def test_update_errors_are_keyed_by_position(self):
+        response = self.send('patch', reverse('api-recipe-batch'), {'recipes': [
+            {'id': self.soup.pk, 'name': 'Toast'},
+            {'id': 0, 'name': 'Stew'},
+            {'name': 'Stew'},
+            {'id': self.soup.pk, 'name': 'Stew'}
+        ]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], {
+            '1': {'id': [RECIPE_ID_ERROR]},
+            '2': {'id': [RECIPE_ID_ERROR]},
+            '3': {'id': ['Recipe appears more than once']}
+        })
+
+        response = self.send('patch', reverse('api-recipe-batch'), {'recipes': [
+            {'id': self.toast.pk, 'name': 'Stew'},
+            {'id': self.soup.pk, 'name': 'Toast'}
+        ]})
+        self.assertEqual(
+            response.json()['errors'], {'1': {'name': [RECIPE_NAME_TAKEN_ERROR]}})
+        self.assertEqual(self.stored(self.toast)['name'], 'Toast')
+
+    def test_update_rejects_ids_beyond_sqlite_integers(self):
+        response = self.send('patch', reverse('api-recipe-batch'), {'recipes': [
+            {'id': 2 ** 70, 'name': 'Stew'},
+            {'id': -1, 'name': 'Stew'}
+        ]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], {
+            '0': {'id': [RECIPE_ID_ERROR]},
+            '1': {'id': [RECIPE_ID_ERROR]}
+        })
+
+
+class ApiLookupTests(ApiTestCase):
+
+    def test_ingredients(self):
+        response = self.client.get(reverse('api-ingredients'), {'prefix': 'sa'}).json()
+        self.assertEqual(response, {
+            'total': 1,
+            'offset': 0,
+            'ingredients': [{'id': self.salt.pk, 'name': 'Salt'}]
+        })
+
+        response = self.client.get(
+            reverse('api-ingredients'), {'ids': f'{self.salt.pk},{self.pepper.pk}'}).json()
+        self.assertEqual(
+            [ingredient['name'] for ingredient in response['ingredients']],
+            ['Pepper', 'Salt'])
+
+        response = self.client.get(
+            reverse('api-ingredients'), {'offset': 1, 'limit': 1}).json()
+        self.assertEqual(response['total'], 2)
+        self.assertEqual(response['ingredients'], [{'id': self.salt.pk, 'name': 'Salt'}])
+
+    def test_tags(self):
+        cheap = Tag.objects.create(name='Cheap')
+
+        response = self.client.get(reverse('api-tags')).json()
+        self.assertEqual(response, {'tags': [
+            {'id': cheap.pk, 'name': 'Cheap'},
+            {'id': self.quick.pk, 'name': 'Quick'}
+        ]})
+
+        response = self.client.get(reverse('api-tags'), {'prefix': 'qu'}).json()
+        self.assertEqual(response, {'tags': [{'id': self.quick.pk, 'name': 'Quick'}]})
+
+        response = self.client.get(reverse('api-tags'), {'ids': cheap.pk}).json()
+        self.assertEqual(response, {'tags': [{'id': cheap.pk, 'name': 'Cheap'}]})
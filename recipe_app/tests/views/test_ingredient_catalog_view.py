@@ -0,0 +1,100 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from recipe_app.models import Ingredient
+from recipe_app.views import (
+    INGREDIENT_CATALOG_MAX_PAGE_SIZE,
+    INGREDIENT_CATALOG_PAGE_SIZE
+)
+
+
+class IngredientCatalogViewTests(TestCase):
+    def test_returns_ingredients_alphabetized(self):
+        b = Ingredient.objects.create(name='Ingredient B')
+        a = Ingredient.objects.create(name='Ingredient A')
+        c = Ingredient.objects.create(name='Ingredient C')
+
+        results = self.client.get(reverse('ingredient-catalog')).json()
+        self.assertEqual(results, {
+            'total': 3,
+            'offset': 0,
+            'ingredients': [
+                {'id': a.pk, 'name': 'Ingredient A'},
+                {'id': b.pk, 'name': 'Ingredient B'},
+                {'id': c.pk, 'name': 'Ingredient C'}
+            ]
+        })
+
+    def test_prefix(self):
+        Ingredient.objects.create(name='Mustard Seed')
+        Ingredient.objects.create(name='Mushroom')
+        Ingredient.objects.create(name='Honey Mustard')
+
+        results = self.client.get(
+            reverse('ingredient-catalog'), {'prefix': 'mus'}).json()
+        self.assertEqual(results['total'], 2)
+        self.assertEqual(
+            [i['name'] for i in results['ingredients']],
+            ['Mushroom', 'Mustard Seed']
+        )
+
+    def test_prefix_ignores_case_and_spacing(self):
+        Ingredient.objects.create(name='BBQ Sauce')
+        Ingredient.objects.create(name='bbq rub')
+
+        results = self.client.get(
+            reverse('ingredient-catalog'), {'prefix': ' Bbq  S'}).json()
+        self.assertEqual(
+            [i['name'] for i in results['ingredients']], ['BBQ Sauce'])
+
+    def test_prefix_searches_the_name_key_index(self):
+        Ingredient.objects.create(name='Mustard Seed')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('ingredient-catalog'), {'prefix': 'mus'})
+
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + queries.captured_queries[-1]['sql'])
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('USING INDEX', plan)
+        self.assertIn('name_key>? AND name_key<?', plan)
+
+    def test_pages(self):
+        for i in range(INGREDIENT_CATALOG_PAGE_SIZE + 5):
+            Ingredient.objects.create(name=f'Ingredient {i:03}')
+
+        first = self.client.get(reverse('ingredient-catalog')).json()
+        self.assertEqual(first['total'], INGREDIENT_CATALOG_PAGE_SIZE + 5)
+        self.assertEqual(len(first['ingredients']), INGREDIENT_CATALOG_PAGE_SIZE)
+
+        second = self.client.get(
+            reverse('ingredient-catalog'),
+            {'offset': INGREDIENT_CATALOG_PAGE_SIZE, 'limit': 2}
+        ).json()
+        self.assertEqual(
+            [i['name'] for i in second['ingredients']],
+            [f'Ingredient {INGREDIENT_CATALOG_PAGE_SIZE:03}',
+             f'Ingredient {INGREDIENT_CATALOG_PAGE_SIZE + 1:03}']
+        )
+
+    def test_limit_is_capped(self):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ingredient {i}')
+            for i in range(INGREDIENT_CATALOG_MAX_PAGE_SIZE + 1)
+        )
+
+        results = self.client.get(
+            reverse('ingredient-catalog'),
+            {'limit': INGREDIENT_CATALOG_MAX_PAGE_SIZE * 2}
+        ).json()
+        self.assertEqual(
+            len(results['ingredients']), INGREDIENT_CATALOG_MAX_PAGE_SIZE)
+
+    def test_bad_paging_params_use_defaults(self):
+        Ingredient.objects.create(name='Carrot')
+
+        results = self.client.get(
+            reverse('ingredient-catalog'), {'offset': 'x', 'limit': '-'}).json()
+        self.assertEqual(results['offset'], 0)
+        self.assertEqual(len(results['ingredients']), 1)
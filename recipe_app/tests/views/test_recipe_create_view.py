@@ -1,8 +1,10 @@
 from unittest.mock import patch, ANY
 
+from django.db import connection
 from django.http import HttpResponse
 from django.shortcuts import redirect
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from recipe_app.forms.forms import (
@@ -14,11 +16,13 @@ from recipe_app.forms.forms import (
 from recipe_app.forms.tag_selection_formset import TagSelectionFormset
 
 from recipe_app.models import (
+    Generation,
     Ingredient,
     Recipe,
     RecipeIngredient,
     Tag
 )
+from recipe_app.search.index import RECIPES_GENERATION
 from recipe_app.views import (
     INGREDIENT_LIST_FORMSET_PREFIX,
     TAG_CREATE_FORMSET_PREFIX,
@@ -65,7 +69,7 @@ class RecipeCreateViewGetTests(TestCase):
 
         rendered_tag_select_form = rendered_context['tag_select']
         self.assertIsInstance(rendered_tag_select_form, TagSelectionFormset)
-        self.assertTrue(rendered_tag_select_form.is_valid())
+        self.assertFalse(rendered_tag_select_form.is_bound)
         self.assertEqual(len(rendered_tag_select_form.forms), 5)
         self.assertEqual(
             rendered_tag_select_form.prefix,
@@ -633,3 +637,50 @@ class RecipeCreateViewPostTests(TestCase):
             recipe_tags[0].name,
             form_data[f'{TAG_SELECT_FORMSET_PREFIX}-0-tag_name']
         )
+
+    def post_ingredients(self, name, ingredient_names):
+        form_data = {
+            'csrfmiddlewaretoken': 'irrelevant',
+            'name': name,
+            'directions': '',
+            f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS': str(len(ingredient_names)),
+            f'{INGREDIENT_LIST_FORMSET_PREFIX}-INITIAL_FORMS': '0',
+            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MIN_NUM_FORMS': '0',
+            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MAX_NUM_FORMS': '1000',
+            f'{TAG_CREATE_FORMSET_PREFIX}-TOTAL_FORMS': '1',
+            f'{TAG_CREATE_FORMSET_PREFIX}-INITIAL_FORMS': '0',
+            f'{TAG_CREATE_FORMSET_PREFIX}-MIN_NUM_FORMS': '0',
+            f'{TAG_CREATE_FORMSET_PREFIX}-MAX_NUM_FORMS': '1000',
+            f'{TAG_CREATE_FORMSET_PREFIX}-0-tag_name': f'{name} Tag',
+        }
+        for x, ingredient_name in enumerate(ingredient_names):
+            form_data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-{x}-name'] = ingredient_name
+            form_data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-{x}-measurement'] = 'Some'
+
+        self.client.post(reverse('recipe-create'), form_data)
+        return Recipe.objects.get(name=name)
+
+    def test_success_reuses_existing_ingredients(self, _):
+        existing = Ingredient.objects.create(name='Salt')
+
+        recipe = self.post_ingredients('Salted', ['salt', 'Pepper'])
+
+        self.assertEqual(Ingredient.objects.count(), 2)
+        self.assertCountEqual(
+            recipe.recipeingredient_set.values_list('ingredient__name', flat=True),
+            ['Salt', 'Pepper']
+        )
+        self.assertTrue(recipe.recipeingredient_set.filter(
+            ingredient=existing).exists())
+
+    def test_query_count_does_not_grow_with_ingredients(self, _):
+        with CaptureQueriesContext(connection) as few:
+            self.post_ingredients('Few', ['Salt'])
+        with self.assertNumQueries(len(few.captured_queries)):
+            self.post_ingredients(
+                'Many', [f'Ingredient {x}' for x in range(30)])
+
+    def test_success_announces_the_recipe_once(self, _):
+        before = Generation.objects.bump(RECIPES_GENERATION)
+        self.post_ingredients('Once', ['Salt', 'Pepper'])
+        self.assertEqual(Generation.objects.current(RECIPES_GENERATION), before + 1)
@@ -1,6 +1,7 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.urls import reverse
 
+from recipe_app.fragments import recipe_detail_fragments
 from recipe_app.models import (
     Ingredient,
     Recipe,
@@ -60,3 +61,85 @@ class RecipeDetailViewTestCase(TestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, 404)
+
+    def test_query_count_does_not_grow_with_ingredients(self):
+        for x in range(10):
+            RecipeIngredient.objects.create(
+                recipe=self.recipe,
+                ingredient=Ingredient.objects.create(name=f'Spice {x}'),
+                measurement='1 tsp'
+            )
+            self.recipe.tags.add(Tag.objects.create(name=f'Tag {x}'))
+
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse('recipe-detail', args=[self.recipe.pk]))
+
+        self.assertEqual(len(response.context['ingredients_list']), 12)
+        self.assertContains(response, 'Spice 9')
+        self.assertContains(response, 'Tag 9')
+
+
+class RecipeDetailCacheTests(TransactionTestCase):
+    def setUp(self):
+        recipe_detail_fragments.clear()
+        self.salt = Ingredient.objects.create(name='Salt')
+        self.tag = Tag.objects.create(name='Quick')
+        self.recipe = Recipe.objects.create(name='Soup', directions='Simmer.')
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=self.salt, measurement='1 tsp')
+        self.recipe.tags.add(self.tag)
+        self.url = reverse('recipe-detail', args=[self.recipe.pk])
+
+    def get(self):
+        return self.client.get(self.url).content.decode()
+
+    def test_repeat_views_run_no_queries(self):
+        self.get()
+        with self.assertNumQueries(0):
+            content = self.get()
+        self.assertIn('Salt', content)
+        self.assertIn('Quick', content)
+
+    def test_recipe_writes_invalidate(self):
+        self.get()
+        self.recipe.directions = 'Boil.'
+        self.recipe.save()
+        self.assertIn('Boil.', self.get())
+
+    def test_ingredient_list_writes_invalidate(self):
+        self.get()
+        RecipeIngredient.objects.create(
+            recipe=self.recipe,
+            ingredient=Ingredient.objects.create(name='Pepper'),
+            measurement='a pinch'
+        )
+        self.assertIn('a pinch - Pepper', self.get())
+
+    def test_tag_writes_invalidate(self):
+        self.get()
+        self.recipe.tags.add(Tag.objects.create(name='Cheap'))
+        self.assertIn('Cheap', self.get())
+
+    def test_ingredient_renames_invalidate(self):
+        self.get()
+        self.salt.name = 'Sea Salt'
+        self.salt.save()
+        self.assertIn('Sea Salt', self.get())
+
+    def test_tag_renames_invalidate(self):
+        self.get()
+        self.tag.name = 'Fast'
+        self.tag.save()
+        self.assertIn('Fast', self.get())
+
+    def test_other_recipes_stay_cached(self):
+        self.get()
+        Recipe.objects.create(name='Stew')
+        with self.assertNumQueries(0):
+            self.get()
+
+    def test_deleted_recipe_is_not_found(self):
+        self.get()
+        self.recipe.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
@@ -0,0 +1,40 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from recipe_app.models import Ingredient, Recipe, RecipeIngredient
+
+
+class RecipeExportViewTests(TestCase):
+    def setUp(self):
+        self.recipe = Recipe.objects.create(name='Soup', directions='Simmer.')
+        for name, measurement in [('Water', '1 qt'), ('Salt', 'a pinch')]:
+            RecipeIngredient.objects.create(
+                recipe=self.recipe,
+                ingredient=Ingredient.objects.create(name=name),
+                measurement=measurement
+            )
+        self.recipe.tags.create(name='Quick')
+        Recipe.objects.create(name='Toast')
+
+    def test_streams_one_document_per_recipe(self):
+        response = self.client.get(reverse('recipe-export'))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('attachment', response['Content-Disposition'])
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {
+                'name': 'Soup',
+                'directions': 'Simmer.',
+                'ingredients': [
+                    {'name': 'Water', 'measurement': '1 qt'},
+                    {'name': 'Salt', 'measurement': 'a pinch'},
+                ],
+                'tags': ['Quick'],
+            },
+            {'name': 'Toast', 'directions': '', 'ingredients': [], 'tags': []},
+        ])
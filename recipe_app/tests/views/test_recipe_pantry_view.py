@@ -0,0 +1,79 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from recipe_app.models import Ingredient, Recipe, RecipeIngredient
+from recipe_app.views import PANTRY_RESULT_LIMIT
+
+
+class RecipePantryViewTests(TestCase):
+    def setUp(self):
+        self.rice = Ingredient.objects.create(name='Rice')
+        self.chicken = Ingredient.objects.create(name='Chicken')
+        self.onion = Ingredient.objects.create(name='Onion')
+        self.basil = Ingredient.objects.create(name='Basil')
+
+        self.plain_rice = self.recipe('Plain Rice', [self.rice])
+        self.chicken_rice = self.recipe(
+            'Chicken Rice', [self.rice, self.chicken, self.onion])
+        self.pesto = self.recipe('Pesto', [self.basil, self.onion])
+
+    def recipe(self, name, ingredients):
+        recipe = Recipe.objects.create(name=name)
+        for ingredient in ingredients:
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient)
+        return recipe
+
+    def test_ranks_by_missing_ingredients(self):
+        results = self.client.get(
+            reverse('recipe-pantry'),
+            {'have': f'{self.rice.pk},{self.onion.pk}'}
+        ).json()
+
+        self.assertEqual(results['recipes'], [
+            {
+                'id': self.plain_rice.pk,
+                'name': 'Plain Rice',
+                'url': reverse('recipe-detail', args=[self.plain_rice.pk]),
+                'missing': []
+            },
+            {
+                'id': self.chicken_rice.pk,
+                'name': 'Chicken Rice',
+                'url': reverse('recipe-detail', args=[self.chicken_rice.pk]),
+                'missing': [{'id': self.chicken.pk, 'name': 'Chicken'}]
+            },
+            {
+                'id': self.pesto.pk,
+                'name': 'Pesto',
+                'url': reverse('recipe-detail', args=[self.pesto.pk]),
+                'missing': [{'id': self.basil.pk, 'name': 'Basil'}]
+            }
+        ])
+
+    def test_missing_ingredients_are_alphabetized(self):
+        results = self.client.get(
+            reverse('recipe-pantry'), {'have': self.rice.pk}).json()
+
+        chicken_rice = results['recipes'][1]
+        self.assertEqual(
+            [ingredient['name'] for ingredient in chicken_rice['missing']],
+            ['Chicken', 'Onion']
+        )
+
+    def test_recipes_without_pantry_ingredients_are_left_out(self):
+        results = self.client.get(
+            reverse('recipe-pantry'), {'have': self.basil.pk}).json()
+        self.assertEqual(
+            [recipe['id'] for recipe in results['recipes']], [self.pesto.pk])
+
+    def test_empty_pantry(self):
+        results = self.client.get(reverse('recipe-pantry')).json()
+        self.assertEqual(results, {'recipes': []})
+
+    def test_result_limit(self):
+        for i in range(PANTRY_RESULT_LIMIT):
+            self.recipe(f'Rice {i}', [self.rice])
+
+        results = self.client.get(
+            reverse('recipe-pantry'), {'have': self.rice.pk}).json()
+        self.assertEqual(len(results['recipes']), PANTRY_RESULT_LIMIT)
@@ -1,21 +1,24 @@
 from unittest.mock import patch, ANY
 
+from django.core.cache import caches
 from django.http import HttpResponse
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 
-from recipe_app.forms.forms import (
-    IngredientInclusionFormSet,
-    RecipeInclusionForm
-)
+from recipe_app.catalog import TAGS_GENERATION, tag_catalog
+from recipe_app.fragments import FRAGMENT_CACHE
+from recipe_app.forms.forms import IngredientInclusionForm
 from recipe_app.forms.tag_selection_formset import TagSelectionFormset
 from recipe_app.models import (
+    Generation,
     Ingredient,
     Recipe,
-    RecipeIngredient
+    RecipeIngredient,
+    Tag
 )
+from recipe_app.search.criteria import INCLUSION_PARAMS, TAGS_PARAM, TEXT_PARAM
 from recipe_app.views import (
-    INGREDIENT_LIST_FORMSET_PREFIX,
+    INGREDIENT_CATALOG_PAGE_SIZE,
     TAG_SELECT_FORMSET_PREFIX
 )
 
@@ -31,62 +34,95 @@ class RecipeSearchViewGetTests(TestCase):
         )
 
     def test_get_returns_all_elements(self, mock_render):
-        for i in range(1, 3):
-            Ingredient.objects.create(name=f'Ingredient {i}')
-
         self.client.get(reverse('recipe-search'))
 
-        ingredients_list = mock_render.call_args[0][2]['ingredients']
-        self.assertIsInstance(ingredients_list, IngredientInclusionFormSet)
-        self.assertEqual(ingredients_list.prefix,
-                         INGREDIENT_LIST_FORMSET_PREFIX)
-        self.assertEqual(len(ingredients_list), 2)
-        for i in range(1, 3):
-            self.assertIn(
-                {
-                    'id': i,
-                    'name': f'Ingredient {i}'
-                },
-                ingredients_list.initial
-            )
-
-        recipe_name = mock_render.call_args[0][2]['recipe_name']
-        self.assertIsInstance(recipe_name, RecipeInclusionForm)
-
-        tag_select_form = mock_render.call_args[0][2]['tag_select']
+        context = mock_render.call_args[0][2]
+        self.assertEqual(
+            context['inclusion_choices'],
+            IngredientInclusionForm.radio_button_options
+        )
+        self.assertEqual(context['inclusion_params'], INCLUSION_PARAMS)
+        self.assertEqual(
+            context['catalog_page_size'], INGREDIENT_CATALOG_PAGE_SIZE)
+        self.assertEqual(context['text_param'], TEXT_PARAM)
+        self.assertEqual(context['tags_param'], TAGS_PARAM)
+
+        tag_select_form = context['tag_select']
         self.assertIsInstance(tag_select_form, TagSelectionFormset)
         self.assertEqual(tag_select_form.prefix, TAG_SELECT_FORMSET_PREFIX)
-        self.assertNotIn('on', tag_select_form.data.values())
+        self.assertFalse(any(tag['include'] for tag in tag_select_form.initial))
 
-    def test_get_returns_ingredients_alphabetized(self, mock_render):
-        Ingredient.objects.create(name = 'Ingredient B')
-        Ingredient.objects.create(name = 'Ingredient A')
-        Ingredient.objects.create(name = 'Ingredient C')
+    def test_get_does_not_load_ingredients(self, mock_render):
+        for i in range(1, 3):
+            Ingredient.objects.create(name=f'Ingredient {i}')
 
         self.client.get(reverse('recipe-search'))
-        ingredients_list = mock_render.call_args[0][2]['ingredients']
-        ingredient_names = [ ingredient['name'].value() for ingredient in ingredients_list.forms]   
-        self.assertEqual(ingredient_names, sorted(ingredient_names))
+
+        self.assertNotIn('ingredients', mock_render.call_args[0][2])
+
+
+class RecipeSearchViewGetRenderTests(TestCase):
+
+    def test_page_size_does_not_depend_on_catalog_size(self):
+        empty_page = self.client.get(reverse('recipe-search')).content
+
+        for i in range(100):
+            Ingredient.objects.create(name=f'Ingredient {i}')
+        full_page = self.client.get(reverse('recipe-search')).content
+
+        self.assertNotIn(b'Ingredient 1', full_page)
+        self.assertEqual(len(empty_page), len(full_page))
+
+
+class RecipeSearchTagPanelCacheTests(TransactionTestCase):
+    def setUp(self):
+        caches[FRAGMENT_CACHE].clear()
+        tag_catalog.invalidate()
+        Tag.objects.create(name='Quick')
+
+    def get(self):
+        return self.client.get(reverse('recipe-search')).content.decode()
+
+    def test_warm_renders_skip_the_tag_list(self):
+        self.get()
+        with patch.object(TagSelectionFormset, 'as_search_checkboxes') as render:
+            content = self.get()
+        render.assert_not_called()
+        self.assertIn('Quick', content)
+
+    def test_tag_writes_invalidate(self):
+        self.get()
+        tag = Tag.objects.create(name='Cheap')
+        self.assertIn('Cheap', self.get())
+
+        tag.name = 'Thrifty'
+        tag.save()
+        self.assertIn('Thrifty', self.get())
+
+        tag.delete()
+        self.assertNotIn('Thrifty', self.get())
+
+    @override_settings(TAG_CATALOG_REFRESH_SECONDS=0)
+    def test_other_workers_writes_are_noticed(self):
+        self.get()
+        Tag.objects.bulk_create([Tag(name='Cheap')])
+        self.assertNotIn('Cheap', self.get())
+
+        Generation.objects.bump(TAGS_GENERATION)
+        self.assertIn('Cheap', self.get())
 
 
 @patch('recipe_app.views.render', return_value=HttpResponse())
-class RecipeSearchViewPostTests(TestCase):
-
-    def test_post_renders_correct_template(self, mock_render):
-        post_data = {
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-INITIAL_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MIN_NUM_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MAX_NUM_FORMS': '1000',
-            'csrfmiddlewaretoken': 'irrelevant'
-        }
-        self.client.post(reverse('recipe-search'), post_data)
+class RecipeResultsViewTests(TestCase):
+
+    def test_renders_correct_template(self, mock_render):
+        self.client.get(reverse('recipe-results'))
 
         mock_render.assert_called_with(
             ANY, 'recipe_app/recipe_list.html', ANY
         )
 
-    def test_post_handles_neutral_inclusion(self, mock_render):
+    def test_handles_neutral_inclusion(self, mock_render):
         recipe_no_ingredients = Recipe.objects.create(
             name='No ingredients', directions='things')
 
@@ -98,17 +134,13 @@ class RecipeSearchViewPostTests(TestCase):
             ingredient=ingredient
         )
 
-        post_data = {
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS': '1',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-INITIAL_FORMS': '1',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MIN_NUM_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MAX_NUM_FORMS': '1000',
-            'csrfmiddlewaretoken': 'irrelevant',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-name': ingredient.name,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-inclusion': 'neutral',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-id': ingredient.pk
+        # Neutral ingredients aren't submitted at all.
+        search_data = {
+            'and': '',
+            'or': '',
+            'not': ''
         }
-        self.client.post(reverse('recipe-search'), post_data)
+        self.client.get(reverse('recipe-results'), search_data, follow=True)
 
         rendered_recipe_list = mock_render.call_args[0][2]['recipes_list']
         self.assertEqual(len(rendered_recipe_list), 2)
@@ -136,24 +168,11 @@ class RecipeSearchViewPostTests(TestCase):
             name='Neutral Ingredient')
         neutral_recipe = Recipe.objects.create(name='Neutral Recipe')
 
-        post_data = {
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS': '3',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-INITIAL_FORMS': '3',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MIN_NUM_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MAX_NUM_FORMS': '1000',
-            'csrfmiddlewaretoken': 'irrelevant',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-name': exclude_ingredient_1.name,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-inclusion': 'exclude',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-id': exclude_ingredient_1.pk,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-name': exclude_ingredient_2.name,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-inclusion': 'exclude',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-id': exclude_ingredient_2.pk,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-2-name': neutral_ingredient.name,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-2-inclusion': 'neutral',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-2-id': neutral_ingredient.pk
+        search_data = {
+            'not': f'{exclude_ingredient_1.pk},{exclude_ingredient_2.pk}'
         }
 
-        self.client.post(reverse('recipe-search'), post_data)
+        self.client.get(reverse('recipe-results'), search_data, follow=True)
 
         rendered_recipe_list = mock_render.call_args[0][2]['recipes_list']
         self.assertEqual(len(rendered_recipe_list), 1)
@@ -185,21 +204,11 @@ class RecipeSearchViewPostTests(TestCase):
             name='Exclude Recipe'
         )
 
-        post_data = {
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS': '2',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-INITIAL_FORMS': '2',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MIN_NUM_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MAX_NUM_FORMS': '1000',
-            'csrfmiddlewaretoken': 'irrelevant',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-name': ingredient_1.name,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-inclusion': 'or',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-id': ingredient_1.pk,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-name': ingredient_2.name,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-inclusion': 'or',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-id': ingredient_2.pk
+        search_data = {
+            'or': f'{ingredient_1.pk},{ingredient_2.pk}'
         }
 
-        self.client.post(reverse('recipe-search'), post_data)
+        self.client.get(reverse('recipe-results'), search_data, follow=True)
 
         rendered_recipe_list = mock_render.call_args[0][2]['recipes_list']
         self.assertEqual(len(rendered_recipe_list), 2)
@@ -235,21 +244,11 @@ class RecipeSearchViewPostTests(TestCase):
             name='Exclude Recipe 2'
         )
 
-        post_data = {
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS': '2',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-INITIAL_FORMS': '2',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MIN_NUM_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MAX_NUM_FORMS': '1000',
-            'csrfmiddlewaretoken': 'irrelevant',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-name': ingredient_1.name,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-inclusion': 'and',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-id': ingredient_1.pk,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-name': ingredient_2.name,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-inclusion': 'and',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-id': ingredient_2.pk
+        search_data = {
+            'and': f'{ingredient_1.pk},{ingredient_2.pk}'
         }
 
-        self.client.post(reverse('recipe-search'), post_data)
+        self.client.get(reverse('recipe-results'), search_data, follow=True)
 
         rendered_recipe_list = mock_render.call_args[0][2]['recipes_list']
         self.assertEqual(len(rendered_recipe_list), 1)
@@ -265,15 +264,10 @@ class RecipeSearchViewPostTests(TestCase):
         exclude_recipe = Recipe.objects.create(
             name='Beef', directions='dont do stuff')
 
-        post_data = {
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-INITIAL_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MIN_NUM_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MAX_NUM_FORMS': '1000',
-            'csrfmiddlewaretoken': 'irrelevant',
-            'recipe_name': 'Chicken'
+        search_data = {
+            'q': 'Chicken'
         }
-        self.client.post(reverse('recipe-search'), post_data)
+        self.client.get(reverse('recipe-results'), search_data, follow=True)
 
         rendered_recipe_list = mock_render.call_args[0][2]['recipes_list']
         self.assertEqual(len(rendered_recipe_list), 2)
@@ -281,6 +275,23 @@ class RecipeSearchViewPostTests(TestCase):
         self.assertIn(include_recipe_2, rendered_recipe_list)
         self.assertNotIn(exclude_recipe, rendered_recipe_list)
 
+    def test_recipe_name_matches_directions(self, mock_render):
+        include_recipe = Recipe.objects.create(
+            name='Soup', directions='Simmer the chicken')
+        exclude_recipe = Recipe.objects.create(
+            name='Salad', directions='Toss the greens')
+
+        search_data = {
+            'q': 'chick'
+        }
+        self.client.get(reverse('recipe-results'), search_data, follow=True)
+
+        rendered_recipe_list = mock_render.call_args[0][2]['recipes_list']
+        self.assertEqual(rendered_recipe_list, [include_recipe])
+        self.assertIn('<mark>chicken</mark>',
+                      rendered_recipe_list[0].snippet)
+        self.assertNotIn(exclude_recipe, rendered_recipe_list)
+
     def test_or_includes_are_distinct(self, mock_render):
         ingredient_1 = Ingredient.objects.create(name='Ingredient 1')
         ingredient_2 = Ingredient.objects.create(name='Ingredient 2')
@@ -297,21 +308,11 @@ class RecipeSearchViewPostTests(TestCase):
             ingredient=ingredient_2
         )
 
-        post_data = {
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS': '2',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-INITIAL_FORMS': '2',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MIN_NUM_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MAX_NUM_FORMS': '1000',
-            'csrfmiddlewaretoken': 'irrelevant',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-name': ingredient_1.name,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-inclusion': 'or',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-id': ingredient_1.pk,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-name': ingredient_2.name,
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-inclusion': 'or',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-id': ingredient_2.pk
+        search_data = {
+            'or': f'{ingredient_1.pk},{ingredient_2.pk}'
         }
 
-        self.client.post(reverse('recipe-search'), post_data)
+        self.client.get(reverse('recipe-results'), search_data, follow=True)
 
         rendered_recipe_list = mock_render.call_args[0][2]['recipes_list']
         self.assertEqual(len(rendered_recipe_list), 1)
@@ -328,33 +329,20 @@ class RecipeSearchViewPostTests(TestCase):
         recipe3.tags.add(recipe1.tags.all()[0])
         recipe3.tags.add(recipe2.tags.all()[0])
 
-        post_data = {
-            'recipe_name': '',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-INITIAL_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MIN_NUM_FORMS': '0',
-            f'{INGREDIENT_LIST_FORMSET_PREFIX}-MAX_NUM_FORMS': '1000',
-            f'{TAG_SELECT_FORMSET_PREFIX}-TOTAL_FORMS': '2',
-            f'{TAG_SELECT_FORMSET_PREFIX}-INITIAL_FORMS': '2',
-            f'{TAG_SELECT_FORMSET_PREFIX}-MIN_NUM_FORMS': '',
-            f'{TAG_SELECT_FORMSET_PREFIX}-MAX_NUM_FORMS': '',
-            'csrfmiddlewaretoken': 'irrelevant',
-            f'{TAG_SELECT_FORMSET_PREFIX}-0-tag_name': 'Tag1',
-            f'{TAG_SELECT_FORMSET_PREFIX}-0-include': 'on',
-            f'{TAG_SELECT_FORMSET_PREFIX}-0-id': '1',
-            f'{TAG_SELECT_FORMSET_PREFIX}-1-tag_name': 'Tag2',
-            f'{TAG_SELECT_FORMSET_PREFIX}-1-include': 'on',
-            f'{TAG_SELECT_FORMSET_PREFIX}-1-id': '2'
+        # Checked tag boxes each post their own value.
+        search_data = {
+            'q': '',
+            'tags': ['1', '2']
         }
 
-        self.client.post(reverse('recipe-search'), post_data)
+        self.client.get(reverse('recipe-results'), search_data, follow=True)
 
         rendered_recipe_list = mock_render.call_args[0][2]['recipes_list']
         self.assertEqual(len(rendered_recipe_list), 1)
         self.assertIn(recipe3, rendered_recipe_list)
 
     def test_search_empty_ingredients_table_doesnt_error(self, mock_render):
-        self.client.post(reverse('recipe-search'))
+        self.client.get(reverse('recipe-results'))
         self.assertTrue(True) # If we got here the test passed
 
     def test_result_ordering(self, mock_render):
@@ -362,20 +350,112 @@ class RecipeSearchViewPostTests(TestCase):
         Recipe.objects.create(name = 'Recipe C', directions='jfkj')
         Recipe.objects.create(name = 'Recipe A', directions='jfkj')
 
-        post_data = {
-            'recipe_name': '',
-            'ingredient-form-TOTAL_FORMS': '0', 
-            'ingredient-form-INITIAL_FORMS': '0', 
-            'ingredient-form-MIN_NUM_FORMS': '0', 
-            'ingredient-form-MAX_NUM_FORMS': '1000', 
-            'tag-select-form-TOTAL_FORMS': '0', 
-            'tag-select-form-INITIAL_FORMS': '0', 
-            'tag-select-form-MIN_NUM_FORMS': '', 
-            'tag-select-form-MAX_NUM_FORMS': '', 
-            'csrfmiddlewaretoken': 'irrelevant'}
+        search_data = {
+            'q': ''}
         
-        self.client.post(reverse('recipe-search'), post_data)
+        self.client.get(reverse('recipe-results'), search_data, follow=True)
         rendered_recipe_list = mock_render.call_args[0][2]['recipes_list']
         rendered_recipe_names = [recipe.name for recipe in rendered_recipe_list]
 
         self.assertTrue(rendered_recipe_names == sorted(rendered_recipe_names))
+
+    @override_settings(RECIPE_LIST_PAGE_SIZE=2)
+    def test_results_are_paginated(self, mock_render):
+        for name in ['Recipe A', 'Recipe B', 'Recipe C']:
+            Recipe.objects.create(name=name, directions='jfkj')
+
+        tag = Tag.objects.create(name='Tag')
+        for recipe in Recipe.objects.all():
+            recipe.tags.add(tag)
+
+        search_data = {
+            'q': '',
+            'tags': f' {tag.pk}, x'}
+
+        self.client.get(reverse('recipe-results'), search_data, follow=True)
+        context = mock_render.call_args[0][2]
+        self.assertEqual(
+            [recipe.name for recipe in context['recipes_list']],
+            ['Recipe A', 'Recipe B']
+        )
+        self.assertIsNone(context['previous_url'])
+        self.assertEqual(
+            context['next_url'],
+            reverse('recipe-results') +
+            f'?tags={tag.pk}&after={context["page"].next_cursor}'
+        )
+
+        response = self.client.get(context['next_url'])
+        self.assertEqual(response.status_code, 200)
+        context = mock_render.call_args[0][2]
+        self.assertEqual(
+            [recipe.name for recipe in context['recipes_list']],
+            ['Recipe C']
+        )
+        self.assertFalse(context['page'].has_next)
+        self.assertIsNone(context['next_url'])
+        self.assertTrue(context['previous_url'])
+
+    def test_text_results_are_paginated(self, mock_render):
+        for i in range(55):
+            Recipe.objects.create(name=f'Soup {i:02}', directions='Simmer.')
+
+        response = self.client.get(reverse('recipe-results'), {'q': 'soup'})
+        names = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            context = mock_render.call_args[0][2]
+            names += [recipe.name for recipe in context['recipes_list']]
+            if not context['next_url']:
+                break
+            response = self.client.get(context['next_url'])
+
+        self.assertEqual(len(names), 55)
+        self.assertCountEqual(names, [f'Soup {i:02}' for i in range(55)])
+        self.assertTrue(context['previous_url'])
+
+    def test_ids_too_large_for_sqlite_are_ignored(self, mock_render):
+        recipe = Recipe.objects.create(name='Soup', directions='Simmer.')
+
+        for indexed in (True, False):
+            with self.settings(RECIPE_SEARCH_INDEX=indexed):
+                response = self.client.get(
+                    reverse('recipe-results'), {'and': '99999999999999999999999'}, follow=True)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(mock_render.call_args[0][2]['recipes_list'], [recipe])
+
+    def test_canonical_url_is_not_redirected(self, mock_render):
+        response = self.client.get(reverse('recipe-results') + '?and=1%2C2&q=soup')
+        self.assertEqual(response.status_code, 200)
+
+    def test_redirects_to_canonical_url(self, mock_render):
+        response = self.client.get(
+            reverse('recipe-results'),
+            {'q': ' soup ', 'and': '2,1,2', 'or': '', 'tags': ['3', 'x']}
+        )
+        self.assertRedirects(
+            response,
+            reverse('recipe-results') + '?and=1%2C2&tags=3&q=soup',
+            fetch_redirect_response=False
+        )
+
+    def test_empty_search_redirects_to_all_recipes(self, mock_render):
+        response = self.client.get(reverse('recipe-results'), {'q': ''})
+        self.assertRedirects(
+            response, reverse('recipe-results'), fetch_redirect_response=False)
+
+    def test_posted_search_redirects_to_results(self, mock_render):
+        response = self.client.post(
+            reverse('recipe-search'),
+            {'csrfmiddlewaretoken': 'irrelevant', 'or': '5,4'}
+        )
+        self.assertRedirects(
+            response,
+            reverse('recipe-results') + '?or=4%2C5',
+            fetch_redirect_response=False
+        )
+
+
+@override_settings(RECIPE_SEARCH_INDEX=False)
+class RecipeResultsViewAggregateQueryTests(RecipeResultsViewTests):
+    pass
@@ -1,8 +1,11 @@
 from unittest.mock import patch, ANY
 
+from django.core.cache import caches
+from django.db import connection
 from django.http import HttpResponse
 from django.shortcuts import redirect
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from recipe_app.forms.forms import (
@@ -11,6 +14,8 @@ from recipe_app.forms.forms import (
     TagCreationFormset
 )
 
+from recipe_app.catalog import tag_catalog
+from recipe_app.fragments import FRAGMENT_CACHE
 from recipe_app.forms.tag_selection_formset import TagSelectionFormset
 from recipe_app.models import (
     Ingredient,
@@ -109,19 +114,62 @@ class RecipeUpdateView_GetTests(TestCase):
             TAG_SELECT_FORMSET_PREFIX
         )
         self.assertEqual(
-            rendered_tag_select.data,
-            {
-                'tag-select-form-TOTAL_FORMS': '2',
-                'tag-select-form-INITIAL_FORMS': '2',
-                'tag-select-form-MIN_NUM_FORMS': '',
-                'tag-select-form-MAX_NUM_FORMS': '',
-                'tag-select-form-0-tag_name': recipe.tags.all()[0].name,
-                'tag-select-form-0-id': str(recipe.tags.all()[0].id),
-                'tag-select-form-0-include': True,
-                'tag-select-form-1-tag_name': unincluded_tag.name,
-                'tag-select-form-1-id': str(unincluded_tag.id)
-            }
-        )
+            rendered_tag_select.initial,
+            [
+                {
+                    'tag_name': recipe.tags.all()[0].name,
+                    'id': recipe.tags.all()[0].id,
+                    'include': True
+                },
+                {
+                    'tag_name': unincluded_tag.name,
+                    'id': unincluded_tag.id,
+                    'include': False
+                }
+            ]
+        )
+
+
+class RecipeFormTagPanelCacheTests(TransactionTestCase):
+    def setUp(self):
+        caches[FRAGMENT_CACHE].clear()
+        tag_catalog.invalidate()
+        self.tag = Tag.objects.create(name='Quick')
+        self.tagged = Recipe.objects.create(name='Soup', directions='Simmer.')
+        self.tagged.tags.add(self.tag)
+        self.untagged = Recipe.objects.create(name='Stew', directions='Braise.')
+
+    def get(self, recipe=None):
+        url = reverse('recipe-update', args=[recipe.pk]) if recipe \
+            else reverse('recipe-create')
+        return self.client.get(url).content.decode()
+
+    def test_warm_renders_skip_the_tag_list(self):
+        for recipe in (None, self.tagged):
+            self.get(recipe)
+            with patch.object(TagSelectionFormset, 'as_pick_list') as render:
+                content = self.get(recipe)
+            render.assert_not_called()
+            self.assertIn('Quick', content)
+
+    def test_each_recipe_shows_its_own_tags(self):
+        for _ in range(2):
+            self.assertNotIn('checked', self.get())
+            self.assertIn('checked', self.get(self.tagged))
+            self.assertNotIn('checked', self.get(self.untagged))
+
+    def test_recipe_tag_changes_are_shown(self):
+        self.get(self.untagged)
+        self.untagged.tags.add(self.tag)
+        self.assertIn('checked', self.get(self.untagged))
+
+    def test_tag_writes_invalidate(self):
+        self.get()
+        self.get(self.tagged)
+        self.tag.name = 'Fast'
+        self.tag.save()
+        self.assertIn('Fast', self.get())
+        self.assertIn('Fast', self.get(self.tagged))
 
 
 @patch('recipe_app.views.render', return_value=HttpResponse())
@@ -393,6 +441,18 @@ class RecipeUpdateView_Post_Success_Tests(TestCase):
         mock_redirect.assert_called_with(
             reverse('recipe-detail', args=[updated_recipe.pk]))
 
+    @patch('recipe_app.bulk.recipes_changed')
+    def test_success_marks_recipe_changed(self, mock_recipes_changed, _):
+        self.post_data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS'] = '0'
+        self.post_data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-INITIAL_FORMS'] = '0'
+        self.post_data['name'] = 'New Recipe Name'
+
+        self.client.post(
+            reverse('recipe-update', args=[self.recipe.pk]), self.post_data
+        )
+
+        mock_recipes_changed.assert_called_with([self.recipe.pk])
+
     def test_success_adds_ingredient(self, mock_redirect):
         self.post_data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-name'] = 'New Ingredient'
         self.post_data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-1-measurement'] = 'new amount'
@@ -558,3 +618,84 @@ class RecipeUpdateView_Post_Success_Tests(TestCase):
 
         mock_redirect.assert_called_with(
             reverse('recipe-detail', args=[self.recipe.pk]))
+
+    def add_ingredients(self, count):
+        for x in range(count):
+            self.post_data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-{x + 1}-name'] = f'Ingredient {x}'
+            self.post_data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-{x + 1}-measurement'] = 'some'
+        self.post_data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS'] = str(count + 1)
+
+    def test_success_keeps_unchanged_rows(self, _):
+        self.add_ingredients(1)
+        self.client.post(
+            reverse('recipe-update', args=[self.recipe.pk]), self.post_data
+        )
+        added = RecipeIngredient.objects.get(
+            recipe=self.recipe, ingredient__name='Ingredient 0')
+
+        self.post_data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-measurement'] = 'a pinch'
+        self.client.post(
+            reverse('recipe-update', args=[self.recipe.pk]), self.post_data
+        )
+
+        self.assertCountEqual(
+            RecipeIngredient.objects.filter(recipe=self.recipe).values_list(
+                'pk', 'measurement'),
+            [(self.recipe_ingredient.pk, 'a pinch'), (added.pk, 'some')]
+        )
+
+    def test_success_updates_usage_counts(self, _):
+        self.post_data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-0-name'] = 'Replacement'
+
+        self.client.post(
+            reverse('recipe-update', args=[self.recipe.pk]), self.post_data
+        )
+
+        self.assertEqual(self.ingredient.usage.recipe_count, 0)
+        self.assertEqual(
+            Ingredient.objects.get(name='Replacement').usage.recipe_count, 1)
+
+    def test_unchanged_post_leaves_ingredient_and_tag_rows_alone(self, _):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                reverse('recipe-update', args=[self.recipe.pk]), self.post_data
+            )
+
+        writes = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+            and ('recipeingredient' in query['sql'] or 'recipe_tags' in query['sql'])
+        ]
+        self.assertEqual(writes, [])
+
+    def test_query_count_does_not_grow_with_ingredients(self, _):
+        self.add_ingredients(1)
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(
+                reverse('recipe-update', args=[self.recipe.pk]), self.post_data
+            )
+
+        self.add_ingredients(30)
+        with self.assertNumQueries(len(few.captured_queries)):
+            self.client.post(
+                reverse('recipe-update', args=[self.recipe.pk]), self.post_data
+            )
+
+    def test_query_count_does_not_grow_with_removed_ingredients(self, _):
+        self.add_ingredients(30)
+        self.client.post(
+            reverse('recipe-update', args=[self.recipe.pk]), self.post_data
+        )
+
+        self.post_data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS'] = '30'
+        with CaptureQueriesContext(connection) as one:
+            self.client.post(
+                reverse('recipe-update', args=[self.recipe.pk]), self.post_data
+            )
+
+        self.post_data[f'{INGREDIENT_LIST_FORMSET_PREFIX}-TOTAL_FORMS'] = '1'
+        with self.assertNumQueries(len(one.captured_queries)):
+            self.client.post(
+                reverse('recipe-update', args=[self.recipe.pk]), self.post_data
+            )
+        self.assertEqual(self.recipe.recipeingredient_set.count(), 1)
@@ -0,0 +1,136 @@
+import csv
+import itertools
+import json
+
+from django.db.models import Prefetch
+
+from recipe_app.models import Recipe, RecipeIngredient, Tag
+
+# Recipes are exchanged as JSON lines:
+#   {"name": ..., "directions": ...,
+#    "ingredients": [{"name": ..., "measurement": ...}, ...], "tags": [...]}
+# or as CSV with one row per recipe ingredient. Consecutive rows that share a
+# recipe name make up one recipe.
+CSV_FIELDS = ['name', 'directions', 'ingredient', 'measurement', 'tags']
+CSV_TAG_SEPARATOR = ';'
+
+FORMATS = ('jsonl', 'csv')
+EXPORT_CHUNK_SIZE = 500
+
+
+class RecordError(ValueError):
+    pass
+
+
+def format_for_path(path):
+    return 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+
+def _record(name, directions, ingredients, tags):
+    return {
+        'name': name,
+        'directions': directions or '',
+        'ingredients': ingredients,
+        'tags': tags,
+    }
+
+
+def _text(value, field, optional=False):
+    if value is None and optional:
+        return ''
+    if not isinstance(value, str):
+        raise TypeError(f'{field} must be a string')
+    return value
+
+
+def _items(value, field):
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise TypeError(f'{field} must be a list')
+    return value
+
+
+def _ingredient(data):
+    if not isinstance(data, dict):
+        raise TypeError('each ingredient must be an object')
+    return (
+        _text(data['name'], 'ingredient name'),
+        _text(data.get('measurement'), 'measurement', optional=True)
+    )
+
+
+def read_jsonl(lines):
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise TypeError('a recipe must be an object')
+            yield _record(
+                _text(data['name'], 'name'),
+                _text(data.get('directions'), 'directions', optional=True),
+                [_ingredient(ingredient)
+                 for ingredient in _items(data.get('ingredients'), 'ingredients')],
+                [_text(tag, 'tag') for tag in _items(data.get('tags'), 'tags')]
+            )
+        except (ValueError, KeyError, TypeError) as error:
+            raise RecordError(f'line {line_number}: {error}') from error
+
+
+def read_csv(lines):
+    rows = csv.DictReader(lines)
+    missing = set(CSV_FIELDS) - set(rows.fieldnames or [])
+    if missing:
+        raise RecordError(f'missing CSV columns: {", ".join(sorted(missing))}')
+
+    for name, group in itertools.groupby(rows, key=lambda row: row['name']):
+        ingredients = []
+        tags = []
+        directions = ''
+        for row in group:
+            directions = directions or row['directions']
+            if row['ingredient']:
+                ingredients.append((row['ingredient'], row['measurement'] or ''))
+            tags.extend(
+                tag.strip() for tag in row['tags'].split(CSV_TAG_SEPARATOR)
+                if tag.strip()
+            )
+        yield _record(name, directions, ingredients, list(dict.fromkeys(tags)))
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def export_recipes(chunk_size=EXPORT_CHUNK_SIZE):
+    # Recipes are read chunk_size at a time, each chunk with one query for its
+    # ingredients and one for its tags, so memory and queries don't grow with
+    # the size of the collection.
+    recipes = Recipe.objects.only('name', 'directions').order_by('pk').prefetch_related(
+        Prefetch(
+            'recipeingredient_set',
+            queryset=RecipeIngredient.objects.select_related('ingredient').only(
+                'recipe', 'measurement', 'ingredient__name').order_by('pk')
+        ),
+        Prefetch('tags', queryset=Tag.objects.order_by('name'))
+    )
+    for recipe in recipes.iterator(chunk_size=chunk_size):
+        yield _record(
+            recipe.name,
+            recipe.directions,
+            [(row.ingredient.name, row.measurement)
+             for row in recipe.recipeingredient_set.all()],
+            [tag.name for tag in recipe.tags.all()]
+        )
+
+
+def write_jsonl(records):
+    for record in records:
+        yield json.dumps({
+            **record,
+            'ingredients': [
+                {'name': name, 'measurement': measurement}
+                for name, measurement in record['ingredients']
+            ],
+        }, ensure_ascii=False) + '\n'
@@ -1,23 +1,64 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
 from django.shortcuts import render, redirect, get_object_or_404
 from django.core.paginator import Paginator
-from django.http import HttpResponse, HttpResponseNotFound, JsonResponse
+from django.http import (
+    HttpResponse,
+    HttpResponseNotFound,
+    JsonResponse,
+    StreamingHttpResponse
+)
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.http import urlencode
 from django.views.decorators.http import require_http_methods
 
-from recipe_app.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipe_app.bulk import create_recipes, update_recipes
+from recipe_app.catalog import tag_catalog
+from recipe_app.fragments import recipe_detail_fragments
+from recipe_app.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Tag
+)
 from recipe_app.forms.forms import (
     RecipeForm,
     IngredientFormSet,
-    IngredientInclusionFormSet,
-    RecipeInclusionForm,
+    IngredientInclusionForm,
     TagCreationFormset
 )
 
 from recipe_app.forms.tag_selection_formset import TagSelectionFormset
+from recipe_app.search import cache as search_cache
+from recipe_app.search.autocomplete import ingredient_name_index
+from recipe_app.search import full_text
+from recipe_app.search.facets import facets as search_facets
+from recipe_app.search.criteria import (
+    AND_PARAM,
+    INCLUSION_PARAMS,
+    PANTRY_PARAM,
+    TAGS_PARAM,
+    TEXT_PARAM,
+    SearchCriteria,
+    parse_ids
+)
+from recipe_app.search.index import filter_by_ids, recipe_search_index
+from recipe_app.search.pagination import (
+    keyset_page,
+    name_prefix_page,
+    offset_page
+)
+from recipe_app.transfer import export_recipes, write_jsonl
 
 INGREDIENT_SUGGESTION_PAGINATION = 10
+INGREDIENT_CATALOG_PAGE_SIZE = 100
+INGREDIENT_CATALOG_MAX_PAGE_SIZE = 500
+PANTRY_RESULT_LIMIT = 50
 
 RECIPE_NOT_FOUND_ERROR = 'Recipe not found'
+PAGINATION_PARAMS = ('after', 'before')
 TAG_CREATE_FORMSET_PREFIX = 'tag-create-form'
 TAG_SELECT_FORMSET_PREFIX = 'tag-select-form'
 INGREDIENT_LIST_FORMSET_PREFIX = 'ingredient-form'
@@ -27,13 +68,31 @@ def index(request):
     return HttpResponse("Recipe Index Page!!!")
 
 
-def recipe_detail(request, pk):
-    recipe = get_object_or_404(Recipe, pk=pk)
-    recipe_ingredients = recipe.ingredients.through.objects.filter(
-        recipe=recipe).all()
+def _render_recipe_detail(pk):
+    # Three queries however many ingredients and tags the recipe has.
+    recipe = get_object_or_404(
+        Recipe.objects.prefetch_related(
+            Prefetch(
+                'recipeingredient_set',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient').order_by('pk')
+            ),
+            'tags'
+        ),
+        pk=pk
+    )
     ingredients_list = [{'name': ri.ingredient.name,
-                         'measurement': ri.measurement} for ri in recipe_ingredients]
+                         'measurement': ri.measurement}
+                        for ri in recipe.recipeingredient_set.all()]
     context = {'recipe': recipe, 'ingredients_list': ingredients_list}
+    return render_to_string('recipe_app/recipe_detail_content.html', context)
+
+
+def recipe_detail(request, pk):
+    # A cached page body needs no queries at all.
+    content = recipe_detail_fragments.get_or_render(
+        pk, lambda: _render_recipe_detail(pk))
+    context = {'recipe_id': pk, 'content': content}
     return render(request, 'recipe_app/recipe_detail.html', context)
 
 
@@ -67,6 +126,45 @@ def _validate_recipe_form_data(request):
     return recipe_form, ingredients_formset, tag_create_formset, tag_select_formset
 
 
+def _submitted_ingredients(ingredients_formset):
+    return [
+        entry for entry in ingredients_formset.cleaned_data
+        if not entry.get('DELETE') and 'name' in entry
+    ]
+
+
+def _submitted_tag_names(tag_create_formset, tag_select_formset):
+    # Tags named in the create forms, then the selected ones. Selections post
+    # tag ids; ids of tags deleted since the form was rendered are dropped.
+    names = [
+        entry['tag_name'] for entry in tag_create_formset.cleaned_data
+        if 'tag_name' in entry
+    ] if tag_create_formset.is_valid() else []
+    selected_ids = [
+        entry['id'] for entry in tag_select_formset.cleaned_data
+        if entry.get('include', False)
+    ] if tag_select_formset.is_valid() else []
+
+    if selected_ids:
+        selected = dict(Tag.objects.filter(pk__in=selected_ids).values_list('pk', 'name'))
+        names += [selected[id] for id in selected_ids if id in selected]
+    return names
+
+
+def _submitted_record(recipe_form, ingredients_formset, tag_create_formset, tag_select_formset):
+    # The submitted recipe as a recipe_app.transfer record, so the pages write
+    # through recipe_app.bulk like the importer and the API.
+    return {
+        'name': recipe_form.cleaned_data['name'],
+        'directions': recipe_form.cleaned_data['directions'],
+        'ingredients': [
+            (entry['name'], entry['measurement'])
+            for entry in _submitted_ingredients(ingredients_formset)
+        ],
+        'tags': _submitted_tag_names(tag_create_formset, tag_select_formset)
+    }
+
+
 def recipe_create(request):
     if ('POST' == request.method):
         (recipe_form,
@@ -83,42 +181,19 @@ def recipe_create(request):
                        }
             return render(request, 'recipe_app/recipe_form.html', context)
 
-        recipe_model = Recipe(
-            name=recipe_form.cleaned_data['name'],
-            directions=recipe_form.cleaned_data['directions']
-        )
-        recipe_model.save()
-
-        for form in ingredients_formset.cleaned_data:
-            if not form.get('DELETE') and 'name' in form:
-                temp_ingredient = Ingredient(name=form['name'])
-                temp_ingredient.save()
-
-                RecipeIngredient(
-                    recipe=recipe_model,
-                    ingredient=temp_ingredient,
-                    measurement=form['measurement']
-                ).save()
-
-        if tag_create_formset.is_valid():
-            for form in tag_create_formset.cleaned_data:
-                if form != {}:
-                    recipe_model.tags.create(name=form['tag_name'])
-
-        if tag_select_formset.is_valid():
-            for form in tag_select_formset.cleaned_data:
-                if form.get('include', False):
-                    recipe_model.tags.add(
-                        Tag.objects.get(id=form['id'])
-                    )
+        with transaction.atomic():
+            [recipe_model] = create_recipes([_submitted_record(
+                recipe_form, ingredients_formset, tag_create_formset, tag_select_formset)])
 
         return redirect(reverse('recipe-detail', args=[recipe_model.pk]))
     else:
+        tag_catalog_version = tag_catalog.generation()
         context = {
             'recipe': RecipeForm(),
             'ingredients_list': IngredientFormSet(prefix=INGREDIENT_LIST_FORMSET_PREFIX),
             'tag_create': TagCreationFormset(prefix=TAG_CREATE_FORMSET_PREFIX),
             'tag_select': TagSelectionFormset(prefix=TAG_SELECT_FORMSET_PREFIX),
+            'tag_catalog_version': tag_catalog_version,
             'action': 'create'
         }
         return render(request, 'recipe_app/recipe_form.html', context)
@@ -139,42 +214,14 @@ def recipe_update(request, pk):
                        'tag_create': tag_create_formset}
             return render(request, 'recipe_app/recipe_form.html', context)
 
-        recipe_model = Recipe.objects.filter(pk=pk)
-
-        if not recipe_model.exists():
-            return HttpResponseNotFound(RECIPE_NOT_FOUND_ERROR)
+        # Only the rows that differ from what's stored are written, all in one
+        # transaction.
+        with transaction.atomic():
+            if not Recipe.objects.filter(pk=pk).exists():
+                return HttpResponseNotFound(RECIPE_NOT_FOUND_ERROR)
+            update_recipes({pk: _submitted_record(
+                recipe_form, ingredients_formset, tag_create_formset, tag_select_formset)})
 
-        recipe_model.update(
-            name=recipe_form.cleaned_data['name'],
-            directions=recipe_form.cleaned_data['directions']
-        )
-
-        for ri in RecipeIngredient.objects.filter(recipe=pk).all():
-            ri.delete()
-
-        for entry in ingredients_formset.cleaned_data:
-            if not entry.get('DELETE') and 'name' in entry:
-                ingredient = Ingredient.objects.get_or_create(
-                    name=entry['name'])
-                RecipeIngredient.objects.create(
-                    recipe=recipe_model[0],
-                    ingredient=ingredient[0],
-                    measurement=entry['measurement']
-                )
-
-        recipe_model[0].tags.clear()
-
-        for entry in tag_create_formset.cleaned_data:
-            if 'tag_name' in entry:
-                recipe_model[0].tags.add(
-                    Tag.objects.get_or_create(name=entry['tag_name'])[0]
-                )
-
-        for entry in tag_select_formset.cleaned_data:
-            if entry.get('include', False):
-                recipe_model[0].tags.add(
-                    Tag.objects.get_or_create(name=entry['tag_name'])[0]
-                )
         return redirect(reverse('recipe-detail', args=[pk]))
 
     else:
@@ -200,77 +247,158 @@ def recipe_update(request, pk):
             prefix=INGREDIENT_LIST_FORMSET_PREFIX
         )
 
+        tag_catalog_version = tag_catalog.generation()
+        selected_tags = list(recipe.tags.all())
         context = {
             'recipe': recipe_form,
             'ingredients_list': ingredients_formset,
             'tag_create': TagCreationFormset(prefix=TAG_CREATE_FORMSET_PREFIX),
             'tag_select': TagSelectionFormset(
                 prefix=TAG_SELECT_FORMSET_PREFIX,
-                selected_tags=recipe.tags.all()
+                selected_tags=selected_tags
             ),
+            'tag_catalog_version': tag_catalog_version,
+            'selected_tag_ids': sorted(tag.pk for tag in selected_tags),
             'action': 'update',
             'recipe_pk': recipe.pk
         }
         return render(request, 'recipe_app/recipe_form.html', context)
 
 
+def _results_url(criteria, **cursor):
+    params = {**criteria.params(), **cursor}
+    url = reverse('recipe-results')
+    return f'{url}?{urlencode(params)}' if params else url
+
+
 def recipe_search(request):
     if 'POST' == request.method:
-        inclusion_forms = IngredientInclusionFormSet(
-            request.POST, prefix=INGREDIENT_LIST_FORMSET_PREFIX)
-        
-        if inclusion_forms.is_valid():
-            exclude_ids = [
-                i['id'] for i in inclusion_forms.cleaned_data if i['inclusion'] == 'exclude'
-            ]
-            or_ids = [
-                i['id'] for i in inclusion_forms.cleaned_data if i['inclusion'] == 'or'
-            ]
-            and_ids = [
-                i['id'] for i in inclusion_forms.cleaned_data if i['inclusion'] == 'and'
-            ]
-        else:
-            exclude_ids = or_ids = and_ids = []
-
-        recipe_matches = Recipe.objects.exclude(ingredients__id__in=exclude_ids)
-
-        if or_ids:
-            recipe_matches = recipe_matches.filter(ingredients__id__in=or_ids)
-        if '' != request.POST.dict().get('recipe_name', ''):
-            recipe_matches = recipe_matches.filter(
-                name__contains=request.POST.dict()['recipe_name'])
-        if and_ids:
-            for id in and_ids:
-                recipe_matches = recipe_matches.filter(ingredients__id=id)
-
-        tag_select_formset = TagSelectionFormset(
-            data={k: v for (k, v) in request.POST.items()
-                  if TAG_SELECT_FORMSET_PREFIX in k},
-            prefix=TAG_SELECT_FORMSET_PREFIX
+        # Searches used to be posted; send them to their results URL so the
+        # back button and any caches see a plain GET.
+        return redirect(_results_url(SearchCriteria.from_params(request.POST)))
+
+    # The ingredient picker pages through ingredient_catalog on the client
+    # and only submits the ingredients that were given an inclusion. The tag
+    # panel is cached under the catalog generation; it's read before the
+    # formset, so a panel is never filed under a newer generation than the
+    # tags it shows.
+    tag_catalog_version = tag_catalog.generation()
+    context = {
+        'inclusion_choices': IngredientInclusionForm.radio_button_options,
+        'inclusion_params': INCLUSION_PARAMS,
+        'catalog_page_size': INGREDIENT_CATALOG_PAGE_SIZE,
+        'text_param': TEXT_PARAM,
+        'tags_param': TAGS_PARAM,
+        'tag_select': TagSelectionFormset(prefix=TAG_SELECT_FORMSET_PREFIX),
+        'tag_catalog_version': tag_catalog_version
+    }
+    return render(request, 'recipe_app/recipe_search.html', context)
+
+
+def recipe_results(request):
+    criteria = SearchCriteria.from_params(request.GET)
+    cursor = {k: request.GET[k] for k in PAGINATION_PARAMS if request.GET.get(k)}
+
+    # Every search has exactly one URL, so it is only ever cached once.
+    canonical_params = {k: [v] for k, v in {**criteria.params(), **cursor}.items()}
+    if dict(request.GET.lists()) != canonical_params:
+        return redirect(_results_url(criteria, **cursor))
+
+    if criteria.text:
+        matches = search_cache.text_ids(criteria)
+        page = offset_page(
+            matches,
+            settings.RECIPE_LIST_PAGE_SIZE,
+            after=cursor.get('after'),
+            before=cursor.get('before')
         )
-        if tag_select_formset.is_valid():
-            for entry in tag_select_formset.cleaned_data:
-                if entry.get('include', False):
-                    recipe_matches = recipe_matches.filter(
-                        tags__id=entry['id'])
-
-        context = {'recipes_list': recipe_matches.distinct().order_by('name')}
-        return render(request, 'recipe_app/recipe_list.html', context)
+        recipes_list = full_text.hit_recipes(
+            search_cache.text_hits(criteria.text, page.items))
     else:
-        all_ingredients = list(Ingredient.objects.order_by('name').values())
+        matches = None
+        recipe_matches = Recipe.objects.all()
+        if criteria.has_filters():
+            recipe_matches = filter_by_ids(
+                recipe_matches, search_cache.recipe_ids(criteria))
+
+        page = keyset_page(
+            recipe_matches,
+            settings.RECIPE_LIST_PAGE_SIZE,
+            after=cursor.get('after'),
+            before=cursor.get('before')
+        )
+        recipes_list = page.items
 
-        context = {
-            'ingredients': IngredientInclusionFormSet(initial=all_ingredients, prefix=INGREDIENT_LIST_FORMSET_PREFIX),
-            'recipe_name': RecipeInclusionForm(),
-            'tag_select': TagSelectionFormset(prefix=TAG_SELECT_FORMSET_PREFIX)
-        }
-        return render(request, 'recipe_app/recipe_search.html', context)
+    # The refine form's checkboxes stand for the tags and "and" ingredients;
+    # the rest of the search rides along unchanged.
+    facet_params = {
+        name: value for name, value in criteria.params().items()
+        if name not in (AND_PARAM, TAGS_PARAM)
+    }
+
+    context = {
+        'recipes_list': recipes_list,
+        'facets': search_facets(criteria, recipe_ids=matches),
+        'facet_params': facet_params,
+        'and_param': AND_PARAM,
+        'tags_param': TAGS_PARAM,
+        'page': page,
+        'previous_url': page.previous_cursor and _results_url(
+            criteria, before=page.previous_cursor),
+        'next_url': page.next_cursor and _results_url(
+            criteria, after=page.next_cursor)
+    }
+    return render(request, 'recipe_app/recipe_list.html', context)
+
+
+def recipe_pantry(request):
+    matches = recipe_search_index.pantry_matches(
+        parse_ids(request.GET, PANTRY_PARAM), limit=PANTRY_RESULT_LIMIT)
+
+    recipes = Recipe.objects.in_bulk([recipe_id for recipe_id, _ in matches])
+    ingredient_names = dict(Ingredient.objects.filter(
+        pk__in={id for _, missing in matches for id in missing}
+    ).values_list('pk', 'name'))
+
+    results = []
+    for recipe_id, missing in matches:
+        if recipe_id not in recipes:
+            continue
+        results.append({
+            'id': recipe_id,
+            'name': recipes[recipe_id].name,
+            'url': reverse('recipe-detail', args=[recipe_id]),
+            'missing': sorted(
+                ({'id': id, 'name': ingredient_names[id]}
+                 for id in missing if id in ingredient_names),
+                key=lambda ingredient: ingredient['name']
+            )
+        })
+
+    return JsonResponse({'recipes': results})
 
-def ingredient_autocomplete(request):
-    results = Ingredient.objects.all().values_list('name', flat=True)
 
-    query = request.GET.get('query', False)
-    if query:
-        results = results.filter(name__icontains=query)
+def recipe_export(request):
+    response = StreamingHttpResponse(
+        write_jsonl(export_recipes()), content_type='application/x-ndjson')
+    response['Content-Disposition'] = 'attachment; filename="recipes.jsonl"'
+    return response
 
-    return JsonResponse(list(results[:INGREDIENT_SUGGESTION_PAGINATION]), safe=False)
\ No newline at end of file
+
+def ingredient_catalog(request):
+    total, offset, ingredients = name_prefix_page(
+        Ingredient.objects.values('id', 'name'), request.GET,
+        INGREDIENT_CATALOG_PAGE_SIZE, INGREDIENT_CATALOG_MAX_PAGE_SIZE)
+    return JsonResponse({
+        'total': total,
+        'offset': offset,
+        'ingredients': ingredients
+    })
+
+
+def ingredient_autocomplete(request):
+    return JsonResponse(
+        ingredient_name_index.match(
+            request.GET.get('query', ''), INGREDIENT_SUGGESTION_PAGINATION),
+        safe=False
+    )